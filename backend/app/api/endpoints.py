@@ -1,14 +1,49 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse, Response, FileResponse
+from starlette.background import BackgroundTask
+import asyncio
+import threading
 import mlflow
 import mlflow.pyfunc
+import numpy as np
 import pandas as pd 
-from app.utils.load_model import load_best_model_from_mlflow
+from pyarrow import ArrowException
+from app.utils.load_model import load_serving_model
+from app.utils.feature_vector import FeatureLayout, predict_items, predict_columns, warm_model
+from app.utils.columnar import (
+    INPUT_FORMATS, ColumnValidationError, validate_columns, read_column_chunks, spool_body, discard_spool, response_encoder
+)
+from app.utils.model_manager import ModelManager
 from fastapi import HTTPException
 from app.models.batch_prediction_input import BatchPredictionInput
 from app.models.batch_prediction_output import BatchPredictionOutput
 from app.models.config import Config
+from app.models.scoring_job_input import ScoringJobInput
+from app.models.key_prediction_input import KeyPredictionInput
+from app.models.sales_input import SalesInput
+from app.models.sales_keys_input import SalesKeysInput
+from app.models.forecast_input import ForecastInput
+from app.models.forecast_output import ForecastOutput
 from app.models.prediction_input import PredictionInput
 from app.models.prediction_output import PredictionOutput
+from app.models.hierarchical_prediction_input import HierarchicalPredictionInput
+from app.models.hierarchical_prediction_output import HierarchicalPredictionOutput, NodeForecast
+from app.utils.reconciliation import reconcile_batch, level_name
+from app.utils.micro_batcher import MicroBatcher
+from app.utils.inference_pool import InferencePool, PoolSaturated
+from app.utils.prediction_cache import PredictionCache
+from app.utils.transport import response_format, encode_response
+from app.utils.scoring_jobs import ScoringJobs, JobError
+from app.utils.feature_store import FeatureStore, MissingKeysError, KEYS, apply_overrides
+from app.utils.sales_history import SalesHistory, SalesError
+from app.utils.forecasting import recursive_forecast
+from app.utils.metrics import REGISTRY, BATCH_ROWS, Gauge, Counter, stage, observe_validation
+from app.config import (
+    MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS, INFERENCE_MAX_WORKERS, INFERENCE_MAX_QUEUE,
+    PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL_S, COLUMNAR_CHUNK_ROWS, COLUMNAR_SPOOL_DIR,
+    SCORING_DATA_DIR, SCORING_DATASET_PATTERN, SCORING_JOBS_DIR, SCORING_JOB_WORKERS, SCORING_CHUNK_ROWS,
+    FEATURE_STORE_DIR, FORECAST_MAX_HORIZON, SERVE_WORKERS
+)
 
 
 api_router = APIRouter(
@@ -17,90 +52,626 @@ api_router = APIRouter(
 
 loaded_model = None
 model_info= {}
+feature_schema = None
+feature_layout = None
+# Set by the app lifespan when registry versions are checked in the background
+registry_watcher = None
+# Set by the app lifespan when FEATURE_STORE_DIR is configured
+feature_store = None
+# Daily sales pushed by stores; replaced by the snapshot restored at startup
+sales_history = SalesHistory()
+# The history lives in one process, so pre-forked workers would each keep
+# (and snapshot) their own; pushes are refused unless a single worker serves
+sales_push_enabled = SERVE_WORKERS <= 1
+
+# Guards the served model, its info and feature layout, which change together
+served_lock = threading.Lock()
+
+def get_feature_layout():
+    # Rebuilt only when the feature schema of the served model changes
+    global feature_layout
+    if feature_layout is None or feature_layout.schema is not feature_schema:
+        feature_layout = FeatureLayout(feature_schema)
+    return feature_layout
+
+def install_model(model, info, schema):
+    global loaded_model, model_info, feature_schema, feature_layout
+    layout = FeatureLayout(schema)
+    with served_lock:
+        loaded_model, model_info, feature_schema, feature_layout = model, info, schema, layout
+
+def active_model_info():
+    return model_info if loaded_model is not None else None
+
+def warm_candidate(model, schema):
+    warm_model(model, FeatureLayout(schema), batch_sizes=(1, MICRO_BATCH_MAX_SIZE))
+
+# Loads one model at a time; new registry versions are warmed before the swap
+model_manager = ModelManager(
+    load=lambda entry: load_serving_model(entry),
+    install=install_model,
+    active=active_model_info,
+    warm=warm_candidate
+)
+
+async def ensure_model_loaded():
+    # Concurrent first requests share one load instead of each starting one
+    if loaded_model is None:
+        try:
+            await asyncio.to_thread(model_manager.ensure_loaded)
+        except Exception as e:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Model not loaded. Please call /load-model endpoint first. Error: {str(e)}"
+            )
+
+# Model calls run off the event loop so /health and new requests stay responsive
+inference_pool = InferencePool(max_workers=INFERENCE_MAX_WORKERS, max_queue=INFERENCE_MAX_QUEUE)
+
+# Repeated feature rows are answered without calling the model
+prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL_S) if PREDICTION_CACHE_SIZE > 0 else None
+
+def served_model():
+    # One consistent model and layout, even while a new version is swapped in
+    with served_lock:
+        return loaded_model, get_feature_layout()
+
+def predict_with_cache(model, X, predict_rows, lookup=True):
+    """
+    Predictions for the feature rows X, calling `predict_rows(index)` only
+    for rows missing from the cache (index None for all rows).
+    """
+    if lookup:
+        predictions, missing = prediction_cache.lookup(model, X)
+    else:
+        predictions, missing = None, list(range(len(X)))
+    if len(missing) == len(X):
+        predictions = np.asarray(predict_rows(None), dtype=np.float64).ravel()
+    elif missing:
+        predictions[missing] = np.asarray(predict_rows(missing)).ravel()
+    prediction_cache.store(model, X[missing], predictions[missing])
+    return predictions
+
+def predict_current_model(items, lookup=True):
+    """Predictions of the served model; only rows missing from the cache are predicted."""
+    model, layout = served_model()
+    if prediction_cache is None:
+        return predict_items(model, items, layout)
+    with stage("features"):
+        X = layout.fill(items)
+
+    def predict_rows(index):
+        if index is None:
+            return predict_items(model, items, layout, X)
+        return predict_items(model, [items[i] for i in index], layout, X[index])
+
+    return predict_with_cache(model, X, predict_rows, lookup)
+
+def predict_current_model_columns(columns):
+    """predict_current_model for one array per feature, validated per column."""
+    model, layout = served_model()
+    columns = validate_columns(columns, layout.features)
+    if prediction_cache is None:
+        return predict_columns(model, columns, layout)
+    with stage("features"):
+        X = layout.from_columns(columns)
+
+    def predict_rows(index):
+        if index is None:
+            return predict_columns(model, columns, layout, X)
+        return predict_columns(model, {name: values[index] for name, values in columns.items()}, layout, X[index])
+
+    return predict_with_cache(model, X, predict_rows)
+
+def cached_prediction(item):
+    """Cached prediction for a single input, None on a miss."""
+    if prediction_cache is None:
+        return None
+    model, layout = served_model()
+    with stage("features"):
+        X = layout.fill([item])
+    predictions, missing = prediction_cache.lookup(model, X)
+    return None if missing else predictions[0]
+
+def load_feature_store():
+    global feature_store
+    if FEATURE_STORE_DIR:
+        feature_store = FeatureStore.load(FEATURE_STORE_DIR)
+        print(f"✅ Feature store loaded: {len(feature_store)} rows from {FEATURE_STORE_DIR}")
+
+def with_live_features(columns, keys):
+    """Lag and mean features derived from pushed sales replace stored ones where known."""
+    if not len(sales_history):
+        return columns
+    live = sales_history.features(keys["item_id"], keys["store_id"], keys["d"])
+    for name, values in live.items():
+        columns[name] = np.where(np.isnan(values), columns[name], values)
+    return columns
+
+def predict_stored_features(keys, overrides):
+    """
+    predict_current_model_columns for the stored features of `keys`,
+    updated from pushed sales, with `overrides` applied.
+    """
+    keys = validate_columns(keys, list(KEYS))
+    rows = feature_store.rows(keys["item_id"], keys["store_id"], keys["d"])
+    columns = with_live_features(feature_store.columns(rows), keys)
+    return predict_current_model_columns(apply_overrides(columns, overrides, len(rows)))
+
+def forecast_stored_features(series, start, horizon, overrides):
+    """
+    recursive_forecast of `series` over `horizon` days from `start`, from
+    the stored features of each day and the sales pushed before `start`.
+    A series without stored features for a later day keeps those of its
+    last stored day.
+    """
+    series = validate_columns(series, ["item_id", "store_id"])
+    item_ids, store_ids = series["item_id"], series["store_id"]
+    rows = feature_store.rows(item_ids, store_ids, np.full(len(item_ids), start))
+    past, total, days = sales_history.window_before(item_ids, store_ids, start)
+    # Without pushed sales, the expanding mean of `start` is taken to cover days 1 .. start - 1
+    days = np.where(days > 0, days, start - 1)
+
+    def day_columns(k):
+        if k:
+            found = feature_store.lookup(item_ids, store_ids, np.full(len(item_ids), start + k))
+            rows[:] = np.where(found >= 0, found, rows)
+        columns = feature_store.columns(rows)
+        columns["d"] = np.full(len(rows), start + k)
+        return apply_overrides(columns, overrides, len(rows))
+
+    return recursive_forecast(predict_current_model_columns, day_columns, past, total, days, horizon)
+
+def predict_cache_misses(items):
+    # Single predictions reach the batcher only after missing the cache
+    BATCH_ROWS.labels("/api/predict").observe(len(items))
+    return predict_current_model(items, lookup=False)
+
+# Concurrent single predictions share one vectorized call of the current model
+predict_batcher = MicroBatcher(
+    predict_cache_misses,
+    max_batch_size=MICRO_BATCH_MAX_SIZE,
+    max_wait_ms=MICRO_BATCH_MAX_WAIT_MS,
+    run=inference_pool.run,
+    max_in_flight=INFERENCE_MAX_WORKERS,
+    max_pending=MICRO_BATCH_MAX_SIZE * INFERENCE_MAX_QUEUE
+)
+
+def served_for_jobs():
+    model_manager.ensure_loaded()
+    with served_lock:
+        return loaded_model, get_feature_layout(), model_info
+
+# Bulk scoring jobs run in the background on their own threads, started by the app lifespan
+scoring_jobs = ScoringJobs(
+    SCORING_JOBS_DIR,
+    SCORING_DATA_DIR,
+    served_for_jobs,
+    workers=SCORING_JOB_WORKERS,
+    chunk_rows=SCORING_CHUNK_ROWS,
+    pattern=SCORING_DATASET_PATTERN
+)
+
+def saturated(e):
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
 
 @api_router.get("/model-info", summary="Model Info Endpoint")
 async def get_model_info():
     if loaded_model is None:
         raise HTTPException(status_code=404, detail="Model not loaded")
+    # Read once: the reload thread may clear it between two reads
+    pending = model_manager.pending
     return {
         "status":"loaded",
-        "info": model_info
+        "info": model_info,
+        "active_version": model_info.get("version"),
+        "pending_version": pending["version"] if pending else None,
+        "reload": model_manager.stats(),
+        "batching": predict_batcher.stats(),
+        "registry": registry_watcher.stats() if registry_watcher is not None else None
     }
     
 @api_router.post("/predict", response_model=PredictionOutput, summary="Make Sales Prediction")
-async def predict(input_data: PredictionInput):
+async def predict(input_data: PredictionInput, request: Request):
     """
     Make a sales prediction using the loaded model.
     
     Args:
         input_data: Input features for prediction
+        request: Its Accept header selects JSON, MessagePack or raw float32
     
     Returns:
         Prediction result
     """
-    global loaded_model, model_info
-    
-    # Load model if not already loaded
-    if loaded_model is None:
-        try:
-            loaded_model, model_info = load_best_model_from_mlflow()
-        except Exception as e:
-            raise HTTPException(
-                status_code=503,
-                detail=f"Model not loaded. Please call /load-model endpoint first. Error: {str(e)}"
-            )
+    observe_validation(request)
+    media_type = response_format(request, raw_predictions=True)
+    await ensure_model_loaded()
     
     try:
-        # Convert input to DataFrame
-        input_dict = input_data.model_dump()
-        input_df = pd.DataFrame([input_dict])
-        
-        # Make prediction
-        prediction = loaded_model.predict(input_df)
+        # Cache misses are queued with concurrent requests and predicted in one model call
+        prediction = cached_prediction(input_data)
+        if prediction is None:
+            prediction = await predict_batcher.submit(input_data)
         
         # Return result
-        return PredictionOutput(
-            prediction=float(prediction[0]),
-            model_name=model_info.get("name", "unknown"),
-            model_version=str(model_info.get("version", "unknown"))
-        )
+        return encode_response(media_type, {
+            "prediction": float(prediction),
+            "model_name": model_info.get("name", "unknown"),
+            "model_version": str(model_info.get("version", "unknown"))
+        }, predictions_key="prediction")
         
+    except PoolSaturated as e:
+        raise saturated(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
 @api_router.post("/predict-batch", response_model=BatchPredictionOutput, summary="Make Batch Sales Predictions")
-async def predict_batch(input_data: BatchPredictionInput):
-
-    global loaded_model, model_info
-    
-    # Load model if not already loaded
-    if loaded_model is None:
-        try:
-            loaded_model, model_info = load_best_model_from_mlflow()
-        except Exception as e:
-            raise HTTPException(
-                status_code=503,
-                detail=f"Model not loaded. Please call /load-model endpoint first. Error: {str(e)}"
-            )
+async def predict_batch(input_data: BatchPredictionInput, request: Request):
+    """
+    Predict a batch sent either as `data`, one object per row, or as
+    `columns`, one array per feature. Columns skip per-row validation and
+    are checked and converted with vectorized NumPy operations. The Accept
+    header selects a JSON, MessagePack or raw float32 response.
+    """
+    observe_validation(request)
+    media_type = response_format(request, raw_predictions=True)
+    await ensure_model_loaded()
     
     try:
-        # Convert input to DataFrame
-        input_list = [item.model_dump() for item in input_data.data]
-        input_df = pd.DataFrame(input_list)
-        
         # Make predictions
-        predictions = loaded_model.predict(input_df)
+        if input_data.columns is not None:
+            predictions = await inference_pool.run(predict_current_model_columns, input_data.columns)
+        else:
+            predictions = await inference_pool.run(predict_current_model, input_data.data)
+        BATCH_ROWS.labels("/api/predict-batch").observe(len(predictions))
+        
+        # Return results, serialized straight from the NumPy array
+        return encode_response(media_type, {
+            "predictions": np.ascontiguousarray(predictions, dtype=np.float64).ravel(),
+            "model_name": model_info.get("name", "unknown"),
+            "model_version": str(model_info.get("version", "unknown"))
+        })
         
-        # Return results
-        return BatchPredictionOutput(
-            predictions=[float(pred) for pred in predictions],
-            model_name=model_info.get("name", "unknown"),
-            model_version=str(model_info.get("version", "unknown"))
+    except PoolSaturated as e:
+        raise saturated(e)
+    except ColumnValidationError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid columns: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
+
+@api_router.post("/predict-keys", response_model=BatchPredictionOutput, summary="Predict from Stored Features")
+async def predict_keys(input_data: KeyPredictionInput, request: Request):
+    """
+    Predict (item_id, store_id, d) keys from the features stored on the
+    server, so lags, averages and trends need not be sent. `overrides`
+    replaces stored fields, e.g. a new sell_price. Lookup and prediction
+    are vectorized over all keys.
+    """
+    observe_validation(request)
+    media_type = response_format(request, raw_predictions=True)
+    if feature_store is None:
+        raise HTTPException(status_code=503, detail="No feature store loaded, set FEATURE_STORE_DIR")
+    unknown = sorted(name for name in input_data.overrides if name not in feature_store.fields or name in KEYS)
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Cannot override {unknown}")
+    await ensure_model_loaded()
+    
+    try:
+        keys = {name: getattr(input_data, name) for name in KEYS}
+        predictions = await inference_pool.run(predict_stored_features, keys, input_data.overrides)
+        BATCH_ROWS.labels("/api/predict-keys").observe(len(predictions))
+        return encode_response(media_type, {
+            "predictions": np.ascontiguousarray(predictions, dtype=np.float64).ravel(),
+            "model_name": model_info.get("name", "unknown"),
+            "model_version": str(model_info.get("version", "unknown"))
+        })
+        
+    except PoolSaturated as e:
+        raise saturated(e)
+    except MissingKeysError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ColumnValidationError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid keys or overrides: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+
+@api_router.post("/sales", summary="Push Daily Sales")
+async def push_sales(input_data: SalesInput):
+    """
+    Record actual `sold` values per (item_id, store_id, d), in one call for
+    any number of series. Each series continues at the day after its last
+    one; days of the last 36 may be sent again as corrections. The lag,
+    rolling and expanding features of /predict-keys follow at once.
+    """
+    if not sales_push_enabled:
+        raise HTTPException(
+            status_code=503,
+            detail="Pushed sales are kept by a single process, set SERVE_WORKERS=1 to accept them"
         )
+    try:
+        columns = validate_columns(input_data.model_dump(), list(KEYS) + ["sold"])
+        new_series = sales_history.push(columns["item_id"], columns["store_id"], columns["d"], columns["sold"])
+    except (ColumnValidationError, SalesError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid sales: {str(e)}")
+    return {"pushed": len(columns["sold"]), "new_series": new_series, "series": len(sales_history)}
+
+@api_router.post("/sales/features", summary="Lag Features from Pushed Sales")
+async def sales_features(input_data: SalesKeysInput):
+    """sold_lag_*, rolling_sold_mean and expanding_sold_mean of each target day, null where not derivable."""
+    try:
+        keys = validate_columns(input_data.model_dump(), list(KEYS))
+    except ColumnValidationError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid keys: {str(e)}")
+    return encode_response("application/json", sales_history.features(keys["item_id"], keys["store_id"], keys["d"]))
+
+@api_router.post("/forecast", response_model=ForecastOutput, summary="Recursive Multi-Day Forecast")
+async def forecast(input_data: ForecastInput, request: Request):
+    """
+    Forecast `horizon` days from day `d` for every (item_id, store_id)
+    series, one vectorized model call per day. Each day's predictions feed
+    the lag, rolling and expanding features of the next, starting from the
+    stored features and the sales pushed to /sales. Returns one row of
+    predictions per day, as JSON or MessagePack per the Accept header.
+    """
+    observe_validation(request)
+    media_type = response_format(request)
+    if feature_store is None:
+        raise HTTPException(status_code=503, detail="No feature store loaded, set FEATURE_STORE_DIR")
+    if not 1 <= input_data.horizon <= FORECAST_MAX_HORIZON:
+        raise HTTPException(status_code=422, detail=f"horizon must be between 1 and {FORECAST_MAX_HORIZON}")
+    derived = set(KEYS) | set(sales_history.feature_names)
+    unknown = sorted(name for name in input_data.overrides if name not in feature_store.fields or name in derived)
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Cannot override {unknown}")
+    await ensure_model_loaded()
+    
+    try:
+        series = {"item_id": input_data.item_id, "store_id": input_data.store_id}
+        predictions = await inference_pool.run(
+            forecast_stored_features, series, input_data.d, input_data.horizon, input_data.overrides
+        )
+        BATCH_ROWS.labels("/api/forecast").observe(predictions.size)
+        return encode_response(media_type, {
+            "days": np.arange(input_data.d, input_data.d + input_data.horizon),
+            "item_id": input_data.item_id,
+            "store_id": input_data.store_id,
+            "predictions": predictions,
+            "model_name": model_info.get("name", "unknown"),
+            "model_version": str(model_info.get("version", "unknown"))
+        })
         
+    except PoolSaturated as e:
+        raise saturated(e)
+    except MissingKeysError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ColumnValidationError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid series or overrides: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Forecast failed: {str(e)}")
+
+def validate_batch_file(path, input_format, features):
+    for _ in read_column_chunks(path, input_format, features, COLUMNAR_CHUNK_ROWS):
+        pass
+
+def predict_next_chunk(chunks, model, layout):
+    """Predictions for the next chunk, None once the batch is exhausted."""
+    chunk = next(chunks, None)
+    if chunk is None:
+        return None
+    _, columns = chunk
+    BATCH_ROWS.labels("/api/predict-batch-columnar").observe(len(columns[layout.features[0]]))
+    return np.asarray(predict_columns(model, columns, layout), dtype=np.float64).ravel()
+
+async def stream_predictions(path, input_format, model, layout, encoder):
+    chunks = read_column_chunks(path, input_format, layout.features, COLUMNAR_CHUNK_ROWS)
+    try:
+        while True:
+            try:
+                predictions = await inference_pool.run(predict_next_chunk, chunks, model, layout)
+            except PoolSaturated:
+                # The response has started, so chunks wait for a free worker
+                await asyncio.sleep(0.01)
+                continue
+            if predictions is None:
+                break
+            with stage("serialization"):
+                body = encoder.encode(predictions)
+            yield body
+        yield encoder.finish()
+    finally:
+        chunks.close()
+        discard_spool(path)
+
+@api_router.post("/predict-batch-columnar", summary="Stream Predictions for an Arrow, Parquet or CSV Batch")
+async def predict_batch_columnar(request: Request):
+    """
+    Predict a batch sent as an Arrow IPC stream or file, Parquet or CSV body
+    (by Content-Type), one column per feature. The body is spooled to disk,
+    validated column by column, then predicted in chunks whose results are
+    streamed back as they are ready: an Arrow IPC stream with a
+    `prediction` column when the Accept header asks for one, NDJSON
+    otherwise. Memory use does not grow with the number of rows.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    input_format = INPUT_FORMATS.get(content_type)
+    if input_format is None:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Unsupported Content-Type '{content_type}', expected one of {sorted(INPUT_FORMATS)}"
+        )
+    await ensure_model_loaded()
+    model, layout = served_model()
+    info = model_info
+
+    path = await spool_body(request.stream(), COLUMNAR_SPOOL_DIR)
+    try:
+        # Every chunk is validated before the first result is sent, so bad
+        # input is still answered with a status code
+        await inference_pool.run(validate_batch_file, path, input_format, layout.features)
     except Exception as e:
+        discard_spool(path)
+        if isinstance(e, PoolSaturated):
+            raise saturated(e)
+        if isinstance(e, (ColumnValidationError, ArrowException)):
+            raise HTTPException(status_code=422, detail=f"Invalid batch: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
 
+    encoder = response_encoder(request.headers.get("accept"))
+    return StreamingResponse(
+        stream_predictions(path, input_format, model, layout, encoder),
+        media_type=encoder.media_type,
+        # The stream's own cleanup never runs if the response is not iterated
+        background=BackgroundTask(discard_spool, path),
+        headers={
+            "X-Model-Name": str(info.get("name", "unknown")),
+            "X-Model-Version": str(info.get("version", "unknown"))
+        }
+    )
+
+def reconciled_output(input_data, predictions, info):
+    """HierarchicalPredictionOutput of the reconciled predictions of a hierarchy batch."""
+    # The hierarchy columns are still needed as a frame for reconciliation
+    input_df = pd.DataFrame([item.model_dump() for item in input_data.data])
+    days, hierarchy, reconciled = reconcile_batch(
+        input_df,
+        predictions,
+        method=input_data.method,
+        aggregate_forecasts=input_data.aggregate_forecasts,
+        residuals=input_data.residuals
+    )
+    nodes = [
+        NodeForecast(
+            level=level_name(level),
+            node=label,
+            keys=dict(zip(level, keys)),
+            forecasts=row.tolist()
+        )
+        for level, keys, label, row in zip(hierarchy.levels, hierarchy.node_keys, hierarchy.labels, reconciled)
+    ]
+    return HierarchicalPredictionOutput(
+        days=days.tolist(),
+        method=input_data.method,
+        nodes=nodes,
+        model_name=info.get("name", "unknown"),
+        model_version=str(info.get("version", "unknown"))
+    )
+
+@api_router.post("/predict-batch-hierarchy", response_model=HierarchicalPredictionOutput, summary="Make Reconciled Hierarchical Predictions")
+async def predict_batch_hierarchy(input_data: HierarchicalPredictionInput, request: Request):
+    """
+    Predict every (item, store, day) row of the batch and return coherent
+    forecasts for all store/state/category/department/item aggregates, as
+    JSON or MessagePack per the Accept header.
+    """
+    observe_validation(request)
+    media_type = response_format(request)
+    await ensure_model_loaded()
+    
+    try:
+        BATCH_ROWS.labels("/api/predict-batch-hierarchy").observe(len(input_data.data))
+        predictions = await inference_pool.run(predict_current_model, input_data.data)
+    except PoolSaturated as e:
+        raise saturated(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
+
+    try:
+        # The frame and the MinT solves take long enough to stall /health on the event loop
+        output = await inference_pool.run(reconciled_output, input_data, predictions, model_info)
+    except PoolSaturated as e:
+        raise saturated(e)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Reconciliation failed: {str(e)}")
+    return encode_response(media_type, output.model_dump())
+
+@api_router.get("/executor-metrics", summary="Inference Executor Saturation")
+async def executor_metrics():
+    return {
+        "executor": inference_pool.stats(),
+        "batching": predict_batcher.stats(),
+        "prediction_cache": prediction_cache.stats() if prediction_cache is not None else None
+    }
+
+@api_router.post("/jobs", status_code=202, summary="Submit a Bulk Scoring Job")
+async def submit_scoring_job(input_data: ScoringJobInput):
+    """
+    Queue a job predicting every row of a Parquet or CSV dataset in the
+    server's data directory. Poll /jobs/{job_id} for its progress and
+    download /jobs/{job_id}/result once it is completed.
+    """
+    try:
+        return await asyncio.to_thread(scoring_jobs.submit, input_data.dataset)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except JobError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@api_router.get("/jobs", summary="List Bulk Scoring Jobs")
+async def list_scoring_jobs():
+    return {"jobs": scoring_jobs.list()}
+
+@api_router.get("/jobs/{job_id}", summary="Bulk Scoring Job Status")
+async def get_scoring_job(job_id: str):
+    job = scoring_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return job
+
+@api_router.get("/jobs/{job_id}/result", summary="Download Bulk Scoring Job Predictions")
+async def get_scoring_job_result(job_id: str):
+    """Predictions of a completed job as Parquet, with the id, item_id, store_id and d columns of the dataset."""
+    job = scoring_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    if job["status"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Job '{job_id}' is {job['status']}")
+    return FileResponse(
+        scoring_jobs.result_path(job_id),
+        media_type="application/vnd.apache.parquet",
+        filename=f"predictions_{job_id}.parquet"
+    )
+
+def register_metrics():
+    """Export the stats kept by the pool, batcher, cache and model manager, read at scrape time."""
+    def pool(key):
+        return lambda: inference_pool.stats()[key]
+
+    def cache(key):
+        return lambda: prediction_cache.stats()[key] if prediction_cache is not None else None
+
+    def reload(key):
+        return lambda: model_manager.stats()[key]
+
+    def served():
+        info = active_model_info()
+        if info is None:
+            return {}
+        return {(info.get("name", "unknown"), info.get("version", "unknown"), info.get("source", "unknown")): 1}
+
+    for metric in [
+        Gauge("inference_pool_running", "Model calls running on inference workers", collect=pool("running")),
+        Gauge("inference_pool_queued", "Model calls waiting for an inference worker", collect=pool("queued")),
+        Counter("inference_pool_rejected_total", "Model calls rejected with 503 by a full pool", collect=pool("rejected")),
+        Gauge("micro_batch_pending", "Single predictions waiting for the next micro-batch",
+              collect=lambda: predict_batcher.stats()["pending"]),
+        Counter("prediction_cache_hits_total", "Rows answered from the prediction cache", collect=cache("hits")),
+        Counter("prediction_cache_misses_total", "Rows missing from the prediction cache", collect=cache("misses")),
+        Gauge("model_load_seconds", "Seconds the last installed model took to load", collect=reload("last_load_s")),
+        Gauge("model_warmup_seconds", "Seconds the last installed model took to warm up", collect=reload("last_warm_s")),
+        Counter("model_swaps_total", "Registry versions swapped in while serving", collect=reload("swaps")),
+        Gauge("model_info", "Served model, always 1", ["name", "version", "source"], collect=served),
+    ]:
+        REGISTRY.register(metric)
+
+register_metrics()
+
+@api_router.get("/metrics", summary="Prometheus Metrics")
+async def metrics():
+    """Latency histograms per stage and endpoint, batch sizes, in-flight counts and the served model, in Prometheus text format."""
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @api_router.get("/health", summary="Health Check Endpoint")
 async def health_check():
     return {"status": "ok"}
@@ -0,0 +1,66 @@
+from dotenv import load_dotenv
+import os
+load_dotenv()
+
+# Concurrent /predict calls are coalesced into one model call of at most
+# this many rows, waiting at most this long for the batch to fill
+MICRO_BATCH_MAX_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", "64"))
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "2"))
+
+# Blocking model calls run on a bounded thread pool; calls beyond the
+# running workers plus this queue are rejected with 503
+INFERENCE_MAX_WORKERS = int(os.getenv("INFERENCE_MAX_WORKERS", "4"))
+INFERENCE_MAX_QUEUE = int(os.getenv("INFERENCE_MAX_QUEUE", "64"))
+
+# Serving: a local native model directory skips the registry, and with
+# more than one worker the model is loaded once and shared by forked workers
+MODEL_DIR = os.getenv("MODEL_DIR")
+SERVE_HOST = os.getenv("SERVE_HOST", "0.0.0.0")
+SERVE_PORT = int(os.getenv("SERVE_PORT", "8000"))
+SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", "1"))
+
+# Registry models are cached on disk by name, version and content digest;
+# the backend starts from the newest cached version and checks the
+# registry in the background. An empty MODEL_CACHE_DIR disables the cache
+MLFLOW_TRACKING_URI_PORT = os.getenv("MLFLOW_TRACKING_URI_PORT", "http://20.199.136.148:5001")
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", "model_cache")
+MODEL_REFRESH_INTERVAL_S = float(os.getenv("MODEL_REFRESH_INTERVAL_S", "300"))
+
+# Predictions are cached per canonical feature row of the served model;
+# a size of 0 disables the cache
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL_S = float(os.getenv("PREDICTION_CACHE_TTL_S", "300"))
+
+# Arrow, Parquet and CSV batches are predicted and streamed back in chunks
+# of at most this many rows; bodies are spooled to files in this directory
+COLUMNAR_CHUNK_ROWS = int(os.getenv("COLUMNAR_CHUNK_ROWS", "8192"))
+COLUMNAR_SPOOL_DIR = os.getenv("COLUMNAR_SPOOL_DIR")
+
+# Responses smaller than this are sent uncompressed even when the client
+# accepts gzip or zstd
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+# gzip/zstd request bodies inflating past this many bytes are refused with 413
+MAX_DECOMPRESSED_BODY_BYTES = int(os.getenv("MAX_DECOMPRESSED_BODY_BYTES", str(256 * 1024 * 1024)))
+
+# Bulk scoring jobs read datasets matching SCORING_DATASET_PATTERN from
+# SCORING_DATA_DIR in chunks, predicted on SCORING_JOB_WORKERS threads;
+# job state and results are kept in SCORING_JOBS_DIR
+SCORING_DATA_DIR = os.getenv("SCORING_DATA_DIR", "data")
+SCORING_DATASET_PATTERN = os.getenv("SCORING_DATASET_PATTERN", "CA_1_*")
+SCORING_JOBS_DIR = os.getenv("SCORING_JOBS_DIR", "scoring_jobs")
+SCORING_JOB_WORKERS = int(os.getenv("SCORING_JOB_WORKERS", str(os.cpu_count() or 1)))
+SCORING_CHUNK_ROWS = int(os.getenv("SCORING_CHUNK_ROWS", "65536"))
+
+# Directory of a feature store built with app.utils.feature_store, for
+# predictions from (item_id, store_id, d) keys; unset disables /predict-keys
+FEATURE_STORE_DIR = os.getenv("FEATURE_STORE_DIR")
+
+# Daily sales pushed to /sales are kept per series in memory, snapshotted
+# to SALES_HISTORY_PATH every SALES_SNAPSHOT_INTERVAL_S seconds and on
+# shutdown, and restored on startup; an empty path disables snapshots.
+# With SERVE_WORKERS > 1 workers only restore it and /sales is refused
+SALES_HISTORY_PATH = os.getenv("SALES_HISTORY_PATH", "sales_history.npz")
+SALES_SNAPSHOT_INTERVAL_S = float(os.getenv("SALES_SNAPSHOT_INTERVAL_S", "60"))
+
+# Longest horizon, in days, /forecast predicts recursively in one request
+FORECAST_MAX_HORIZON = int(os.getenv("FORECAST_MAX_HORIZON", "28"))
@@ -1,7 +1,53 @@
+import os
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from app.api.endpoints import api_router
-from app.utils.load_model import load_best_model_from_mlflow
+from app.utils.load_model import refresh_model_cache, model_cache, MODEL_NAME
+from app.utils.registry_watcher import RegistryWatcher
+from app.utils.transport import CompressionMiddleware
+from app.utils.metrics import MetricsMiddleware
+from app.utils.sales_history import SalesHistory, SnapshotWriter
+from app.config import (
+    MODEL_DIR, MODEL_REFRESH_INTERVAL_S, RESPONSE_COMPRESSION_MIN_BYTES, MAX_DECOMPRESSED_BODY_BYTES,
+    SALES_HISTORY_PATH, SALES_SNAPSHOT_INTERVAL_S
+)
+
+
+def start_registry_watcher(model_manager):
+    """
+    Background check for newer registry versions: each one is downloaded
+    into the cache, then loaded, warmed and swapped in by `model_manager`.
+    """
+    if MODEL_DIR or model_cache is None or MODEL_REFRESH_INTERVAL_S <= 0:
+        return None
+
+    def check():
+        entry = refresh_model_cache(model_cache, MODEL_NAME)
+        model_manager.offer(entry)
+        return entry
+
+    watcher = RegistryWatcher(check, MODEL_REFRESH_INTERVAL_S)
+    watcher.start()
+    return watcher
+
+
+def start_sales_snapshots(endpoints_module):
+    """
+    Restore the last sales snapshot and keep writing new ones in the
+    background. Pre-forked workers only restore it: they accept no pushes,
+    and would otherwise all write the same file.
+    """
+    if not SALES_HISTORY_PATH:
+        return None
+    if os.path.exists(SALES_HISTORY_PATH):
+        endpoints_module.sales_history = SalesHistory.restore(SALES_HISTORY_PATH)
+        print(f"✅ Sales history restored: {len(endpoints_module.sales_history)} series")
+    if not endpoints_module.sales_push_enabled:
+        print("⚠️ Sales pushes and snapshots are disabled with more than one worker")
+        return None
+    writer = SnapshotWriter(endpoints_module.sales_history, SALES_HISTORY_PATH, SALES_SNAPSHOT_INTERVAL_S)
+    writer.start()
+    return writer
 
 
 @asynccontextmanager
@@ -9,13 +55,15 @@ async def lifespan(app: FastAPI):
     # Startup
     try:
         import app.api.endpoints as endpoints_module
-        model, info = load_best_model_from_mlflow(
-            experiment_name="sales_forecasting",
-            model_name="BestRegressionModel"
-        )
-        endpoints_module.loaded_model = model
-        endpoints_module.model_info = info
-        print(f"✅ Model loaded: {info}")
+        # Pre-forked workers inherit the model loaded by the parent
+        if endpoints_module.loaded_model is None:
+            endpoints_module.model_manager.ensure_loaded()
+            print(f"✅ Model loaded: {endpoints_module.model_info}")
+        endpoints_module.registry_watcher = start_registry_watcher(endpoints_module.model_manager)
+        endpoints_module.load_feature_store()
+        sales_snapshots = start_sales_snapshots(endpoints_module)
+        # Queued jobs, and jobs interrupted by the last shutdown, continue
+        endpoints_module.scoring_jobs.start()
     except Exception as e:
         print(f"❌ Failed to load model: {str(e)}")
         raise
@@ -24,9 +72,23 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     print("Shutting down...")
+    if endpoints_module.registry_watcher is not None:
+        endpoints_module.registry_watcher.stop()
+    endpoints_module.scoring_jobs.stop()
+    if sales_snapshots is not None:
+        sales_snapshots.stop()
+    endpoints_module.inference_pool.shutdown()
 
 
 app = FastAPI(title="Sales Forecasting API", lifespan=lifespan)
+# gzip/zstd request bodies and responses, as clients send and accept them
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=RESPONSE_COMPRESSION_MIN_BYTES,
+    max_body_size=MAX_DECOMPRESSED_BODY_BYTES
+)
+# Added last so it runs first: request timings include (de)compression
+app.add_middleware(MetricsMiddleware)
 app.include_router(api_router, prefix="/api")
 
 
@@ -1,8 +1,18 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
 from app.models.prediction_input import PredictionInput
-from typing import List
+from typing import Dict, List, Optional
 
 
 class BatchPredictionInput(BaseModel):
-    data: List[PredictionInput]
+    # Either one object per row...
+    data: Optional[List[PredictionInput]] = None
+    # ...or one array per feature, e.g. {"item_id": [1, 2], "sell_price": [3.5, 2.0]},
+    # validated per column with NumPy instead of per row
+    columns: Optional[Dict[str, list]] = None
+
+    @model_validator(mode="after")
+    def check_one_layout(self):
+        if (self.data is None) == (self.columns is None):
+            raise ValueError("Send exactly one of 'data' (rows) or 'columns' (one array per feature)")
+        return self
 
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import Dict, Union
+
+
+class ForecastInput(BaseModel):
+    # Series to forecast, one array per key, e.g. {"item_id": [1437, 1438], "store_id": [0, 0]}
+    item_id: list
+    store_id: list
+    # First forecast day and number of days forecast from it
+    d: int
+    horizon: int = 28
+    # Fields replacing the stored features on every day, one value for all
+    # series or one per series, e.g. {"sell_price": 2.5}
+    overrides: Dict[str, Union[float, list]] = {}
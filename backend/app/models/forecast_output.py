@@ -0,0 +1,13 @@
+from pydantic import BaseModel, ConfigDict
+from typing import List
+
+
+class ForecastOutput(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+    days: List[int]
+    item_id: List[int]
+    store_id: List[int]
+    # One row per day, one value per series
+    predictions: List[List[float]]
+    model_name: str
+    model_version: str
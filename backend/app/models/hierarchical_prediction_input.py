@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+from app.models.prediction_input import PredictionInput
+from typing import Dict, List, Literal, Optional
+
+
+class HierarchicalPredictionInput(BaseModel):
+    data: List[PredictionInput]
+    method: Literal["bottom_up", "mint_shrink"] = "bottom_up"
+    # Base forecasts for aggregate nodes, keyed by node label (e.g. "store_id=0/cat_id=1"),
+    # one value per day in ascending `d` order. Used by mint_shrink only.
+    aggregate_forecasts: Optional[Dict[str, List[float]]] = None
+    # In-sample residual history of every node, keyed by node label, all of the same
+    # length. Without it mint_shrink uses structural scaling.
+    residuals: Optional[Dict[str, List[float]]] = Field(default=None)
@@ -0,0 +1,18 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Dict, List
+
+
+class NodeForecast(BaseModel):
+    level: str
+    node: str
+    keys: Dict[str, int]
+    forecasts: List[float]
+
+
+class HierarchicalPredictionOutput(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+    days: List[int]
+    method: str
+    nodes: List[NodeForecast]
+    model_name: str
+    model_version: str
@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+from typing import Dict, Union
+
+
+class KeyPredictionInput(BaseModel):
+    # One array per key, e.g. {"item_id": [1437, 1438], "store_id": [0, 0], "d": [1861, 1861]},
+    # validated with NumPy like the columns of a batch
+    item_id: list
+    store_id: list
+    d: list
+    # Fields replacing the stored features, one value for all keys or one
+    # per key, e.g. {"sell_price": 2.5}
+    overrides: Dict[str, Union[float, list]] = {}
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+
+
+class SalesInput(BaseModel):
+    # One array per column, one entry per (item, store, day) pushed, e.g.
+    # {"item_id": [1437], "store_id": [0], "d": [1862], "sold": [3]}
+    item_id: list
+    store_id: list
+    d: list
+    sold: list
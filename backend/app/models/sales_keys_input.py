@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+
+
+class SalesKeysInput(BaseModel):
+    # Target days of the series to derive features for, one array per key
+    item_id: list
+    store_id: list
+    d: list
@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+
+
+class ScoringJobInput(BaseModel):
+    # Path relative to the server's data directory, e.g. "CA_1_3.parquet"
+    dataset: str
@@ -0,0 +1,95 @@
+"""
+Pre-fork server: the parent loads the model once, binds the listening
+socket and forks SERVE_WORKERS uvicorn workers that accept on it. Workers
+inherit the model through copy-on-write memory, so adding workers adds
+neither model loads nor model copies.
+
+    MODEL_DIR=/models/native SERVE_WORKERS=8 python -m app.serve
+"""
+import gc
+import os
+import signal
+import socket
+import uvicorn
+from threadpoolctl import threadpool_limits
+import app.api.endpoints as endpoints_module
+from app.main import app
+from app.config import SERVE_HOST, SERVE_PORT, SERVE_WORKERS
+
+
+def load_shared_model():
+    # OpenMP thread pools do not survive fork, so the parent loads (and
+    # verifies compiled trees) single-threaded and never starts one
+    with threadpool_limits(limits=1):
+        endpoints_module.model_manager.ensure_loaded()
+    print(f"✅ Model loaded once for all workers: {endpoints_module.model_info}")
+
+
+def bind_socket(host, port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sock):
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    config = uvicorn.Config(app, lifespan="on")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve(workers=SERVE_WORKERS, host=SERVE_HOST, port=SERVE_PORT):
+    # Pushed sales live in one process's memory
+    endpoints_module.sales_push_enabled = workers <= 1
+    load_shared_model()
+    sock = bind_socket(host, port)
+    if workers <= 1:
+        run_worker(sock)
+        return
+
+    # Move everything allocated so far out of the collector's reach, so
+    # garbage collection in the workers does not write to (and copy) the
+    # pages they share with the parent
+    gc.collect()
+    gc.freeze()
+
+    children = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(sock)
+            finally:
+                os._exit(0)
+        children.add(pid)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        spawn()
+    print(f"Serving on {host}:{port} with {workers} workers")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            print(f"⚠️ Worker {pid} exited with status {status}, restarting")
+            spawn()
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,206 @@
+"""
+Batch inputs as columns instead of PredictionInput objects: one NumPy
+array per feature, validated with vectorized checks and turned straight
+into the model's feature matrix. Arrow IPC, Parquet and CSV bodies are
+read as record batches from a file, so large requests are processed in
+chunks of bounded size.
+"""
+import io
+import os
+import tempfile
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.ipc as pa_ipc
+import pyarrow.parquet as pq
+from app.models.prediction_input import PredictionInput
+from app.utils.metrics import stage
+
+INTEGER_FIELDS = {name for name, field in PredictionInput.model_fields.items() if field.annotation is int}
+FLOAT32_MAX = float(np.finfo(np.float32).max)
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+ARROW_FILE = "application/vnd.apache.arrow.file"
+PARQUET = "application/vnd.apache.parquet"
+CSV = "text/csv"
+NDJSON = "application/x-ndjson"
+
+# Content types accepted for each input format
+INPUT_FORMATS = {
+    ARROW_STREAM: ARROW_STREAM,
+    ARROW_FILE: ARROW_FILE,
+    PARQUET: PARQUET,
+    "application/x-parquet": PARQUET,
+    CSV: CSV,
+}
+
+
+class ColumnValidationError(ValueError):
+    """Raised with every problem found in the columns of a batch."""
+
+
+def validate_columns(columns, features, row_offset=0):
+    """
+    Check that every feature is present with one numeric, finite value per
+    row (integral for int fields) within float32 range, and return the
+    columns as int64 / float64 arrays. `row_offset` numbers the rows of a
+    chunk within the whole request in error messages.
+    """
+    with stage("column_validation"):
+        return _check_columns(columns, features, row_offset)
+
+
+def _check_columns(columns, features, row_offset):
+    errors = []
+    lengths = {len(columns[name]) for name in features if name in columns}
+    if len(lengths) > 1:
+        raise ColumnValidationError(f"Columns have different lengths: {sorted(lengths)}")
+    validated = {}
+    for name in features:
+        if name not in columns:
+            errors.append(f"{name}: missing")
+            continue
+        try:
+            values = np.asarray(columns[name])
+        except ValueError:
+            values = np.asarray(columns[name], dtype=object)
+        if values.ndim != 1:
+            errors.append(f"{name}: expected a flat array of numbers")
+            continue
+        if values.dtype.kind not in "iuf":
+            # Lists holding nulls, strings or booleans end up as other dtypes
+            errors.append(f"{name}: expected numbers only")
+            continue
+        values = values.astype(np.float64, copy=False)
+        bad = ~np.isfinite(values)
+        if bad.any():
+            errors.append(f"{name}: missing or non-finite value at row {row_offset + int(np.argmax(bad))}")
+            continue
+        out_of_range = np.abs(values) > FLOAT32_MAX
+        if out_of_range.any():
+            errors.append(f"{name}: value out of range at row {row_offset + int(np.argmax(out_of_range))}")
+            continue
+        if name in INTEGER_FIELDS:
+            fractional = values != np.floor(values)
+            if fractional.any():
+                errors.append(f"{name}: expected integers, got {values[np.argmax(fractional)]} at row {row_offset + int(np.argmax(fractional))}")
+                continue
+            values = values.astype(np.int64)
+        validated[name] = values
+    if errors:
+        raise ColumnValidationError("; ".join(errors))
+    return validated
+
+
+def batch_columns(batch, features):
+    """Feature columns of an Arrow record batch as NumPy arrays; nulls become NaN."""
+    columns = {}
+    for name in features:
+        index = batch.schema.get_field_index(name)
+        if index < 0:
+            continue
+        column = batch.column(index)
+        if pa.types.is_integer(column.type) or pa.types.is_floating(column.type):
+            if column.null_count:
+                column = column.cast(pa.float64())
+            columns[name] = column.to_numpy(zero_copy_only=False)
+        else:
+            columns[name] = np.asarray(column.to_pylist(), dtype=object)
+    return columns
+
+
+def _csv_column_types():
+    return {name: pa.int64() if name in INTEGER_FIELDS else pa.float64() for name in PredictionInput.model_fields}
+
+
+def read_batches(path, input_format, chunk_rows):
+    """Record batches of at most `chunk_rows` rows from the file at `path`."""
+    if input_format == PARQUET:
+        batches = pq.ParquetFile(path).iter_batches(batch_size=chunk_rows)
+    elif input_format == CSV:
+        batches = pa_csv.open_csv(
+            path,
+            convert_options=pa_csv.ConvertOptions(column_types=_csv_column_types())
+        )
+    elif input_format == ARROW_FILE:
+        reader = pa_ipc.open_file(pa.memory_map(path))
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    else:
+        batches = pa_ipc.open_stream(pa.memory_map(path))
+    for batch in batches:
+        for start in range(0, batch.num_rows, chunk_rows):
+            yield batch.slice(start, chunk_rows)
+
+
+def read_column_chunks(path, input_format, features, chunk_rows):
+    """Validated (row offset, columns) chunks of the batch at `path`."""
+    offset = 0
+    for batch in read_batches(path, input_format, chunk_rows):
+        yield offset, validate_columns(batch_columns(batch, features), features, offset)
+        offset += batch.num_rows
+
+
+async def spool_body(chunks, directory=None):
+    """
+    Write an async stream of request body chunks to a temporary file and
+    return its path. The file is removed if the stream fails, e.g. when the
+    client disconnects or sends a corrupt compressed body.
+    """
+    with tempfile.NamedTemporaryFile(dir=directory, suffix=".batch", delete=False) as f:
+        try:
+            async for chunk in chunks:
+                f.write(chunk)
+        except BaseException:
+            f.close()
+            os.remove(f.name)
+            raise
+    return f.name
+
+
+def discard_spool(path):
+    """Remove a spooled body; a no-op if it is already gone."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class ArrowStreamEncoder:
+    """Arrow IPC stream with one `prediction` record batch per chunk."""
+
+    media_type = ARROW_STREAM
+
+    def __init__(self):
+        self._sink = io.BytesIO()
+        self._writer = pa_ipc.new_stream(self._sink, pa.schema([("prediction", pa.float64())]))
+
+    def _drain(self):
+        # Bytes written so far leave the buffer, so it never holds more than a chunk
+        data = self._sink.getvalue()
+        self._sink.seek(0)
+        self._sink.truncate()
+        return data
+
+    def encode(self, predictions):
+        self._writer.write_batch(pa.record_batch([pa.array(predictions, pa.float64())], names=["prediction"]))
+        return self._drain()
+
+    def finish(self):
+        self._writer.close()
+        return self._drain()
+
+
+class NdjsonEncoder:
+    """One {"prediction": value} line per row."""
+
+    media_type = NDJSON
+
+    def encode(self, predictions):
+        return "".join(f'{{"prediction":{value!r}}}\n' for value in predictions.tolist()).encode()
+
+    def finish(self):
+        return b""
+
+
+def response_encoder(accept):
+    return ArrowStreamEncoder() if ARROW_STREAM in (accept or "") else NdjsonEncoder()
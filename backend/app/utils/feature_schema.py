@@ -0,0 +1,37 @@
+import json
+import pandas as pd
+import mlflow
+
+
+def load_feature_schema(run_id: str):
+    """
+    Fetch the feature schema logged next to the model by the training run.
+    Models trained before the schema existed return None and are served
+    with raw integer features.
+    """
+    if not run_id:
+        return None
+    try:
+        local_path = mlflow.artifacts.download_artifacts(
+            run_id=run_id,
+            artifact_path="feature_schema.json"
+        )
+        with open(local_path) as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️ No feature schema for run {run_id}: {str(e)}")
+        return None
+
+
+def apply_feature_schema(input_df: pd.DataFrame, schema) -> pd.DataFrame:
+    """Order columns and encode categoricals exactly as during training."""
+    if not schema:
+        return input_df
+    input_df = input_df[schema["features"]]
+    if schema.get("categorical_encoding") != "category":
+        return input_df
+    input_df = input_df.copy()
+    for col, levels in schema["category_levels"].items():
+        values = input_df[col]
+        input_df[col] = pd.Categorical(values.where(values.isin(levels)), categories=levels)
+    return input_df
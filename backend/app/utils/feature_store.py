@@ -0,0 +1,134 @@
+"""
+Precomputed features looked up by (item_id, store_id, d), so clients send
+keys instead of all PredictionInput fields (lags, averages, trends).
+
+A store directory holds two .npy files, memory-mapped when loaded, and
+their metadata:
+
+    features.npy  float32 (rows, fields) in PredictionInput field order
+    index.npy     int32 (items, stores, days) row of each key, -1 if absent
+    meta.json     fields and the lowest item_id, store_id and d
+
+Built from a processed dataset (pickle, Parquet or CSV):
+
+    python -m app.utils.feature_store data/CA_1_0.pkl feature_store
+"""
+import os
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from app.models.prediction_input import PredictionInput
+
+KEYS = ("item_id", "store_id", "d")
+
+
+class MissingKeysError(LookupError):
+    """Raised with the keys not found in the store."""
+
+
+def build_feature_store(df, directory):
+    """Write the PredictionInput columns of `df` as a store in `directory`."""
+    fields = list(PredictionInput.model_fields)
+    missing = [name for name in fields if name not in df.columns]
+    if missing:
+        raise ValueError(f"Columns missing for the feature store: {missing}")
+    keys = df[list(KEYS)].to_numpy(dtype=np.int64)
+    if len(keys) and keys.min() < 0:
+        raise ValueError("Keys must not be negative")
+    low = keys.min(axis=0) if len(keys) else np.zeros(len(KEYS), dtype=np.int64)
+    shape = tuple(keys.max(axis=0) - low + 1) if len(keys) else (0,) * len(KEYS)
+
+    index = np.full(shape, -1, dtype=np.int32)
+    position = tuple((keys - low).T)
+    index[position] = np.arange(len(keys), dtype=np.int32)
+    if len(keys) and np.count_nonzero(index >= 0) != len(keys):
+        raise ValueError("Duplicate (item_id, store_id, d) keys")
+
+    os.makedirs(directory, exist_ok=True)
+    np.save(os.path.join(directory, "features.npy"), df[fields].to_numpy(dtype=np.float32))
+    np.save(os.path.join(directory, "index.npy"), index)
+    with open(os.path.join(directory, "meta.json"), "w") as f:
+        json.dump({"fields": fields, "low": low.tolist()}, f, indent=2)
+
+
+class FeatureStore:
+    """
+    Dense key index over a feature table. Key lookups are one bounds
+    check and one fancy index for the whole batch, and only the pages of
+    the rows asked for are read from the memory-mapped files.
+    """
+
+    def __init__(self, features, index, fields, low):
+        self.features = features
+        self.index = index
+        self.fields = list(fields)
+        self.low = np.asarray(low, dtype=np.int64)
+        self._field_index = {name: j for j, name in enumerate(self.fields)}
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        mode = "r" if mmap else None
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        return cls(
+            np.load(os.path.join(directory, "features.npy"), mmap_mode=mode),
+            np.load(os.path.join(directory, "index.npy"), mmap_mode=mode),
+            meta["fields"],
+            meta["low"]
+        )
+
+    def __len__(self):
+        return len(self.features)
+
+    def lookup(self, item_ids, store_ids, ds):
+        """Row of every key, -1 for keys not stored."""
+        keys = np.stack([np.asarray(item_ids), np.asarray(store_ids), np.asarray(ds)], axis=1).astype(np.int64) - self.low
+        inside = ((keys >= 0) & (keys < self.index.shape)).all(axis=1)
+        rows = np.full(len(keys), -1, dtype=np.int64)
+        rows[inside] = self.index[tuple(keys[inside].T)]
+        return rows
+
+    def rows(self, item_ids, store_ids, ds):
+        """Row of every key; raises MissingKeysError naming the keys not stored."""
+        rows = self.lookup(item_ids, store_ids, ds)
+        missing = np.flatnonzero(rows < 0)
+        if len(missing):
+            examples = [(int(item_ids[i]), int(store_ids[i]), int(ds[i])) for i in missing[:5]]
+            raise MissingKeysError(f"{len(missing)} of {len(rows)} (item_id, store_id, d) keys not in the feature store, e.g. {examples}")
+        return rows
+
+    def columns(self, rows, overrides=None):
+        """Feature columns of `rows`, with `overrides` applied."""
+        block = self.features[rows]
+        columns = {name: block[:, j] for name, j in self._field_index.items()}
+        return apply_overrides(columns, overrides, len(rows))
+
+
+def apply_overrides(columns, overrides, n_rows):
+    """Replace columns by `overrides`, field -> one value for all rows or one value per row."""
+    for name, values in (overrides or {}).items():
+        values = np.asarray(values)
+        columns[name] = np.broadcast_to(values, (n_rows,)) if values.ndim == 0 else values
+    return columns
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a feature store from a processed dataset")
+    parser.add_argument("data_path", help="Pickle, Parquet or CSV file with every PredictionInput column")
+    parser.add_argument("directory", help="Output directory")
+    args = parser.parse_args()
+
+    extension = os.path.splitext(args.data_path)[1].lower()
+    if extension == ".parquet":
+        df = pd.read_parquet(args.data_path)
+    elif extension == ".csv":
+        df = pd.read_csv(args.data_path)
+    else:
+        df = pd.read_pickle(args.data_path)
+    build_feature_store(df, args.directory)
+    print(f"✅ Feature store with {len(df)} rows written to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import operator
+from contextlib import nullcontext
+import numpy as np
+import pandas as pd
+from app.models.prediction_input import PredictionInput
+from app.utils.feature_schema import apply_feature_schema
+from app.utils.native_model import NativeModel, CompiledModel, EnsembleModel
+from app.utils.metrics import stage
+
+
+class FeatureLayout:
+    """
+    Fixed float32 column layout of PredictionInput fields in the order of the
+    feature schema (field order without one). Categorical values are mapped
+    to their training codes, unseen values to NaN, exactly as the pandas
+    categoricals of apply_feature_schema would.
+    """
+
+    def __init__(self, schema=None):
+        self.schema = schema
+        self.features = list(schema["features"]) if schema else list(PredictionInput.model_fields)
+        unknown = [f for f in self.features if f not in PredictionInput.model_fields]
+        if unknown:
+            raise ValueError(f"Features not in PredictionInput: {unknown}")
+        # Validated field values live in the model's __dict__
+        self._values = operator.itemgetter(*self.features)
+
+        # Schema-encoded categoricals are mapped with one flat lookup table:
+        # per column, slots for every integer from its lowest to its highest
+        # level (code or NaN) plus a NaN slot on each side for unseen values
+        self.category_index = []
+        if schema and schema.get("categorical_encoding") == "category":
+            lows, spans, offsets, table = [], [], [], []
+            for col, levels in schema["category_levels"].items():
+                low = min(levels, default=0)
+                span = max(levels, default=-1) - low + 1
+                slots = np.full(span + 2, np.nan, dtype=np.float32)
+                slots[np.asarray(levels, dtype=np.int64) - low + 1] = np.arange(len(levels))
+                self.category_index.append(self.features.index(col))
+                lows.append(low)
+                spans.append(span)
+                offsets.append(len(table))
+                table.extend(slots.tolist())
+            self._lows = np.array(lows, dtype=np.float32)
+            self._spans = np.array(spans, dtype=np.float32)
+            self._offsets = np.array(offsets, dtype=np.int64)
+            self._table = np.array(table, dtype=np.float32)
+
+    @property
+    def n_features(self):
+        return len(self.features)
+
+    def fill(self, items, out=None):
+        """Write validated inputs into `out` (or a new buffer), one row each."""
+        if out is None:
+            out = np.empty((len(items), self.n_features), dtype=np.float32)
+        out[:] = [self._values(item.__dict__) for item in items]
+        return self._encode(out)
+
+    def from_columns(self, columns, out=None):
+        """Same buffer from validated columns, one array of raw values per feature."""
+        n_rows = len(columns[self.features[0]])
+        if out is None:
+            out = np.empty((n_rows, self.n_features), dtype=np.float32)
+        for j, name in enumerate(self.features):
+            out[:, j] = columns[name]
+        return self._encode(out)
+
+    def encode(self, X):
+        """Copy of a raw buffer `X` with categoricals encoded, `X` itself if there are none."""
+        if not self.category_index:
+            return X
+        return self._encode(X.copy())
+
+    def _encode(self, out):
+        if self.category_index:
+            values = out[:, self.category_index]
+            slots = np.clip(values - self._lows, -1, self._spans).astype(np.int64) + 1 + self._offsets
+            out[:, self.category_index] = self._table[slots]
+        return out
+
+
+def _predict(model, model_input):
+    with stage("predict"):
+        if isinstance(model, (NativeModel, CompiledModel, EnsembleModel)):
+            return model.predict_matrix(model_input)
+        return model.predict(model_input)
+
+
+def predict_items(model, items, layout, X=None):
+    """
+    Predictions for validated inputs. Native and compiled models get the
+    float32 buffer directly (`X` if already filled); other models (mlflow
+    pyfunc) a DataFrame. A caller passing `X` has already timed this
+    batch's features stage, so it is not recorded again.
+    """
+    with _features_stage(X):
+        if isinstance(model, (NativeModel, CompiledModel, EnsembleModel)):
+            model_input = layout.fill(items) if X is None else X
+        else:
+            input_df = pd.DataFrame([item.model_dump() for item in items])
+            model_input = apply_feature_schema(input_df, layout.schema)
+    return _predict(model, model_input)
+
+
+def predict_columns(model, columns, layout, X=None):
+    """predict_items for validated columns instead of PredictionInput objects."""
+    with _features_stage(X):
+        if isinstance(model, (NativeModel, CompiledModel, EnsembleModel)):
+            model_input = layout.from_columns(columns) if X is None else X
+        else:
+            input_df = pd.DataFrame({name: columns[name] for name in layout.features})
+            model_input = apply_feature_schema(input_df, layout.schema)
+    return _predict(model, model_input)
+
+
+def _features_stage(X):
+    # One observation per batch: the caller that filled X timed it
+    return stage("features") if X is None else nullcontext()
+
+
+def warm_model(model, layout, batch_sizes=(1, 64)):
+    """
+    Predict all-zero inputs at the given batch sizes through the serving
+    path, so first requests do not pay for lazy initialization. Raises if
+    the model returns the wrong number of predictions or non-finite ones.
+    """
+    item = PredictionInput(**{name: 0 for name in PredictionInput.model_fields})
+    for batch_size in batch_sizes:
+        predictions = np.asarray(predict_items(model, [item] * batch_size, layout), dtype=np.float64).ravel()
+        if len(predictions) != batch_size:
+            raise ValueError(f"Warm-up returned {len(predictions)} predictions for {batch_size} rows")
+        if not np.isfinite(predictions).all():
+            raise ValueError("Warm-up returned non-finite predictions")
@@ -0,0 +1,70 @@
+"""
+Recursive multi-day forecasts computed on the server. Day t is predicted
+for all series in one model call, then its predictions become the sold
+values behind the sold_lag_*, rolling_sold_mean and expanding_sold_mean
+features of day t + 1, so a horizon of H days costs H vectorized calls
+instead of H round trips per series.
+
+Sold values are kept in one (series, window + horizon) array: the known
+days before the first forecast day, then each day's predictions as they
+are made. A feature keeps the value given for its day where the days it
+needs are unknown.
+"""
+import numpy as np
+from app.utils.sales_history import LAGS, ROLLING_WINDOW
+
+
+def fill_rolling_gaps(past, rolling_mean, rolling_window=ROLLING_WINDOW):
+    """
+    Copy of `past` whose unknown days among the last `rolling_window` are
+    filled evenly, so the window averages to the known `rolling_mean`.
+    """
+    filled = past.copy()
+    recent = filled[:, -rolling_window:]
+    unknown = np.isnan(recent)
+    missing = unknown.sum(axis=1)
+    fill = (rolling_window * rolling_mean - np.nansum(recent, axis=1)) / np.maximum(missing, 1)
+    # Boolean assignment walks the rows in order, as np.repeat does
+    recent[unknown] = np.repeat(np.maximum(fill, 0.0), missing)
+    return filled
+
+
+def recursive_forecast(predict, day_columns, past, total, days, horizon, lags=LAGS, rolling_window=ROLLING_WINDOW):
+    """
+    Predictions (horizon, series) of `predict(columns)` for days 0 .. horizon - 1.
+
+    Args:
+        predict: Predictions for a dict of feature columns, one value per series
+        day_columns: Feature columns of day k, given k
+        past: Sold on the days before day 0 (series, days), oldest first, NaN if unknown
+        total, days: Sum and count of all sold values before day 0, the sum NaN if
+            unknown and then derived from the expanding_sold_mean of day 0
+        horizon: Number of days predicted
+    """
+    n_series, window = past.shape
+    sold = np.full((n_series, window + horizon), np.nan)
+    sold[:, :window] = past
+    smoothed = sold.copy()
+    days = np.asarray(days, dtype=np.float64)
+    predictions = np.empty((horizon, n_series), dtype=np.float64)
+
+    for k in range(horizon):
+        columns = day_columns(k)
+        t = window + k
+        if k == 0:
+            smoothed[:, :window] = fill_rolling_gaps(past, np.asarray(columns["rolling_sold_mean"], dtype=np.float64), rolling_window)
+            total = np.where(np.isnan(total), np.asarray(columns["expanding_sold_mean"], dtype=np.float64) * days, total)
+        for lag in lags:
+            known = sold[:, t - lag]
+            columns[f"sold_lag_{lag}"] = np.where(np.isnan(known), columns[f"sold_lag_{lag}"], known)
+        rolling = smoothed[:, t - rolling_window:t].mean(axis=1)
+        columns["rolling_sold_mean"] = np.where(np.isnan(rolling), columns["rolling_sold_mean"], rolling)
+        expanding = total / np.maximum(days, 1)
+        columns["expanding_sold_mean"] = np.where((days > 0) & ~np.isnan(expanding), expanding, columns["expanding_sold_mean"])
+
+        predictions[k] = np.asarray(predict(columns), dtype=np.float64).ravel()
+        # Sales cannot be negative, whatever the model predicts
+        sold[:, t] = smoothed[:, t] = np.maximum(predictions[k], 0.0)
+        total = total + sold[:, t]
+        days = days + 1
+    return predictions
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.utils.metrics import STAGE_SECONDS
+
+
+class PoolSaturated(Exception):
+    """Raised when every worker is busy and the queue is full."""
+
+
+class InferencePool:
+    """
+    Bounded thread pool for blocking model calls, so the event loop keeps
+    serving /health and new requests while boosters predict (LightGBM,
+    XGBoost and CatBoost release the GIL inside predict).
+
+    At most `max_workers` calls run and `max_queue` wait; any call beyond
+    that is rejected at once with PoolSaturated instead of queueing without
+    bound.
+    """
+
+    def __init__(self, max_workers=4, max_queue=64):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.running = 0
+        self.peak_in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.queue_wait_s = 0.0
+        self.run_s = 0.0
+
+    @property
+    def capacity(self):
+        return self.max_workers + self.max_queue
+
+    def _call(self, fn, args, submitted):
+        started = time.perf_counter()
+        STAGE_SECONDS.labels("queue").observe(started - submitted)
+        with self._lock:
+            self.running += 1
+            self.queue_wait_s += started - submitted
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.run_s += time.perf_counter() - started
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                self.rejected += 1
+                raise PoolSaturated(
+                    f"Inference queue full ({self.max_workers} running, {self.max_queue} queued)"
+                )
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            future = self._executor.submit(self._call, fn, args, time.perf_counter())
+            result = await asyncio.wrap_future(future)
+            with self._lock:
+                self.completed += 1
+            return result
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def stats(self):
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self.running,
+                "queued": self.in_flight - self.running,
+                "utilization": self.in_flight / self.capacity,
+                "peak_in_flight": self.peak_in_flight,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "mean_queue_wait_ms": self.queue_wait_s / finished * 1000 if finished else 0.0,
+                "mean_run_ms": self.run_s / finished * 1000 if finished else 0.0,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
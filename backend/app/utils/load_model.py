@@ -1,19 +1,133 @@
+import tempfile
 from fastapi import HTTPException
 import mlflow
 import mlflow.pyfunc
+from app.utils.native_model import load_native_model, compile_native_model, CompiledModel
+from app.utils.feature_schema import load_feature_schema
+from app.utils.model_cache import ModelCache
+from app.config import MLFLOW_TRACKING_URI_PORT, MODEL_DIR, MODEL_CACHE_DIR
+
+MODEL_NAME = "BestRegressionModel"
+
+model_cache = ModelCache(MODEL_CACHE_DIR) if MODEL_CACHE_DIR else None
+
+
+def load_native_model_from_run(run_id):
+    """Load the native booster logged by training, or None for older runs."""
+    if not run_id:
+        return None
+    try:
+        local_dir = mlflow.artifacts.download_artifacts(
+            run_id=run_id,
+            artifact_path="native_model"
+        )
+        return load_native_model(local_dir)
+    except Exception as e:
+        print(f"⚠️ No native model for run {run_id}, using pyfunc: {str(e)}")
+        return None
+
+def model_format(model):
+    kind = "compiled" if isinstance(model, CompiledModel) else "native"
+    return f"{kind}-{model.library}"
+
+
+def load_local_model(model_dir: str):
+    """Native model from a local directory, e.g. baked into the image."""
+    try:
+        model = compile_native_model(load_native_model(model_dir))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load model from {model_dir}: {str(e)}")
+    model_info = {
+        "name": "local",
+        "version": "local",
+        "model_dir": model_dir,
+        "format": model_format(model)
+    }
+    return model, model_info
+
+def latest_registry_version(model_name: str):
+    """Newest registered version of `model_name`, or None if there is none."""
+    mlflow.set_tracking_uri(MLFLOW_TRACKING_URI_PORT)
+    client = mlflow.tracking.MlflowClient()
+    latest_versions = client.get_latest_versions(model_name, stages=["None", "Production", "Staging"])
+    if not latest_versions:
+        return None
+    latest_version = max(latest_versions, key=lambda x: int(x.version))
+    return {
+        "name": model_name,
+        "version": latest_version.version,
+        "stage": latest_version.current_stage,
+        "run_id": latest_version.run_id
+    }
+
+def refresh_model_cache(cache, model_name: str):
+    """
+    Download the newest registered version into the cache unless it is
+    already there, and return its entry. None when the registry has no
+    version or its run has no native model (pyfunc models are not cached).
+    """
+    version_info = latest_registry_version(model_name)
+    if version_info is None:
+        return None
+    # One download per version even when every worker checks at once
+    with cache.lock():
+        entry = cache.lookup(model_name, version_info["version"])
+        if entry is not None:
+            return entry
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            try:
+                local_dir = mlflow.artifacts.download_artifacts(
+                    run_id=version_info["run_id"],
+                    artifact_path="native_model",
+                    dst_path=tmp_dir
+                )
+            except Exception as e:
+                print(f"⚠️ No native model for {model_name} v{version_info['version']}, not cached: {str(e)}")
+                return None
+            entry = cache.put(version_info, local_dir)
+    print(f"✅ Cached {model_name} v{entry['version']} ({entry['digest'][:12]})")
+    return entry
+
+def load_cached_model(cache, entry):
+    try:
+        model = compile_native_model(load_native_model(cache.path(entry)))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load cached model: {str(e)}")
+    model_info = {
+        "name": entry["name"],
+        "version": entry["version"],
+        "stage": entry.get("stage"),
+        "run_id": entry.get("run_id"),
+        "digest": entry["digest"],
+        "source": "cache",
+        "format": model_format(model)
+    }
+    return model, model_info
+
+def load_model_with_cache(cache, experiment_name: str = "sales_forecasting", model_name: str = "BestRegressionModel"):
+    """
+    Start from the newest cached version without contacting the tracking
+    server; only an empty cache goes to the registry (and fills the cache).
+    Models that cannot be cached load through the registry as before.
+    """
+    entry = cache.latest(model_name)
+    if entry is None:
+        try:
+            entry = refresh_model_cache(cache, model_name)
+        except Exception as e:
+            print(f"⚠️ Could not cache {model_name} from the registry: {str(e)}")
+    if entry is not None:
+        return load_cached_model(cache, entry)
+    return load_best_model_from_mlflow(experiment_name, model_name)
 
 def load_best_model_from_mlflow(experiment_name: str = "sales_forecasting", model_name: str = "BestRegressionModel"):
 
     try:
         # Set MLflow tracking URI
-        mlflow.set_tracking_uri("http://20.199.136.148:5001")
+        mlflow.set_tracking_uri(MLFLOW_TRACKING_URI_PORT)
         
         # Option 1: Load from Model Registry (Recommended)
         try:
-            # Load the latest version of the model
-            model_uri = f"models:/{model_name}/latest"
-            loaded_model = mlflow.pyfunc.load_model(model_uri)
-            
             # Get model version info
             client = mlflow.tracking.MlflowClient()
             latest_versions = client.get_latest_versions(model_name, stages=["None", "Production", "Staging"])
@@ -28,6 +142,17 @@ def load_best_model_from_mlflow(experiment_name: str = "sales_forecasting", mode
                     "run_id": latest_version.run_id
                 }
             
+            # Prefer the native booster file, fall back to the pickled sklearn flavor
+            loaded_model = load_native_model_from_run(model_info.get("run_id"))
+            if loaded_model is not None:
+                # Trees compiled to arrays for small requests when verified and faster
+                loaded_model = compile_native_model(loaded_model)
+                model_info["format"] = model_format(loaded_model)
+            else:
+                model_uri = f"models:/{model_name}/latest"
+                loaded_model = mlflow.pyfunc.load_model(model_uri)
+                model_info["format"] = "pyfunc"
+            
             return loaded_model, model_info
             
         except Exception as registry_error:
@@ -64,4 +189,28 @@ def load_best_model_from_mlflow(experiment_name: str = "sales_forecasting", mode
             raise Exception("Could not load model from Registry or Experiments")
             
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to load model: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to load model: {str(e)}")
+
+
+def load_serving_model(entry=None):
+    """
+    Model, info and feature schema of the cached version `entry`, or else
+    from MODEL_DIR if set, else the newest cached registry version, else
+    the registry.
+    """
+    if entry is not None:
+        model, info = load_cached_model(model_cache, entry)
+        return model, info, model.feature_schema
+    if MODEL_DIR:
+        model, info = load_local_model(MODEL_DIR)
+        return model, info, model.feature_schema
+    if model_cache is not None:
+        model, info = load_model_with_cache(model_cache, experiment_name="sales_forecasting", model_name=MODEL_NAME)
+        if info.get("source") == "cache":
+            return model, info, model.feature_schema
+    else:
+        model, info = load_best_model_from_mlflow(
+            experiment_name="sales_forecasting",
+            model_name=MODEL_NAME
+        )
+    return model, info, load_feature_schema(info.get("run_id"))
@@ -0,0 +1,314 @@
+"""
+In-process performance metrics in the Prometheus text format, without a
+client library or collector: histograms, counters and gauges kept in
+memory and rendered by `/api/metrics`.
+
+Observing a value costs one bucket search and a few additions under a
+lock. Gauges and counters built with `collect` read their values from
+existing stats (inference pool, prediction cache, model manager) only
+when rendered. Every worker process keeps its own metrics, so with
+pre-forked workers each scrape reports the worker that answered it.
+"""
+import bisect
+import math
+import threading
+import time
+
+# Seconds, from 100 µs single-row predictions to multi-second batches
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+# Rows per batch, powers of two up to the largest columnar chunks
+BATCH_SIZE_BUCKETS = tuple(2 ** i for i in range(17))
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if value != value:
+        return "NaN"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Timer:
+    __slots__ = ("_observe", "_started")
+
+    def __init__(self, observe):
+        self._observe = observe
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._observe(time.perf_counter() - self._started)
+        return False
+
+
+class _Metric:
+    """A named metric with one child per combination of label values."""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), collect=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # Called at render time for values kept elsewhere, as
+        # {label values: value} (a bare value without labels)
+        self.collect = collect
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        values = tuple(str(value) for value in values)
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _samples(self):
+        if self.collect is not None:
+            collected = self.collect()
+            if not isinstance(collected, dict):
+                collected = {(): collected}
+            return [(self.name, tuple(str(v) for v in values), "", value) for values, value in collected.items()]
+        with self._lock:
+            children = list(self._children.items())
+        return [sample for values, child in children for sample in self._child_samples(values, child)]
+
+    def _child_samples(self, values, child):
+        return [(self.name, values, "", child.value)]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for name, values, extra, value in self._samples():
+            if value is None:
+                continue
+            lines.append(f"{name}{_labels(self.labelnames, values, extra)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set(self, value):
+        self.value = value
+
+
+class Counter(_Metric):
+    """Monotonic count; by convention its name ends in _total."""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, e.g. requests in flight."""
+
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def dec(self, amount=1):
+        self.labels().dec(amount)
+
+    def set(self, value):
+        self.labels().set(value)
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "_lock")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # Per bucket, not cumulative; the last one counts values above every bound
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self):
+        """Context manager observing the seconds its block takes."""
+        return _Timer(self.observe)
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed buckets (upper bounds, inclusive)."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def _child_samples(self, values, child):
+        counts, total = child.snapshot()
+        samples, cumulative = [], 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            samples.append((self.name + "_bucket", values, f'le="{_format_value(bound)}"', cumulative))
+        samples.append((self.name + "_sum", values, "", total))
+        samples.append((self.name + "_count", values, "", cumulative))
+        return samples
+
+
+class Registry:
+    """Metrics rendered together, in registration order."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "prediction_stage_seconds",
+    "Seconds spent per prediction stage: validation (reading and validating "
+    "the request body), column_validation, queue (waiting for an inference "
+    "worker), features, predict and serialization",
+    ["stage"]
+))
+BATCH_ROWS = REGISTRY.register(Histogram(
+    "prediction_batch_rows",
+    "Rows per prediction batch (a request, micro-batch or columnar chunk), by endpoint",
+    ["endpoint"],
+    buckets=BATCH_SIZE_BUCKETS
+))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "http_request_duration_seconds",
+    "Seconds from the start of a request to the end of its response",
+    ["endpoint"]
+))
+REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total",
+    "Finished requests by endpoint and status code",
+    ["endpoint", "status"]
+))
+IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight",
+    "Requests being served"
+))
+
+
+def stage(name):
+    """Time a block as prediction stage `name`."""
+    return STAGE_SECONDS.labels(name).time()
+
+
+def observe_validation(request):
+    """Record the time from the start of `request` until its handler was called."""
+    started = request.scope.get("metrics_started")
+    if started is not None:
+        STAGE_SECONDS.labels("validation").observe(time.perf_counter() - started)
+
+
+def _endpoint(scope):
+    # The route template keeps label values bounded, whatever the path
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    # Routes of included routers hold their path without the /api prefix;
+    # the request path is used unless it carries path parameters
+    return route.path if "{" in route.path else scope["path"]
+
+
+class MetricsMiddleware:
+    """ASGI middleware counting requests in flight and timing every response."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        scope["metrics_started"] = started
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            IN_FLIGHT.dec()
+            endpoint = _endpoint(scope)
+            REQUEST_SECONDS.labels(endpoint).observe(time.perf_counter() - started)
+            REQUESTS.labels(endpoint, status["code"]).inc()
@@ -0,0 +1,157 @@
+import asyncio
+import time
+from app.utils.inference_pool import PoolSaturated
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-row predictions into one call of
+    `predict_fn(items)`, which returns one prediction per item. With `run`
+    (an InferencePool's run) the call is made off the event loop; while
+    `max_in_flight` batches run, new requests keep queueing for the next
+    one, up to `max_pending` before they are rejected with PoolSaturated.
+
+    The first queued item opens a batch; it is flushed once the event loop
+    has run the requests already waiting (no delay), or after a timed window
+    when waiting pays off, or as soon as `max_batch_size` items are queued.
+
+    The window adapts to the observed load: when requests arrive closer
+    together than half of `max_wait_ms`, a short window is tried. Windows
+    that gained rows (requests arriving during the wait) grow additively up
+    to `max_wait_ms`; windows that gained nothing are halved until closed.
+    """
+
+    # Batches flushed without waiting between two tries of a window
+    PROBE_EVERY = 50
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=2.0, smoothing=0.1,
+                 run=None, max_in_flight=None, max_pending=None):
+        self.predict_fn = predict_fn
+        self.run = run
+        self.max_in_flight = max_in_flight
+        self.max_pending = max_pending
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.step = self.max_wait / 8
+        self.smoothing = smoothing
+        self._window = 0.0
+        self._loop = None
+        self._pending = []
+        self._timer = None
+        self._timed = False
+        self._ready_rows = 0
+        self._last_arrival = None
+        self._gap = None
+        self._since_probe = 0
+        self._tasks = set()
+        self._in_flight = 0
+        self.n_batches = 0
+        self.n_rows = 0
+
+    def window(self):
+        """Seconds the next batch waits for more requests."""
+        return self._window
+
+    def _observe_arrival(self):
+        now = time.perf_counter()
+        if self._last_arrival is not None:
+            gap = now - self._last_arrival
+            # Exponentially weighted mean gap between requests
+            self._gap = gap if self._gap is None else (1 - self.smoothing) * self._gap + self.smoothing * gap
+        self._last_arrival = now
+
+    def _mark_ready_rows(self):
+        # Rows queued before the window starts waiting; later ones are its gain
+        self._ready_rows = len(self._pending)
+
+    def _adapt(self, batch_size):
+        if self._timed:
+            if batch_size >= self.max_batch_size:
+                return
+            if batch_size > self._ready_rows:
+                self._window = min(self.max_wait, self._window + self.step)
+            else:
+                self._window /= 2
+                if self._window < self.step / 4:
+                    self._window = 0.0
+            return
+        self._since_probe += 1
+        busy = self._gap is not None and self._gap * 2 <= self.max_wait
+        if busy and self._since_probe >= self.PROBE_EVERY:
+            self._window, self._since_probe = self.step, 0
+
+    async def submit(self, item):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Futures belong to one event loop; start over on a new one
+            self._loop, self._pending, self._timer, self._in_flight = loop, [], None, 0
+        if self.max_pending is not None and len(self._pending) >= self.max_pending:
+            raise PoolSaturated(f"Prediction queue full ({self.max_pending} requests waiting)")
+
+        future = loop.create_future()
+        self._observe_arrival()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timed = self._window > 0
+            if self._timed:
+                loop.call_soon(self._mark_ready_rows)
+                self._timer = loop.call_later(self._window, self._flush)
+            else:
+                self._timer = loop.call_soon(self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        if self.max_in_flight is not None and self._in_flight >= self.max_in_flight:
+            # Flushed again when a running batch finishes
+            return
+        batch = self._pending[:self.max_batch_size]
+        self._pending = self._pending[self.max_batch_size:]
+        if self._pending:
+            self._timer = self._loop.call_soon(self._flush)
+        self._in_flight += 1
+        self.n_batches += 1
+        self.n_rows += len(batch)
+        self._adapt(len(batch))
+
+        task = self._loop.create_task(self._predict(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _predict(self, batch):
+        items = [item for item, _ in batch]
+        try:
+            if self.run is None:
+                predictions = self.predict_fn(items)
+            else:
+                predictions = await self.run(self.predict_fn, items)
+            if len(predictions) != len(batch):
+                raise ValueError(f"Model returned {len(predictions)} predictions for {len(batch)} rows")
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._in_flight -= 1
+            if self._pending and self._timer is None:
+                self._timer = self._loop.call_soon(self._flush)
+        for (_, future), prediction in zip(batch, predictions):
+            if not future.done():
+                future.set_result(prediction)
+
+    def stats(self):
+        return {
+            "batches": self.n_batches,
+            "rows": self.n_rows,
+            "mean_batch_size": self.n_rows / self.n_batches if self.n_batches else 0.0,
+            "window_ms": self._window * 1000,
+            "pending": len(self._pending),
+            "batches_in_flight": self._in_flight,
+        }
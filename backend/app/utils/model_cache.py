@@ -0,0 +1,132 @@
+"""
+On-disk cache of registry models, so the backend starts without the
+tracking server. Downloaded native_model directories are stored once per
+content digest and indexed per model name and version:
+
+    <cache_dir>/objects/<sha256>/       native_model directory
+    <cache_dir>/refs/<model_name>.json  cached versions, oldest first
+"""
+import os
+import json
+import time
+import fcntl
+import shutil
+import hashlib
+import tempfile
+from contextlib import contextmanager
+
+
+def directory_digest(path):
+    """sha256 over the relative paths and contents of every file in `path`."""
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            digest.update(os.path.relpath(file_path, path).encode())
+            digest.update(b"\0")
+            with open(file_path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_json(path, data):
+    # Readers see the old or the new file, never a partial one
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class ModelCache:
+    """
+    Versions are kept per model name, newest `keep` only. Every entry records
+    the digest of its directory, which is checked again before the entry is
+    served, so a truncated or edited copy is skipped instead of loaded.
+    """
+
+    def __init__(self, cache_dir, keep=3):
+        self.cache_dir = cache_dir
+        self.keep = keep
+
+    def _objects_dir(self):
+        return os.path.join(self.cache_dir, "objects")
+
+    def _refs_dir(self):
+        return os.path.join(self.cache_dir, "refs")
+
+    def _ref_path(self, model_name):
+        return os.path.join(self._refs_dir(), f"{model_name}.json")
+
+    def path(self, entry):
+        return os.path.join(self._objects_dir(), entry["digest"])
+
+    @contextmanager
+    def lock(self):
+        """Exclusive across processes, e.g. pre-forked workers refreshing together."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(os.path.join(self.cache_dir, ".lock"), "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def entries(self, model_name):
+        try:
+            with open(self._ref_path(model_name)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def lookup(self, model_name, version):
+        for entry in self.entries(model_name):
+            if str(entry["version"]) == str(version) and os.path.isdir(self.path(entry)):
+                return entry
+        return None
+
+    def latest(self, model_name):
+        """Newest cached version whose files still match their digest, or None."""
+        entries = sorted(self.entries(model_name), key=lambda e: int(e["version"]), reverse=True)
+        for entry in entries:
+            path = self.path(entry)
+            if os.path.isdir(path) and directory_digest(path) == entry["digest"]:
+                return entry
+            print(f"⚠️ Cached {model_name} v{entry['version']} is missing or corrupt, skipping")
+        return None
+
+    def put(self, version_info, src_dir):
+        """
+        Copy the model directory `src_dir` into the cache as `version_info`
+        (name, version, stage, run_id) and return its entry.
+        """
+        os.makedirs(self._objects_dir(), exist_ok=True)
+        os.makedirs(self._refs_dir(), exist_ok=True)
+        staging = tempfile.mkdtemp(dir=self.cache_dir, prefix="staging-")
+        try:
+            local_dir = os.path.join(staging, "model")
+            shutil.copytree(src_dir, local_dir)
+            digest = directory_digest(local_dir)
+            target = os.path.join(self._objects_dir(), digest)
+            if not os.path.isdir(target):
+                os.replace(local_dir, target)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        model_name = version_info["name"]
+        entry = {**version_info, "digest": digest, "cached_at": time.time()}
+        entries = [e for e in self.entries(model_name) if str(e["version"]) != str(entry["version"])]
+        entries = sorted(entries + [entry], key=lambda e: int(e["version"]))
+        _write_json(self._ref_path(model_name), entries[-self.keep:])
+        self._prune()
+        return entry
+
+    def _prune(self):
+        referenced = set()
+        for ref in os.listdir(self._refs_dir()):
+            if ref.endswith(".json"):
+                referenced.update(e["digest"] for e in self.entries(ref[:-len(".json")]))
+        for digest in os.listdir(self._objects_dir()):
+            if digest not in referenced:
+                shutil.rmtree(os.path.join(self._objects_dir(), digest), ignore_errors=True)
@@ -0,0 +1,95 @@
+import threading
+import time
+
+
+class ModelManager:
+    """
+    Single owner of model loading. At most one load runs at a time: callers
+    arriving during a load wait for it and reuse its result instead of
+    loading again.
+
+    `load(entry)` returns (model, info, schema) for a cached version entry,
+    or for the default source when `entry` is None. `warm(model, schema)`
+    runs test predictions and raises if the model cannot serve.
+    `install(model, info, schema)` swaps the served model in one step.
+    `active()` returns the info of the served model, None before the first
+    load. A new version that fails to load or warm is never installed; the
+    active model keeps serving. The first model is installed even if its
+    warm-up fails, since there is nothing else to serve.
+    """
+
+    def __init__(self, load, install, active, warm=None):
+        self.load = load
+        self.install = install
+        self.active = active
+        self.warm = warm
+        self._lock = threading.Lock()
+        self.pending = None
+        self.swaps = 0
+        self.last_swap_at = None
+        self.last_error = None
+        self.last_load_s = None
+        self.last_warm_s = None
+        self._rejected_digest = None
+
+    def _activate(self, entry, required=True):
+        started = time.perf_counter()
+        model, info, schema = self.load(entry)
+        loaded = time.perf_counter()
+        if self.warm is not None:
+            try:
+                self.warm(model, schema)
+            except Exception as e:
+                if required:
+                    raise
+                print(f"⚠️ Warm-up failed: {str(e)}")
+        self.install(model, info, schema)
+        self.last_load_s, self.last_warm_s = loaded - started, time.perf_counter() - loaded
+        return info
+
+    def ensure_loaded(self):
+        """Load the default model unless one is served."""
+        if self.active() is not None:
+            return
+        with self._lock:
+            # Loaded by the caller we waited for
+            if self.active() is not None:
+                return
+            self._activate(None, required=False)
+
+    def offer(self, entry):
+        """
+        Load, warm and install the cached version `entry` if it differs from
+        the served one. Returns True when it was swapped in.
+        """
+        if entry is None or entry["digest"] == self._rejected_digest:
+            return False
+        with self._lock:
+            active = self.active()
+            if active is not None and active.get("digest") == entry["digest"]:
+                return False
+            self.pending = {"version": entry["version"], "digest": entry["digest"], "since": time.time()}
+            try:
+                self._activate(entry)
+            except Exception as e:
+                self.last_error = f"v{entry['version']}: {str(e)}"
+                self._rejected_digest = entry["digest"]
+                print(f"⚠️ Keeping the active model, v{entry['version']} failed to load: {str(e)}")
+                return False
+            finally:
+                self.pending = None
+            self.swaps += 1
+            self.last_swap_at = time.time()
+            self.last_error = None
+        print(f"✅ Swapped in {entry['name']} v{entry['version']}")
+        return True
+
+    def stats(self):
+        return {
+            "pending": self.pending,
+            "swaps": self.swaps,
+            "last_swap_at": self.last_swap_at,
+            "last_error": self.last_error,
+            "last_load_s": self.last_load_s,
+            "last_warm_s": self.last_warm_s,
+        }
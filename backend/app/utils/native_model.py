@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from app.utils.tree_compiler import compile_booster, verify_compiled, library_predict_matrix, frame_to_matrix, probe_matrix
+
+MANIFEST_FILE = "native_model.json"
+
+# Guards creating the ensembles' thread pools; a forked child gets a fresh
+# one, since a thread of the parent may have held it at the fork
+_pool_lock = threading.Lock()
+
+
+def _reset_pool_lock():
+    global _pool_lock
+    _pool_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_pool_lock)
+
+
+class NativeModel:
+    """
+    Booster loaded from its native file (LightGBM text, XGBoost UBJSON,
+    CatBoost cbm). Only the library of the model is imported, and predict
+    goes straight to the booster instead of mlflow.pyfunc and the sklearn
+    wrapper.
+    """
+
+    def __init__(self, library, booster, feature_schema=None):
+        self.library = library
+        self.booster = booster
+        self.feature_schema = feature_schema
+        # CatBoost reads categorical columns as integers, never as floats
+        self.cat_index = []
+        if library == "catboost":
+            self.cat_index = list(booster.get_cat_feature_indices())
+
+    def predict(self, X):
+        if self.library == "xgboost":
+            return np.asarray(self.booster.inplace_predict(X))
+        return np.asarray(self.booster.predict(X))
+
+    def predict_matrix(self, X):
+        """Predict a feature matrix in schema order, categoricals as codes."""
+        if self.cat_index:
+            data = X.astype(object)
+            data[:, self.cat_index] = X[:, self.cat_index].astype(np.int64)
+            return np.asarray(self.booster.predict(data))
+        return self.predict(X)
+
+
+class CompiledModel:
+    """
+    Native model whose trees are also compiled into NumPy arrays. Requests
+    of up to `max_rows` rows skip the booster's call overhead and are
+    scored by the compiled trees; larger batches still go to the booster.
+    """
+
+    def __init__(self, native_model, compiled, max_rows=32):
+        self.native_model = native_model
+        self.compiled = compiled
+        self.max_rows = max_rows
+        self.library = native_model.library
+        self.feature_schema = native_model.feature_schema
+
+    def predict(self, X):
+        if len(X) > self.max_rows:
+            return self.native_model.predict(X)
+        return self.compiled.predict_matrix(frame_to_matrix(X, self.compiled.feature_names))
+
+    def predict_matrix(self, X):
+        if len(X) > self.max_rows:
+            return self.native_model.predict_matrix(X)
+        return self.compiled.predict_matrix(X)
+
+
+class EnsembleModel:
+    """
+    Weighted sum of native or compiled member models. Members predict
+    concurrently on a thread pool: the boosters release the GIL while
+    predicting, so a batch takes about as long as the slowest member
+    instead of the sum. Batches under `parallel_min_rows` rows are
+    predicted in turn, which costs less than handing them to threads.
+
+    Threads do not survive fork, so every process creates its own pool on
+    its first large batch: pre-forked workers of a parent that already
+    predicted one (e.g. the warm-up) would otherwise wait on its threads.
+    """
+
+    library = "ensemble"
+
+    def __init__(self, members, weights, encoders, feature_schema=None, parallel_min_rows=64):
+        self.members = list(members)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        # Per member, the ensemble's raw feature matrix -> the member's input
+        self.encoders = list(encoders)
+        self.feature_schema = feature_schema
+        self.parallel_min_rows = parallel_min_rows
+        self._executor = None
+        self._executor_pid = None
+
+    def _pool(self):
+        pid = os.getpid()
+        if self._executor_pid != pid:
+            with _pool_lock:
+                if self._executor_pid != pid:
+                    self._executor = ThreadPoolExecutor(max_workers=len(self.members), thread_name_prefix="ensemble")
+                    self._executor_pid = pid
+        return self._executor
+
+    def _member_predict(self, i, X):
+        return np.asarray(self.members[i].predict_matrix(self.encoders[i](X)), dtype=np.float64).ravel()
+
+    def predict_matrix(self, X):
+        if len(X) < self.parallel_min_rows or len(self.members) == 1:
+            predictions = [self._member_predict(i, X) for i in range(len(self.members))]
+        else:
+            pool = self._pool()
+            futures = [pool.submit(self._member_predict, i, X) for i in range(len(self.members))]
+            predictions = [future.result() for future in futures]
+        return self.weights @ np.vstack(predictions)
+
+    def predict(self, X):
+        return self.predict_matrix(frame_to_matrix(X, self.feature_schema["features"]))
+
+
+def _single_row_us(predict, row, repeat=50):
+    predict(row)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        predict(row)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def compile_native_model(native_model, max_rows=32):
+    """
+    CompiledModel for `native_model`, or the native model itself when its
+    trees cannot be compiled, the compiled trees do not reproduce the
+    library bit for bit on probe rows, or they are not faster on one row.
+    Ensembles have each of their members compiled.
+    """
+    if isinstance(native_model, EnsembleModel):
+        native_model.members = [compile_native_model(member, max_rows) for member in native_model.members]
+        return native_model
+    try:
+        compiled = compile_booster(native_model.library, native_model.booster)
+    except Exception as e:
+        print(f"⚠️ Model not compiled: {str(e)}")
+        return native_model
+    if not verify_compiled(compiled, native_model.booster):
+        print("⚠️ Compiled trees differ from the library predictions, using the booster")
+        return native_model
+
+    row = probe_matrix(compiled, n_rows=1)
+    compiled_us = _single_row_us(compiled.predict_matrix, row)
+    library_us = _single_row_us(
+        lambda r: library_predict_matrix(native_model.library, native_model.booster, r), row
+    )
+    print(f"Compiled {compiled.n_trees} trees: {compiled_us:.0f} us/row vs {library_us:.0f} us/row")
+    if compiled_us >= library_us:
+        return native_model
+    return CompiledModel(native_model, compiled, max_rows)
+
+
+def _member_encoder(layout, features):
+    """Raw matrix in `features` order -> the member's columns, categoricals encoded."""
+    order = [features.index(name) for name in layout.features]
+    if order == list(range(len(features))):
+        return layout.encode
+    return lambda X: layout.encode(X[:, order])
+
+
+def load_ensemble_model(model_dir, manifest, feature_schema):
+    # Imported here, feature_vector itself depends on this module
+    from app.utils.feature_vector import FeatureLayout
+    members, weights, encoders = [], [], []
+    for member in manifest["members"]:
+        model = load_native_model(os.path.join(model_dir, member["model_dir"]))
+        members.append(model)
+        weights.append(member["weight"])
+        encoders.append(_member_encoder(FeatureLayout(model.feature_schema), feature_schema["features"]))
+    return EnsembleModel(members, weights, encoders, feature_schema)
+
+
+def _load_feature_schema(model_dir):
+    schema_path = os.path.join(model_dir, "feature_schema.json")
+    if not os.path.exists(schema_path):
+        return None
+    with open(schema_path) as f:
+        return json.load(f)
+
+
+def load_native_model(model_dir: str) -> NativeModel:
+    with open(os.path.join(model_dir, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    library = manifest["library"]
+    if library == "ensemble":
+        return load_ensemble_model(model_dir, manifest, _load_feature_schema(model_dir))
+    model_path = os.path.join(model_dir, manifest["model_file"])
+
+    if library == "lightgbm":
+        import lightgbm as lgb
+        booster = lgb.Booster(model_file=model_path)
+    elif library == "xgboost":
+        import xgboost as xgb
+        booster = xgb.Booster()
+        booster.load_model(model_path)
+    elif library == "catboost":
+        from catboost import CatBoost
+        booster = CatBoost()
+        booster.load_model(model_path, format="cbm")
+    else:
+        raise ValueError(f"Unsupported native model library: {library}")
+
+    return NativeModel(library, booster, _load_feature_schema(model_dir))
@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache of predictions keyed by the canonical feature vector:
+    the float32 row of a FeatureLayout, so inputs that differ only in
+    fields the model does not use (or in unseen category values, which all
+    become NaN) share an entry. The raw row bytes are the key, hashed by the
+    dict and compared in full, so distinct rows never collide.
+
+    Entries belong to one model object and expire after `ttl_s` seconds.
+    Any other model (a hot swap) empties the cache, and predictions of the
+    replaced model still finishing are not stored.
+    """
+
+    def __init__(self, max_entries=10000, ttl_s=300.0):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._model = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _use_model(self, model):
+        if model is not self._model:
+            if self._model is not None:
+                self.invalidations += 1
+            self._model = model
+            self._entries.clear()
+
+    def lookup(self, model, X):
+        """
+        Cached predictions for the rows of X (NaN where missing) and the
+        indices of the rows that must be predicted.
+        """
+        values = np.full(len(X), np.nan)
+        missing = []
+        now = time.monotonic()
+        with self._lock:
+            self._use_model(model)
+            for i, row in enumerate(X):
+                key = row.tobytes()
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] > now:
+                    self._entries.move_to_end(key)
+                    values[i] = entry[0]
+                else:
+                    if entry is not None:
+                        del self._entries[key]
+                    missing.append(i)
+            self.hits += len(X) - len(missing)
+            self.misses += len(missing)
+        return values, missing
+
+    def store(self, model, X, predictions):
+        expires = time.monotonic() + self.ttl_s
+        with self._lock:
+            if model is not self._model:
+                return
+            for row, prediction in zip(X, predictions):
+                key = row.tobytes()
+                self._entries[key] = (float(prediction), expires)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl_s,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
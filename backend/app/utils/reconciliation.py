@@ -0,0 +1,171 @@
+from functools import cached_property, lru_cache
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.linalg import cho_factor, cho_solve
+from src.hierarchy import HIERARCHY_COLS, SERIES_KEYS, M5_LEVELS, level_blocks
+
+# Aggregation levels of the (item, dept, cat, store, state) hierarchy, top to
+# bottom, shared with the WRMSSE evaluator. The last level is the bottom
+# (item, store) series the model predicts.
+HIERARCHY_LEVELS = M5_LEVELS
+RECONCILIATION_METHODS = ("bottom_up", "mint_shrink")
+# Floor on the shrunk variances, relative to the largest, so W stays invertible
+MIN_VARIANCE = 1e-9
+
+
+def level_name(level):
+    return "/".join(level) if level else "total"
+
+
+def node_label(level, keys):
+    if not level:
+        return "total"
+    return "/".join(f"{col}={value}" for col, value in zip(level, keys))
+
+
+class Hierarchy:
+    """Summing matrix and node labels for a fixed set of bottom series."""
+
+    def __init__(self, series):
+        blocks, self.levels, self.node_keys = [], [], []
+        for level, (block, keys) in zip(HIERARCHY_LEVELS, level_blocks(series, HIERARCHY_LEVELS)):
+            blocks.append(block)
+            self.levels.extend([level] * len(keys))
+            self.node_keys.extend(keys)
+        self.summing_matrix = sparse.vstack(blocks, format="csr")
+        self.labels = [node_label(l, k) for l, k in zip(self.levels, self.node_keys)]
+        self.index = {label: i for i, label in enumerate(self.labels)}
+        self.n_bottom = len(series)
+
+    @cached_property
+    def structural_weights(self):
+        """Inverse structural variances: one over the series count of each node."""
+        return 1.0 / np.asarray(self.summing_matrix.sum(axis=1)).ravel()
+
+    @cached_property
+    def structural_factor(self):
+        """
+        Cholesky factor of S' W^-1 S for structural scaling. It only depends
+        on the catalogue, so it is computed once per cached hierarchy.
+        """
+        S = self.summing_matrix
+        gram = (S.T @ sparse.diags(self.structural_weights) @ S).toarray()
+        return cho_factor(gram)
+
+
+@lru_cache(maxsize=32)
+def get_hierarchy(series_keys):
+    """
+    Hierarchy of a tuple of (item, dept, cat, store, state) bottom series,
+    cached so repeated batches over the same catalogue reuse the matrix.
+    """
+    return Hierarchy(pd.DataFrame(list(series_keys), columns=HIERARCHY_COLS))
+
+
+def _shrinkage(residuals):
+    """
+    Variances of the residuals (rows = time) and the Schafer-Strimmer
+    intensity used by MinT-shrink, without forming node x node matrices.
+    """
+    n = residuals.shape[0]
+    variances = (residuals ** 2).sum(axis=0) / n
+    std = np.sqrt(variances)
+    std[std == 0] = 1.0
+    scaled = residuals / std
+    squared = scaled ** 2
+    # Sum of squared off-diagonal sample correlations, via the time x time Gram
+    denom = ((scaled @ scaled.T) ** 2).sum() / n ** 2 - ((squared.sum(axis=0) / n) ** 2).sum()
+    # Sum of the estimated variances of those correlations
+    row_sums = squared.sum(axis=1)
+    var_corr = ((row_sums ** 2).sum() - (squared ** 2).sum() - n * denom) / (n * (n - 1))
+    lam = 1.0 if denom <= 0 else min(max(var_corr / denom, 0.0), 1.0)
+    return variances, lam
+
+
+def shrink_covariance(residuals):
+    """
+    Covariance of base forecast residuals (rows = time) shrunk towards its
+    diagonal with the Schafer-Strimmer intensity used by MinT-shrink.
+    """
+    variances, lam = _shrinkage(residuals)
+    shrunk = (1 - lam) * (residuals.T @ residuals / residuals.shape[0])
+    shrunk[np.diag_indices_from(shrunk)] = variances
+    return shrunk
+
+
+def reconcile(hierarchy, base, method="bottom_up", residuals=None):
+    """
+    Coherent forecasts for every node (rows) and day (columns).
+
+    `base` holds base forecasts for every node; for bottom_up only the
+    bottom rows are used. mint_shrink combines all levels with the shrunk
+    covariance of `residuals` (time x node); without residuals it falls back
+    to structural scaling (variance proportional to the series count).
+    """
+    if method not in RECONCILIATION_METHODS:
+        raise ValueError(f"Unknown reconciliation method: {method}")
+    S = hierarchy.summing_matrix
+    if method == "bottom_up":
+        return S @ base[-hierarchy.n_bottom:]
+
+    if residuals is None:
+        rhs = S.T @ (hierarchy.structural_weights[:, None] * base)
+        return S @ cho_solve(hierarchy.structural_factor, rhs)
+
+    # The shrunk covariance is diagonal plus low rank, W = D + U U' with
+    # D = lam * variances and U = sqrt((1 - lam) / T) * residuals', so
+    # Woodbury keeps every solve at T x T or bottom x bottom.
+    variances, lam = _shrinkage(residuals)
+    d_inv = 1.0 / np.maximum(lam * variances, MIN_VARIANCE * max(variances.max(), 1.0))
+    U = np.sqrt((1 - lam) / residuals.shape[0]) * residuals.T
+    d_inv_S = sparse.diags(d_inv) @ S
+    V = np.asarray((d_inv_S.T @ U).T)
+    K = cho_factor(np.eye(U.shape[1]) + U.T @ (d_inv[:, None] * U))
+    gram = (S.T @ d_inv_S).toarray() - V.T @ cho_solve(K, V)
+    rhs = d_inv_S.T @ base - V.T @ cho_solve(K, U.T @ (d_inv[:, None] * base))
+    return S @ cho_solve(cho_factor(gram), rhs)
+
+
+def reconcile_batch(input_df, predictions, method="bottom_up", aggregate_forecasts=None, residuals=None):
+    """
+    Reconcile bottom-level predictions of a batch (one row per item, store
+    and day `d`). Returns the sorted days, the hierarchy and the coherent
+    node x day forecast matrix. Missing (series, day) rows count as zero;
+    a (series, day) given twice is rejected.
+    """
+    duplicated = input_df.duplicated(SERIES_KEYS + ["d"])
+    if duplicated.any():
+        row = input_df[duplicated].iloc[0]
+        raise ValueError(
+            f"{int(duplicated.sum())} duplicate (item_id, store_id, d) rows, e.g. "
+            f"item_id={row['item_id']}, store_id={row['store_id']}, d={row['d']}"
+        )
+
+    series = input_df[HIERARCHY_COLS].drop_duplicates(SERIES_KEYS)
+    hierarchy = get_hierarchy(tuple(map(tuple, series.to_numpy(np.int64).tolist())))
+
+    series_idx = pd.MultiIndex.from_frame(series[SERIES_KEYS]).get_indexer(
+        pd.MultiIndex.from_frame(input_df[SERIES_KEYS])
+    )
+    days, day_idx = np.unique(input_df["d"].to_numpy(np.int64), return_inverse=True)
+    bottom = np.zeros((hierarchy.n_bottom, len(days)))
+    bottom[series_idx, day_idx] = np.asarray(predictions, dtype=np.float64)
+
+    # Base forecasts: bottom-up sums, overridden by client forecasts for known nodes
+    base = hierarchy.summing_matrix @ bottom
+    for label, values in (aggregate_forecasts or {}).items():
+        if label not in hierarchy.index:
+            raise ValueError(f"Unknown hierarchy node: {label}")
+        if len(values) != len(days):
+            raise ValueError(f"Node {label} needs {len(days)} forecasts, got {len(values)}")
+        base[hierarchy.index[label]] = values
+
+    residual_matrix = None
+    if residuals is not None:
+        missing = set(hierarchy.labels) - set(residuals)
+        if missing:
+            raise ValueError(f"Residuals missing for {len(missing)} nodes, e.g. {sorted(missing)[0]}")
+        residual_matrix = np.array([residuals[label] for label in hierarchy.labels], dtype=np.float64).T
+
+    return days, hierarchy, reconcile(hierarchy, base, method, residual_matrix)
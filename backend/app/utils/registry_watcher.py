@@ -0,0 +1,54 @@
+import threading
+import time
+
+
+class RegistryWatcher:
+    """
+    Runs `check()` on a daemon thread right away and then every
+    `interval_s` seconds, so registry round trips never delay startup or
+    requests. `check` returns the newest cached version entry (or None);
+    failures, e.g. an unreachable tracking server, are recorded and retried
+    on the next tick.
+    """
+
+    def __init__(self, check, interval_s=300):
+        self.check = check
+        self.interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread = None
+        self.latest = None
+        self.last_checked = None
+        self.last_error = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="registry-watcher", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        self.check_once()
+        while not self._stop.wait(self.interval_s):
+            self.check_once()
+
+    def check_once(self):
+        try:
+            self.latest = self.check()
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"⚠️ Registry check failed: {str(e)}")
+        finally:
+            self.last_checked = time.time()
+        return self.latest
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def stats(self):
+        return {
+            "interval_s": self.interval_s,
+            "last_checked": self.last_checked,
+            "last_error": self.last_error,
+            "latest_cached_version": self.latest["version"] if self.latest else None,
+        }
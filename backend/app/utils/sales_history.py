@@ -0,0 +1,294 @@
+"""
+Recent daily sales per (item_id, store_id) series, pushed by stores as
+days close, from which the lag and mean features are derived at
+prediction time instead of being read from a precomputed table.
+
+Every series owns one row of a (series, window) ring buffer holding its
+last `window` days (day d at column d % window), plus its first and last
+day and the running count and sum of all days seen. Pushing a day costs
+the same whatever the history length, and a batch of pushes is applied
+with NumPy over all series at once.
+
+For a target day t, as the training notebook derives them:
+    sold_lag_l           sold on day t - l, 0 before the series' first day
+    rolling_sold_mean    mean sold over days t - 6 .. t
+    expanding_sold_mean  mean sold over every day up to t, NaN for fewer than
+                         two days (t = last day only)
+Training includes day t itself in both means, so they are only exact once
+t has been pushed. For a day not pushed yet, the one a forecast is for,
+they fall back to the same means over the days before t (t - 7 .. t - 1,
+and every day before t for t = last day + 1): the closest values known at
+prediction time, but not the ones the model was trained on. Values that
+need days not pushed yet, or already out of the window, are NaN.
+
+The history lives in the memory of one process; snapshot() and restore()
+write and read it as one .npz file.
+"""
+import os
+import re
+import time
+import tempfile
+import threading
+import numpy as np
+from app.models.prediction_input import PredictionInput
+
+# Lags of the model's input, e.g. (1, 2, 3, 6, 12, 24, 36) for sold_lag_1 ...
+LAGS = tuple(sorted(int(m.group(1)) for m in map(re.compile(r"sold_lag_(\d+)").fullmatch, PredictionInput.model_fields) if m))
+ROLLING_WINDOW = 7
+
+
+class SalesError(ValueError):
+    """Raised for pushed days that cannot be applied."""
+
+
+class SalesHistory:
+    """Ring buffers of the last `window` days of every series, grown as series appear."""
+
+    def __init__(self, window=None, lags=LAGS, rolling_window=ROLLING_WINDOW, capacity=1024):
+        self.lags = tuple(lags)
+        self.rolling_window = rolling_window
+        self.window = window or max(self.lags + (rolling_window,))
+        if self.window < max(self.lags + (rolling_window,)):
+            raise ValueError(f"A window of {self.window} days cannot serve lag {max(self.lags)}")
+        self._lock = threading.Lock()
+        # Slot of every (item_id, store_id), -1 for series without history
+        self.index = np.full((0, 0), -1, dtype=np.int64)
+        self.n_series = 0
+        # Pushes applied, so unchanged histories are not written again
+        self.version = 0
+        self.sold = np.zeros((capacity, self.window), dtype=np.float32)
+        self.first_day = np.zeros(capacity, dtype=np.int64)
+        self.last_day = np.zeros(capacity, dtype=np.int64)
+        self.days = np.zeros(capacity, dtype=np.int64)
+        self.total = np.zeros(capacity, dtype=np.float64)
+        self.keys = np.zeros((capacity, 2), dtype=np.int64)
+
+    @property
+    def feature_names(self):
+        return [f"sold_lag_{lag}" for lag in self.lags] + ["rolling_sold_mean", "expanding_sold_mean"]
+
+    def __len__(self):
+        return self.n_series
+
+    def _grow(self, n_series):
+        capacity = len(self.first_day)
+        if n_series <= capacity:
+            return
+        capacity = max(n_series, 2 * capacity)
+        for name in ("sold", "first_day", "last_day", "days", "total", "keys"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _lookup(self, item_ids, store_ids):
+        """Slot of every series, -1 for series without history."""
+        rows, cols = self.index.shape
+        inside = (item_ids >= 0) & (item_ids < rows) & (store_ids >= 0) & (store_ids < cols)
+        slots = np.full(len(item_ids), -1, dtype=np.int64)
+        slots[inside] = self.index[item_ids[inside], store_ids[inside]]
+        return slots
+
+    def _add_series(self, keys):
+        """Give each of the (item_id, store_id) rows of `keys`, all new, the next free slot."""
+        self._grow(self.n_series + len(keys))
+        shape = tuple(np.maximum(self.index.shape, keys.max(axis=0) + 1))
+        if shape != self.index.shape:
+            index = np.full(shape, -1, dtype=np.int64)
+            index[:self.index.shape[0], :self.index.shape[1]] = self.index
+            self.index = index
+        slots = np.arange(self.n_series, self.n_series + len(keys))
+        self.index[keys[:, 0], keys[:, 1]] = slots
+        self.keys[slots] = keys
+        self.n_series += len(keys)
+
+    def push(self, item_ids, store_ids, ds, sold):
+        """
+        Apply sold values of (item_id, store_id, d). A series continues at
+        the day after its last one, or starts at its first pushed day;
+        days still in the window may be pushed again as corrections. Days
+        are checked before any is applied, so a rejected batch changes
+        nothing. Returns the number of new series.
+        """
+        item_ids, store_ids, ds = (np.asarray(values, dtype=np.int64) for values in (item_ids, store_ids, ds))
+        sold = np.asarray(sold, dtype=np.float64)
+        if (sold < 0).any():
+            raise SalesError(f"Negative sold value at row {int(np.argmax(sold < 0))}")
+        if (item_ids < 0).any() or (store_ids < 0).any():
+            raise SalesError("item_id and store_id must not be negative")
+        with self._lock:
+            slots = self._lookup(item_ids, store_ids)
+
+            # Records of one series in day order; a new series starts the day before its first
+            order = np.lexsort((ds, store_ids, item_ids))
+            item_ids, store_ids, ds, sold, slots = item_ids[order], store_ids[order], ds[order], sold[order], slots[order]
+            same = np.zeros(len(ds), dtype=bool)
+            same[1:] = (item_ids[1:] == item_ids[:-1]) & (store_ids[1:] == store_ids[:-1])
+            starts = np.flatnonzero(~same)
+            lengths = np.diff(np.append(starts, len(ds)))
+            series_first = np.repeat(ds[starts], lengths)
+            known = slots >= 0
+            first = np.where(known, self.first_day[np.maximum(slots, 0)], series_first)
+            last = np.where(known, self.last_day[np.maximum(slots, 0)], series_first - 1)
+            previous = np.where(same, np.roll(ds, 1), last)
+
+            if (same & (ds == previous)).any():
+                i = int(np.argmax(same & (ds == previous)))
+                raise SalesError(f"Day {ds[i]} pushed twice for item {item_ids[i]} in store {store_ids[i]}")
+            advance = ds == np.maximum(previous, last) + 1
+            correction = (ds <= last) & (ds > last - self.window) & (ds >= first)
+            invalid = ~(advance | correction)
+            if invalid.any():
+                i = int(np.argmax(invalid))
+                raise SalesError(
+                    f"Cannot push day {ds[i]} for item {item_ids[i]} in store {store_ids[i]}: "
+                    f"the next day is {last[i] + 1} and corrections go back {self.window} days"
+                )
+
+            new_starts = starts[~known[starts]]
+            if len(new_starts):
+                self._add_series(np.stack([item_ids[new_starts], store_ids[new_starts]], axis=1))
+                slots = self._lookup(item_ids, store_ids)
+                self.first_day[slots[new_starts]] = ds[new_starts]
+                self.last_day[slots[new_starts]] = ds[new_starts] - 1
+
+            # Each round applies at most one record per series, so fancy indexing never collides
+            rank = np.arange(len(ds)) - np.repeat(starts, lengths)
+            for r in range(int(rank.max()) + 1 if len(rank) else 0):
+                at = rank == r
+                slot, day, value = slots[at], ds[at], sold[at]
+                column = day % self.window
+                old = np.where(day <= self.last_day[slot], self.sold[slot, column], 0.0)
+                added = day > self.last_day[slot]
+                self.sold[slot, column] = value
+                self.total[slot] += value - old
+                self.days[slot] += added
+                self.last_day[slot] = np.maximum(self.last_day[slot], day)
+            self.version += 1
+            return len(new_starts)
+
+    def _sold_on(self, slots, days):
+        """Sold on `days` of series `slots` (broadcast), 0 before the first day, NaN if unknown."""
+        known = slots >= 0
+        safe = np.where(known, slots, 0)
+        first, last = self.first_day[safe], self.last_day[safe]
+        values = self.sold[safe, days % self.window].astype(np.float64)
+        values = np.where(days < first, 0.0, values)
+        in_window = (days <= last) & (days > last - self.window)
+        return np.where(known & ((days < first) | in_window), values, np.nan)
+
+    def features(self, item_ids, store_ids, ds):
+        """Columns of `feature_names` for each target day, NaN where they cannot be derived."""
+        item_ids, store_ids, ds = (np.asarray(values, dtype=np.int64) for values in (item_ids, store_ids, ds))
+        with self._lock:
+            slots = self._lookup(item_ids, store_ids)
+            columns = {}
+            for lag in self.lags:
+                columns[f"sold_lag_{lag}"] = self._sold_on(slots, ds - lag)
+            # Days t, t - 1, .. t - rolling_window: the window ends at t once t is known
+            recent = self._sold_on(slots[:, None], ds[:, None] - np.arange(self.rolling_window + 1))
+            columns["rolling_sold_mean"] = np.where(
+                np.isnan(recent[:, 0]), recent[:, 1:].mean(axis=1), recent[:, :-1].mean(axis=1)
+            )
+            safe = np.where(slots >= 0, slots, 0)
+            days, last = self.days[safe], self.last_day[safe]
+            through = (slots >= 0) & (ds == last) & (days >= 2)
+            before = (slots >= 0) & (ds == last + 1) & (days > 0)
+            columns["expanding_sold_mean"] = np.where(through | before, self.total[safe] / np.maximum(days, 1), np.nan)
+            return columns
+
+    def window_before(self, item_ids, store_ids, day):
+        """
+        Sold on the `window` days before `day`, oldest first, NaN where
+        unknown, and the sum and count of all days before it for series
+        whose last day is `day` - 1 (NaN and 0 for the others).
+        """
+        item_ids, store_ids = (np.asarray(values, dtype=np.int64) for values in (item_ids, store_ids))
+        with self._lock:
+            slots = self._lookup(item_ids, store_ids)
+            sold = self._sold_on(slots[:, None], day - np.arange(self.window, 0, -1)[None, :])
+            safe = np.where(slots >= 0, slots, 0)
+            exact = (slots >= 0) & (self.last_day[safe] == day - 1) & (self.days[safe] > 0)
+            return sold, np.where(exact, self.total[safe], np.nan), np.where(exact, self.days[safe], 0)
+
+    def snapshot(self, path):
+        """
+        Write the history to `path` (.npz), replacing any older snapshot at
+        once through a uniquely named file beside it. Returns its version.
+        """
+        with self._lock:
+            version, n = self.version, self.n_series
+            arrays = {
+                "keys": self.keys[:n], "sold": self.sold[:n], "first_day": self.first_day[:n],
+                "last_day": self.last_day[:n], "days": self.days[:n], "total": self.total[:n],
+                "config": np.array([self.window, self.rolling_window] + list(self.lags)),
+            }
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp.npz")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    np.savez(f, **arrays)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        return version
+
+    @classmethod
+    def restore(cls, path):
+        with np.load(path) as data:
+            window, rolling_window, *lags = data["config"].tolist()
+            history = cls(window=window, lags=lags, rolling_window=rolling_window, capacity=max(len(data["keys"]), 1))
+            n = len(data["keys"])
+            for name in ("keys", "sold", "first_day", "last_day", "days", "total"):
+                getattr(history, name)[:n] = data[name]
+        if n:
+            keys = history.keys[:n].copy()
+            history.index = np.full(tuple(keys.max(axis=0) + 1), -1, dtype=np.int64)
+            history.index[keys[:, 0], keys[:, 1]] = np.arange(n)
+        history.n_series = n
+        return history
+
+
+class SnapshotWriter:
+    """
+    Snapshots `history` to `path` every `interval_s` seconds on a daemon
+    thread when it changed, and once more on stop(), so a restart loses at
+    most one interval of pushes.
+    """
+
+    def __init__(self, history, path, interval_s=60):
+        self.history = history
+        self.path = path
+        self.interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread = None
+        self.written_version = history.version
+        self.last_written = None
+        self.last_error = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sales-snapshots", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            self.write_if_changed()
+
+    def write_if_changed(self):
+        if self.history.version == self.written_version:
+            return False
+        try:
+            self.written_version = self.history.snapshot(self.path)
+            self.last_written = time.time()
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"⚠️ Sales history snapshot failed: {str(e)}")
+            return False
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.write_if_changed()
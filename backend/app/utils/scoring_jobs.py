@@ -0,0 +1,285 @@
+"""
+Bulk scoring jobs over server-side datasets, for scoring runs too long
+for one request. A job reads a Parquet or CSV partition from the data
+directory in chunks, predicts them on a pool of worker threads and writes
+each chunk's predictions to its own Parquet part, then merges the parts
+into one file:
+
+    <jobs_dir>/<job_id>/job.json             status and progress
+    <jobs_dir>/<job_id>/parts/000042.parquet predictions of chunk 42
+    <jobs_dir>/<job_id>/predictions.parquet  result, once completed
+
+Jobs are claimed with a file lock, so every server process (including
+pre-forked workers) can run jobs without two of them scoring the same
+one. A job interrupted by a restart keeps its written parts and resumes
+at the first chunk without one.
+"""
+import os
+import re
+import json
+import time
+import uuid
+import fcntl
+import shutil
+import fnmatch
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from app.utils.columnar import PARQUET, CSV, read_batches, batch_columns, validate_columns
+from app.utils.feature_vector import predict_columns
+
+DATASET_FORMATS = {".parquet": PARQUET, ".csv": CSV}
+# Columns copied from the dataset next to each prediction, when present
+KEY_COLUMNS = ("id", "item_id", "store_id", "d")
+JOB_ID = re.compile(r"[0-9a-f]{32}")
+
+
+class JobError(ValueError):
+    """Raised for a dataset that cannot be scored."""
+
+
+def _write_json(path, data):
+    # Readers see the old or the new file, never a partial one
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class ScoringJobs:
+    """
+    Job queue and runner. `served()` returns the (model, layout, info) to
+    score with, loading the model if needed. Jobs run one at a time per
+    process, each on `workers` threads (the boosters release the GIL while
+    predicting), with at most two chunks per worker read ahead. Only files
+    matching `pattern` inside `data_dir` can be scored.
+    """
+
+    def __init__(self, jobs_dir, data_dir, served, workers=1, chunk_rows=65536, pattern="CA_1_*", poll_s=1.0):
+        self.jobs_dir = jobs_dir
+        self.data_dir = data_dir
+        self.served = served
+        self.workers = workers
+        self.chunk_rows = chunk_rows
+        self.pattern = pattern
+        self.poll_s = poll_s
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def _job_dir(self, job_id):
+        return os.path.join(self.jobs_dir, job_id)
+
+    def _manifest_path(self, job_id):
+        return os.path.join(self._job_dir(job_id), "job.json")
+
+    def _parts_dir(self, job_id):
+        return os.path.join(self._job_dir(job_id), "parts")
+
+    def result_path(self, job_id):
+        return os.path.join(self._job_dir(job_id), "predictions.parquet")
+
+    def resolve_dataset(self, dataset):
+        """Absolute path and input format of `dataset`, a path relative to the data directory."""
+        data_dir = os.path.realpath(self.data_dir)
+        path = os.path.realpath(os.path.join(data_dir, dataset))
+        if os.path.commonpath([data_dir, path]) != data_dir:
+            raise JobError(f"Dataset '{dataset}' is outside the data directory")
+        name = os.path.basename(path)
+        if not fnmatch.fnmatch(name, self.pattern):
+            raise JobError(f"Dataset '{dataset}' does not match '{self.pattern}'")
+        input_format = DATASET_FORMATS.get(os.path.splitext(name)[1].lower())
+        if input_format is None:
+            raise JobError(f"Dataset '{dataset}' is not one of {sorted(DATASET_FORMATS)}")
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Dataset '{dataset}' not found")
+        return path, input_format
+
+    def submit(self, dataset):
+        """Queue a job scoring `dataset` and return its manifest."""
+        path, input_format = self.resolve_dataset(dataset)
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "dataset": dataset,
+            "format": input_format,
+            "status": "queued",
+            "chunk_rows": self.chunk_rows,
+            # Known up front for Parquet, once read to the end for CSV
+            "total_rows": pq.ParquetFile(path).metadata.num_rows if input_format == PARQUET else None,
+            "total_chunks": None,
+            "completed_chunks": 0,
+            "rows_done": 0,
+            "model": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+        }
+        os.makedirs(self._parts_dir(job_id))
+        _write_json(self._manifest_path(job_id), job)
+        self._wake.set()
+        return job
+
+    def get(self, job_id):
+        """Manifest of the job, None if there is none."""
+        if not JOB_ID.fullmatch(job_id):
+            return None
+        try:
+            with open(self._manifest_path(job_id)) as f:
+                job = json.load(f)
+        except FileNotFoundError:
+            return None
+        job["progress"] = job["rows_done"] / job["total_rows"] if job["total_rows"] else None
+        return job
+
+    def list(self):
+        if not os.path.isdir(self.jobs_dir):
+            return []
+        jobs = [self.get(job_id) for job_id in os.listdir(self.jobs_dir)]
+        return sorted((job for job in jobs if job is not None), key=lambda job: job["created_at"])
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="scoring-jobs", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not self.run_pending():
+                self._wake.wait(self.poll_s)
+                self._wake.clear()
+
+    def stop(self):
+        """Stop after the chunks being predicted; running jobs resume on the next start."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def run_pending(self):
+        """Run queued or interrupted jobs until none is left; returns how many ran."""
+        n_jobs = 0
+        while not self._stop.is_set():
+            claimed = self._claim()
+            if claimed is None:
+                break
+            job, lock = claimed
+            try:
+                self._process(job)
+            finally:
+                lock.close()
+            n_jobs += 1
+        return n_jobs
+
+    def _claim(self):
+        for job in self.list():
+            if job["status"] not in ("queued", "running"):
+                continue
+            lock = open(os.path.join(self._job_dir(job["id"]), ".lock"), "w")
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Being run by another process
+                lock.close()
+                continue
+            # Reread now that no other process can change it
+            job = self.get(job["id"])
+            if job["status"] in ("queued", "running"):
+                return job, lock
+            lock.close()
+        return None
+
+    def _save(self, job):
+        _write_json(self._manifest_path(job["id"]), {k: v for k, v in job.items() if k != "progress"})
+
+    def _process(self, job):
+        try:
+            model, layout, info = self.served()
+            served = {key: info.get(key) for key in ("name", "version", "digest")}
+            if job["model"] is not None and job["model"] != served:
+                # Parts of one job always come from one model
+                print(f"⚠️ Job {job['id']}: model changed from v{job['model']['version']}, starting over")
+                shutil.rmtree(self._parts_dir(job["id"]))
+                os.makedirs(self._parts_dir(job["id"]))
+            job.update(status="running", model=served, started_at=job["started_at"] or time.time())
+            self._save(job)
+            if self._score(job, model, layout):
+                self._merge(job)
+                job.update(status="completed", finished_at=time.time())
+                print(f"✅ Job {job['id']}: scored {job['rows_done']} rows of {job['dataset']}")
+        except Exception as e:
+            job.update(status="failed", error=str(e), finished_at=time.time())
+            print(f"⚠️ Job {job['id']} failed: {str(e)}")
+        self._save(job)
+
+    def _part_path(self, job, index):
+        return os.path.join(self._parts_dir(job["id"]), f"{index:06d}.parquet")
+
+    def _score(self, job, model, layout):
+        """Predict every chunk without a part; False when stopped before the end."""
+        path, input_format = self.resolve_dataset(job["dataset"])
+        os.makedirs(self._parts_dir(job["id"]), exist_ok=True)
+        done = {
+            int(name.split(".")[0]): pq.ParquetFile(os.path.join(self._parts_dir(job["id"]), name)).metadata.num_rows
+            for name in os.listdir(self._parts_dir(job["id"])) if name.endswith(".parquet")
+        }
+        job.update(completed_chunks=len(done), rows_done=sum(done.values()))
+        self._save(job)
+
+        pending = set()
+        finished_reading = False
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scoring") as pool:
+            try:
+                offset, index = 0, 0
+                for index, batch in enumerate(read_batches(path, input_format, job["chunk_rows"])):
+                    if index not in done:
+                        if len(pending) >= 2 * self.workers:
+                            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                            self._record(job, finished)
+                        if self._stop.is_set():
+                            break
+                        pending.add(pool.submit(self._score_chunk, job, index, offset, batch, model, layout))
+                    offset += batch.num_rows
+                else:
+                    finished_reading = True
+                    job.update(total_rows=offset, total_chunks=index + 1 if offset else 0)
+                finished, pending = wait(pending)
+                self._record(job, finished)
+            except Exception:
+                for future in pending:
+                    future.cancel()
+                raise
+        return finished_reading
+
+    def _record(self, job, finished):
+        for future in finished:
+            job["rows_done"] += future.result()
+            job["completed_chunks"] += 1
+        self._save(job)
+
+    def _score_chunk(self, job, index, offset, batch, model, layout):
+        columns = validate_columns(batch_columns(batch, layout.features), layout.features, offset)
+        predictions = np.asarray(predict_columns(model, columns, layout), dtype=np.float64).ravel()
+        keys = {name: batch.column(name) for name in KEY_COLUMNS if batch.schema.get_field_index(name) >= 0}
+        table = pa.table({**keys, "prediction": predictions})
+        # A part exists only once complete, so a resumed job never reads a partial one
+        path = self._part_path(job, index)
+        pq.write_table(table, path + ".tmp")
+        os.replace(path + ".tmp", path)
+        return batch.num_rows
+
+    def _merge(self, job):
+        parts = sorted(name for name in os.listdir(self._parts_dir(job["id"])) if name.endswith(".parquet"))
+        output = self.result_path(job["id"])
+        if not parts:
+            pq.write_table(pa.table({"prediction": pa.array([], pa.float64())}), output + ".tmp")
+        else:
+            first = pq.read_table(os.path.join(self._parts_dir(job["id"]), parts[0]))
+            with pq.ParquetWriter(output + ".tmp", first.schema) as writer:
+                for name in parts:
+                    writer.write_table(pq.read_table(os.path.join(self._parts_dir(job["id"]), name)))
+        os.replace(output + ".tmp", output)
+        shutil.rmtree(self._parts_dir(job["id"]))
@@ -0,0 +1,287 @@
+"""
+Content negotiation and compression for prediction responses.
+
+Response bodies follow the Accept header:
+    application/json          orjson, NumPy arrays serialized without Python floats
+    application/msgpack       MessagePack, floats packed as float32
+    application/octet-stream  raw little-endian float32 predictions, model in headers
+
+CompressionMiddleware decompresses gzip or zstd request bodies and
+compresses responses with zstd or gzip, as the client accepts, chunk by
+chunk, so streamed responses stay streamed.
+"""
+import zlib
+import msgpack
+import numpy as np
+import orjson
+import zstandard
+from fastapi import HTTPException
+from fastapi.responses import Response
+from app.utils.metrics import stage
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+FLOAT32 = "application/octet-stream"
+
+# Media types clients may ask for, by the format they select
+MEDIA_TYPES = {
+    JSON: JSON,
+    MSGPACK: MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+    FLOAT32: FLOAT32,
+}
+
+
+def _accepted(header):
+    """Values of an Accept or Accept-Encoding header in order, without q=0 ones."""
+    values = []
+    for part in (header or "").split(","):
+        value, *params = [piece.strip() for piece in part.split(";")]
+        q = 1.0
+        for param in params:
+            name, _, number = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(number)
+                except ValueError:
+                    q = 0.0
+        if value and q > 0:
+            values.append(value.lower())
+    return values
+
+
+def negotiate(accept, offered):
+    """
+    First media type of the Accept header among `offered`, JSON for a
+    missing header or a wildcard. Raises 406 when nothing acceptable is offered.
+    """
+    if not accept:
+        return JSON
+    for media_type in _accepted(accept):
+        if media_type in ("*/*", "application/*"):
+            return JSON
+        selected = MEDIA_TYPES.get(media_type)
+        if selected in offered:
+            return selected
+    raise HTTPException(status_code=406, detail=f"Cannot produce any of '{accept}', available: {list(offered)}")
+
+
+def _msgpack_default(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot pack {type(value)}")
+
+
+def response_format(request, raw_predictions=False):
+    """Media type to answer `request` in; the raw float32 format only with `raw_predictions`."""
+    offered = (JSON, MSGPACK, FLOAT32) if raw_predictions else (JSON, MSGPACK)
+    return negotiate(request.headers.get("accept"), offered)
+
+
+def encode_response(media_type, content, predictions_key="predictions"):
+    """
+    Serialize `content`, a dict that may hold NumPy arrays, as `media_type`.
+    The raw float32 body is content[predictions_key]; the other (scalar)
+    entries become headers, e.g. model_name as X-Model-Name.
+    """
+    with stage("serialization"):
+        if media_type == MSGPACK:
+            body = msgpack.packb(content, default=_msgpack_default, use_single_float=True)
+            return Response(body, media_type=MSGPACK)
+        if media_type == FLOAT32:
+            predictions = np.atleast_1d(np.asarray(content[predictions_key], dtype="<f4"))
+            headers = {
+                "X-" + key.replace("_", "-").title(): str(value)
+                for key, value in content.items() if key != predictions_key
+            }
+            headers["X-Rows"] = str(len(predictions))
+            return Response(predictions.tobytes(), media_type=FLOAT32, headers=headers)
+        body = orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+        return Response(body, media_type=JSON)
+
+
+def _header(headers, name):
+    for key, value in headers:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _without(headers, *names):
+    return [(key, value) for key, value in headers if key not in names]
+
+
+class _BoundedSink:
+    """File-like sink for decompressed bytes that answers 413 past `max_size` in total."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.size = 0
+        self.chunks = []
+
+    @property
+    def remaining(self):
+        return self.max_size - self.size
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise HTTPException(
+                status_code=413, detail=f"Decompressed request body exceeds {self.max_size} bytes"
+            )
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def take(self):
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+def _decompressor(encoding, max_size):
+    """
+    decompress(chunk) and flush() for a request body in `encoding`. Output
+    is produced at most a block past `max_size`, so a small compressed body
+    cannot inflate into gigabytes before it is refused.
+    """
+    sink = _BoundedSink(max_size)
+    if encoding == "gzip":
+        decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+
+        def decompress(data):
+            sink.write(decompressor.decompress(data, sink.remaining + 1))
+            return sink.take()
+
+        def flush():
+            sink.write(decompressor.flush())
+            return sink.take()
+
+        return decompress, flush
+    if encoding == "zstd":
+        # The stream writer hands output to the sink one block at a time
+        writer = zstandard.ZstdDecompressor().stream_writer(sink)
+
+        def decompress(data):
+            writer.write(data)
+            return sink.take()
+
+        return decompress, lambda: b""
+    return None
+
+
+def _compressor(encoding):
+    if encoding == "zstd":
+        compressor = zstandard.ZstdCompressor(level=3).compressobj()
+        return (
+            lambda data: compressor.compress(data) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+            compressor.flush
+        )
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    return (
+        lambda data: compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH),
+        compressor.flush
+    )
+
+
+def accepted_encoding(accept_encoding):
+    """zstd if accepted, else gzip if accepted, else None."""
+    accepted = _accepted(accept_encoding)
+    for encoding in ("zstd", "gzip"):
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware for gzip/zstd transport in both directions. Request
+    bodies are decompressed as they arrive. Responses of at least
+    `minimum_size` bytes, or streamed ones, are compressed per chunk.
+    Request bodies inflating past `max_body_size` bytes are refused with 413.
+    """
+
+    def __init__(self, app, minimum_size=1024, max_body_size=256 * 1024 * 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = scope["headers"]
+        request_encoding = (_header(headers, b"content-encoding") or "").strip().lower()
+        if request_encoding and request_encoding != "identity":
+            decompressor = _decompressor(request_encoding, self.max_body_size)
+            if decompressor is None:
+                await Response(
+                    f"Unsupported Content-Encoding '{request_encoding}', use gzip or zstd",
+                    status_code=415
+                )(scope, receive, send)
+                return
+            # Updated in place, so later middleware sees what the router adds to the scope
+            scope["headers"] = _without(headers, b"content-encoding", b"content-length")
+            receive = self._decompressing(receive, *decompressor)
+
+        encoding = accepted_encoding(_header(headers, b"accept-encoding"))
+        if encoding is not None:
+            send = self._compressing(send, encoding)
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    def _decompressing(receive, decompress, flush):
+        async def wrapped():
+            message = await receive()
+            if message["type"] == "http.request":
+                try:
+                    body = decompress(message.get("body", b""))
+                    if not message.get("more_body", False):
+                        body += flush()
+                except (zlib.error, zstandard.ZstdError) as e:
+                    # Raised while the endpoint reads the body, so it becomes a 400 (413 past the limit)
+                    raise HTTPException(status_code=400, detail=f"Corrupt compressed body: {str(e)}")
+                message = {**message, "body": body}
+            return message
+        return wrapped
+
+    def _compressing(self, send, encoding):
+        state = {"start": None, "compress": None, "finish": None}
+
+        async def wrapped(message):
+            if message["type"] == "http.response.start":
+                # Held until the first body chunk shows whether compression pays off
+                state["start"] = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            start, state["start"] = state["start"], None
+            if start is not None:
+                already_encoded = _header(start["headers"], b"content-encoding") is not None
+                if already_encoded or (not more_body and len(body) < self.minimum_size):
+                    await send(start)
+                    await send(message)
+                    return
+                state["compress"], state["finish"] = _compressor(encoding)
+                await send({
+                    **start,
+                    "headers": _without(start["headers"], b"content-length") + [
+                        (b"content-encoding", encoding.encode()),
+                        (b"vary", b"Accept-Encoding"),
+                    ],
+                })
+            if state["compress"] is None:
+                await send(message)
+                return
+            body = state["compress"](body)
+            if not more_body:
+                body += state["finish"]()
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        return wrapped
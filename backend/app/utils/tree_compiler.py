@@ -0,0 +1,336 @@
+import json
+import numpy as np
+import pandas as pd
+
+# Missing value handling of a split, as in LightGBM's decision_type
+MISSING_NONE, MISSING_ZERO, MISSING_NAN = 0, 1, 2
+# LightGBM's kZeroThreshold is the float 1e-35f
+K_ZERO_THRESHOLD = float(np.float32(1e-35))
+# LightGBM clamps feature values to +-1e300 before comparing them
+K_MAX_VALUE = 1e300
+
+
+class CompiledEnsemble:
+    """
+    Tree ensemble flattened into NumPy arrays, one entry per node of all
+    trees: split feature, threshold, children, default direction, missing
+    handling, categorical bitsets and leaf value. Leaves point to
+    themselves, so every tree can be walked for `max_depth` steps at once,
+    level by level, for a whole batch of rows.
+
+    Each library's decision rule and accumulation dtype are reproduced so
+    the output is bit-for-bit identical to the library prediction:
+    - lightgbm: x <= threshold goes left, float64, categories in set go left,
+      values beyond +-1e300 clamped
+    - xgboost: x < threshold goes left, float32, categories in set go right
+    - catboost: x <= border goes left, float32 features, float64 sums
+    """
+
+    def __init__(self, library, feature_names, nodes, roots, base_score=0.0, scale=1.0):
+        self.library = library
+        self.feature_names = list(feature_names)
+        self.roots = np.asarray(roots, dtype=np.int64)
+        self.base_score = base_score
+        self.scale = scale
+        self.strict = library == "xgboost"
+        self.feature_dtype = np.float64 if library == "lightgbm" else np.float32
+        self.value_dtype = np.float32 if library == "xgboost" else np.float64
+        self.cat_in_set_left = library == "lightgbm"
+
+        self.feature = np.array([n["feature"] for n in nodes], dtype=np.int64)
+        self.threshold = np.array([n["threshold"] for n in nodes], dtype=self.feature_dtype)
+        self.left = np.array([n["left"] for n in nodes], dtype=np.int64)
+        self.right = np.array([n["right"] for n in nodes], dtype=np.int64)
+        self.default_left = np.array([n["default_left"] for n in nodes], dtype=bool)
+        self.missing = np.array([n["missing"] for n in nodes], dtype=np.int8)
+        self.value = np.array([n["value"] for n in nodes], dtype=self.value_dtype)
+        self.categorical = np.array([n.get("categories") is not None for n in nodes], dtype=bool)
+
+        # Children interleaved so the next node is children[2 * node + go_right]
+        self.children = np.column_stack([self.left, self.right]).ravel()
+        # Where NaN goes is fixed per node: the default direction, or the side
+        # of zero for LightGBM splits that treat NaN as zero
+        nan_left = np.where(self.missing == MISSING_NAN, self.default_left, 0 <= self.threshold)
+        nan_left[self.missing == MISSING_ZERO] = self.default_left[self.missing == MISSING_ZERO]
+        self.nan_right = ~nan_left
+        self.is_leaf = self.left == np.arange(len(nodes))
+        self.has_zero_missing = bool((self.missing == MISSING_ZERO).any())
+
+        # Category splits as one flat lookup table: per categorical node, the
+        # direction of codes 0..width-1 followed by the direction of any
+        # other code, so negative (unseen) and large codes share the last slot
+        self.cat_base = np.zeros(len(nodes), dtype=np.int64)
+        self.cat_width = np.zeros(len(nodes), dtype=np.uint64)
+        table = []
+        for i, n in enumerate(nodes):
+            categories = n.get("categories")
+            if categories is None:
+                continue
+            width = max(categories, default=-1) + 1
+            in_set = np.zeros(width + 1, dtype=bool)
+            in_set[categories] = True
+            self.cat_base[i], self.cat_width[i] = len(table), width
+            table.extend((in_set != self.cat_in_set_left).tolist())
+        self.cat_right = np.array(table, dtype=bool)
+        self.has_categorical = bool(self.categorical.any())
+
+        self.max_depth = self._max_depth()
+
+    def _max_depth(self):
+        depth = 0
+        frontier = self.roots
+        while True:
+            is_leaf = self.left[frontier] == frontier
+            if is_leaf.all():
+                return depth
+            frontier = np.concatenate([self.left[frontier[~is_leaf]], self.right[frontier[~is_leaf]]])
+            depth += 1
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def predict_matrix(self, X):
+        X = np.ascontiguousarray(X, dtype=self.feature_dtype)
+        if X.ndim == 1:
+            X = X[None, :]
+        if self.library == "lightgbm":
+            X = np.clip(X, -K_MAX_VALUE, K_MAX_VALUE)
+        n_rows, n_features = X.shape
+        flat = X.ravel()
+        row_offset = (np.arange(n_rows) * n_features)[:, None]
+        node = np.broadcast_to(self.roots, (n_rows, self.n_trees))
+        any_nan = bool(np.isnan(flat).any())
+
+        for _ in range(self.max_depth):
+            if self.is_leaf[node].all():
+                break
+            x = flat[row_offset + self.feature[node]]
+            # NaN compares false either way and is resolved below
+            go_right = x >= self.threshold[node] if self.strict else x > self.threshold[node]
+            if any_nan:
+                go_right = np.where(np.isnan(x), self.nan_right[node], go_right)
+            if self.has_zero_missing:
+                is_zero = (self.missing[node] == MISSING_ZERO) & (np.abs(x) <= K_ZERO_THRESHOLD)
+                go_right = np.where(is_zero, ~self.default_left[node], go_right)
+            if self.has_categorical:
+                with np.errstate(invalid="ignore"):
+                    code = (np.where(np.isnan(x), -1, x) if any_nan else x).astype(np.int64).view(np.uint64)
+                slot = np.minimum(code, self.cat_width[node]).astype(np.int64)
+                go_cat_right = self.cat_right[self.cat_base[node] + slot]
+                if any_nan:
+                    go_cat_right = np.where(np.isnan(x), self.nan_right[node], go_cat_right)
+                go_right = np.where(self.categorical[node], go_cat_right, go_right)
+            node = self.children[2 * node + go_right]
+
+        # Sequential accumulation in tree order, as the libraries do
+        values = np.empty((n_rows, self.n_trees + 1), dtype=self.value_dtype)
+        values[:, 0] = self.base_score if self.library == "xgboost" else 0
+        values[:, 1:] = self.value[node]
+        total = np.cumsum(values, axis=1, dtype=self.value_dtype)[:, -1]
+        if self.library == "catboost":
+            total = self.scale * total + self.base_score
+        return total
+
+
+def _leaf(value):
+    return {"feature": 0, "threshold": 0.0, "default_left": True, "missing": MISSING_NONE, "value": value}
+
+
+def compile_lightgbm(booster):
+    dump = booster.dump_model()
+    if dump.get("num_tree_per_iteration", 1) != 1 or dump.get("average_output"):
+        raise NotImplementedError("Only single-output boosted LightGBM models are supported")
+
+    nodes, roots = [], []
+    missing_types = {"None": MISSING_NONE, "Zero": MISSING_ZERO, "NaN": MISSING_NAN}
+
+    def add(tree):
+        index = len(nodes)
+        if "leaf_value" in tree:
+            nodes.append({**_leaf(tree["leaf_value"]), "left": index, "right": index})
+            return index
+        node = {
+            "feature": tree["split_feature"],
+            "default_left": tree["default_left"],
+            "missing": missing_types[tree["missing_type"]],
+            "value": 0.0,
+        }
+        if tree["decision_type"] == "==":
+            node["threshold"] = 0.0
+            node["categories"] = [int(c) for c in str(tree["threshold"]).split("||")]
+            # NaN categories always go right in LightGBM
+            node["missing"], node["default_left"] = MISSING_NAN, False
+        else:
+            node["threshold"] = float(tree["threshold"])
+        nodes.append(node)
+        node["left"] = add(tree["left_child"])
+        node["right"] = add(tree["right_child"])
+        return index
+
+    for tree in dump["tree_info"]:
+        roots.append(add(tree["tree_structure"]))
+    return CompiledEnsemble("lightgbm", dump["feature_names"], nodes, roots)
+
+
+def compile_xgboost(booster):
+    model = json.loads(booster.save_raw(raw_format="json"))["learner"]
+    if model["gradient_booster"]["name"] != "gbtree":
+        raise NotImplementedError("Only gbtree XGBoost models are supported")
+    base_score = model["learner_model_param"]["base_score"].strip("[]")
+    trees = model["gradient_booster"]["model"]["trees"]
+
+    nodes, roots = [], []
+    for tree in trees:
+        offset = len(nodes)
+        roots.append(offset)
+        left, right = tree["left_children"], tree["right_children"]
+        categories = {}
+        for node_id, start, size in zip(
+            tree.get("categories_nodes", []),
+            tree.get("categories_segments", []),
+            tree.get("categories_sizes", [])
+        ):
+            categories[node_id] = [int(c) for c in tree["categories"][start:start + size]]
+        for i in range(len(left)):
+            if left[i] == -1:
+                nodes.append({**_leaf(tree["split_conditions"][i]), "left": offset + i, "right": offset + i})
+                continue
+            node = {
+                "feature": tree["split_indices"][i],
+                "threshold": tree["split_conditions"][i],
+                "left": offset + left[i],
+                "right": offset + right[i],
+                "default_left": bool(tree["default_left"][i]),
+                "missing": MISSING_NAN,
+                "value": 0.0,
+            }
+            if tree["split_type"][i] == 1:
+                node["categories"] = categories.get(i, [])
+            nodes.append(node)
+    return CompiledEnsemble(
+        "xgboost", booster.feature_names, nodes, roots, base_score=np.float32(float(base_score))
+    )
+
+
+def compile_catboost(model):
+    import os
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "model.json")
+        model.save_model(path, format="json")
+        with open(path) as f:
+            dump = json.load(f)
+
+    float_features = dump["features_info"].get("float_features", [])
+    if dump["features_info"].get("categorical_features"):
+        raise NotImplementedError("CatBoost models with categorical features (CTRs) cannot be compiled")
+    flat_index = {f["feature_index"]: f["flat_feature_index"] for f in float_features}
+    nan_true = {f["feature_index"]: f.get("nan_value_treatment") == "AsTrue" for f in float_features}
+
+    nodes, roots = [], []
+    for tree in dump["oblivious_trees"]:
+        splits = tree["splits"]
+        leaf_values = tree["leaf_values"]
+        depth = len(splits)
+
+        # Oblivious tree as a full binary tree; bit k of the leaf index is split k
+        def add(level, leaf_index):
+            index = len(nodes)
+            if level == depth:
+                nodes.append({**_leaf(leaf_values[leaf_index]), "left": index, "right": index})
+                return index
+            split = splits[level]
+            if split.get("split_type", "FloatFeature") != "FloatFeature":
+                raise NotImplementedError(f"Unsupported CatBoost split type: {split['split_type']}")
+            node = {
+                "feature": flat_index[split["float_feature_index"]],
+                "threshold": split["border"],
+                "default_left": not nan_true[split["float_feature_index"]],
+                "missing": MISSING_NAN,
+                "value": 0.0,
+            }
+            nodes.append(node)
+            node["left"] = add(level + 1, leaf_index)
+            node["right"] = add(level + 1, leaf_index | (1 << level))
+            return index
+
+        roots.append(add(0, 0))
+
+    scale, bias = dump.get("scale_and_bias", [1.0, [0.0]])
+    bias = bias[0] if isinstance(bias, list) else bias
+    return CompiledEnsemble("catboost", model.feature_names_, nodes, roots, base_score=bias, scale=scale)
+
+
+def compile_booster(library, booster):
+    if library == "lightgbm":
+        return compile_lightgbm(booster)
+    if library == "xgboost":
+        return compile_xgboost(booster)
+    if library == "catboost":
+        return compile_catboost(booster)
+    raise ValueError(f"Unsupported library: {library}")
+
+
+def frame_to_matrix(input_df, feature_names):
+    """Feature matrix in model order; pandas categoricals become their codes."""
+    columns = []
+    for name in feature_names:
+        column = input_df[name]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            codes = column.cat.codes.to_numpy(np.float64)
+            codes[codes < 0] = np.nan
+            columns.append(codes)
+        else:
+            columns.append(column.to_numpy(np.float64))
+    return np.column_stack(columns)
+
+
+def library_predict_matrix(library, booster, X):
+    """Prediction of the library itself on a feature matrix (categoricals as codes)."""
+    if library == "xgboost":
+        import xgboost as xgb
+        dmatrix = xgb.DMatrix(
+            X, feature_names=booster.feature_names, feature_types=booster.feature_types,
+            enable_categorical=True
+        )
+        return booster.predict(dmatrix)
+    return np.asarray(booster.predict(X))
+
+
+def probe_matrix(compiled, n_rows=512, seed=0):
+    """
+    Rows built from the values the trees branch on: every threshold and its
+    neighbouring floats, zero, NaN, and every category code plus unseen ones.
+    These are the inputs where a wrong comparison or dtype would show.
+    """
+    rng = np.random.default_rng(seed)
+    n_features = len(compiled.feature_names)
+    dtype = compiled.feature_dtype
+    X = np.empty((n_rows, n_features), dtype=np.float64)
+    for f in range(n_features):
+        at_feature = (compiled.feature == f) & ~compiled.is_leaf
+        numeric = compiled.threshold[at_feature & ~compiled.categorical]
+        widths = compiled.cat_width[at_feature & compiled.categorical].astype(np.int64)
+        with np.errstate(over="ignore"):
+            neighbours = [
+                np.nextafter(numeric, np.array(np.inf, dtype=dtype)),
+                np.nextafter(numeric, np.array(-np.inf, dtype=dtype))
+            ]
+        candidates = np.concatenate([
+            numeric,
+            *neighbours,
+            np.arange(widths.max() + 2 if len(widths) else 0),
+            [0.0, -1.0, np.nan]
+        ]).astype(np.float64)
+        X[:, f] = rng.choice(candidates, size=n_rows)
+    return X
+
+
+def verify_compiled(compiled, booster, n_rows=512, seed=0):
+    X = probe_matrix(compiled, n_rows, seed)
+    return np.array_equal(
+        compiled.predict_matrix(X),
+        library_predict_matrix(compiled.library, booster, X).astype(compiled.value_dtype)
+    )
@@ -0,0 +1,111 @@
+"""
+Time and peak memory of one large batch sent to /api/predict-batch as JSON
+rows against /api/predict-batch-columnar as Arrow, Parquet or CSV, with
+NDJSON results. Each measurement runs in a fresh interpreter, so peak RSS
+belongs to that request alone (the request body is built before timing).
+
+    python benchmarks/bench_columnar_batch.py [--model lgbm] [--rows 100000 400000]
+"""
+import io
+import os
+import sys
+import time
+import json
+import resource
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_model_artifacts import make_data, fit
+
+MODES = ["json", "arrow", "parquet", "csv"]
+CONTENT_TYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+    "csv": "text/csv",
+}
+
+
+def build_body(mode, X):
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+    if mode == "json":
+        return json.dumps({"data": X.to_dict(orient="records")}).encode()
+    if mode == "csv":
+        return X.to_csv(index=False).encode()
+    sink = io.BytesIO()
+    table = pa.Table.from_pandas(X, preserve_index=False)
+    if mode == "parquet":
+        pq.write_table(table, sink)
+    else:
+        with pa_ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue()
+
+
+def run_one(mode, model_dir, n_rows):
+    os.environ["MODEL_DIR"] = model_dir
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.models.prediction_input import PredictionInput
+
+    X, _ = make_data(n_rows, seed=1)
+    body = build_body(mode, X[list(PredictionInput.model_fields)])
+    with TestClient(app) as client:
+        baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        t = time.perf_counter()
+        if mode == "json":
+            response = client.post("/api/predict-batch", content=body, headers={"Content-Type": "application/json"})
+            n_predictions = len(response.json()["predictions"])
+        else:
+            n_predictions = 0
+            with client.stream("POST", "/api/predict-batch-columnar", content=body,
+                               headers={"Content-Type": CONTENT_TYPES[mode]}) as response:
+                for line in response.iter_lines():
+                    n_predictions += bool(line)
+        seconds = time.perf_counter() - t
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    assert response.status_code == 200 and n_predictions == n_rows, response.status_code
+    print(json.dumps({"seconds": seconds, "peak_mb": (peak - baseline) / 1024, "body_mb": len(body) / 2**20}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="lgbm", choices=["lgbm", "xgboost", "catboost"])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000, 400000])
+    parser.add_argument("--trees", type=int, default=300)
+    parser.add_argument("--run-one", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run_one:
+        mode, model_dir, n_rows = args.run_one
+        return run_one(mode, model_dir, int(n_rows))
+
+    from src.preprocessing import fit_category_levels, to_model_input, build_feature_schema
+    from src.artifacts import save_native_model
+    from app.models.prediction_input import PredictionInput
+
+    X, y = make_data(20000)
+    X = X[list(PredictionInput.model_fields)]
+    levels = fit_category_levels(X)
+    model = fit(args.model, to_model_input(args.model, X, levels), y, args.trees)
+    with tempfile.TemporaryDirectory() as model_dir:
+        save_native_model(model, args.model, build_feature_schema(args.model, X, levels), model_dir)
+        print(f"{'rows':>8}{'format':>10}{'body MB':>10}{'seconds':>10}{'rows/s':>10}{'peak MB':>10}")
+        for n_rows in args.rows:
+            for mode in MODES:
+                output = subprocess.run(
+                    [sys.executable, __file__, "--run-one", mode, model_dir, str(n_rows)],
+                    capture_output=True, text=True, check=True,
+                    env={**os.environ, "MLFLOW_DISABLE_AGENT_HINT": "1", "PREDICTION_CACHE_SIZE": "0"}
+                ).stdout.strip().splitlines()[-1]
+                result = json.loads(output)
+                print(
+                    f"{n_rows:>8}{mode:>10}{result['body_mb']:>10.1f}{result['seconds']:>10.2f}"
+                    f"{n_rows / result['seconds']:>10.0f}{result['peak_mb']:>10.0f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Payload size and parse time of a /predict-batch body sent as rows (one
+object per row) against columns (one array per feature), from the raw JSON
+bytes to the validated float32 feature matrix, as the endpoint does it.
+
+    python benchmarks/bench_columnar_json.py [--rows 1000 10000 100000]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_model_artifacts import make_data
+
+from src.preprocessing import fit_category_levels, build_feature_schema
+from app.models.prediction_input import PredictionInput
+from app.models.batch_prediction_input import BatchPredictionInput
+from app.utils.feature_vector import FeatureLayout
+from app.utils.columnar import validate_columns
+
+
+def parse_rows(body, layout):
+    batch = BatchPredictionInput.model_validate(json.loads(body))
+    return layout.fill(batch.data)
+
+
+def parse_columns(body, layout):
+    batch = BatchPredictionInput.model_validate(json.loads(body))
+    return layout.from_columns(validate_columns(batch.columns, layout.features))
+
+
+def best_of(fn, *args, repeat=3):
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = fn(*args)
+        times.append(time.perf_counter() - t)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>8}{'rows MB':>9}{'cols MB':>9}{'size x':>8}{'rows ms':>10}{'cols ms':>10}{'speedup':>9}")
+    for n_rows in args.rows:
+        X, _ = make_data(n_rows)
+        X = X[list(PredictionInput.model_fields)]
+        layout = FeatureLayout(build_feature_schema("lgbm", X, fit_category_levels(X)))
+        rows_body = json.dumps({"data": X.to_dict(orient="records")}).encode()
+        columns_body = json.dumps({"columns": X.to_dict(orient="list")}).encode()
+
+        rows_s, rows_matrix = best_of(parse_rows, rows_body, layout)
+        columns_s, columns_matrix = best_of(parse_columns, columns_body, layout)
+        assert (rows_matrix.tobytes() == columns_matrix.tobytes())
+        print(
+            f"{n_rows:>8}{len(rows_body) / 2**20:>9.2f}{len(columns_body) / 2**20:>9.2f}"
+            f"{len(rows_body) / len(columns_body):>8.1f}"
+            f"{rows_s * 1000:>10.1f}{columns_s * 1000:>10.1f}{rows_s / columns_s:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Single-row and batch latency of the sklearn wrapper (what mlflow.pyfunc
+calls), the native booster and the compiled array trees, on requests that
+already went through the feature schema as in the backend.
+
+    python benchmarks/bench_compiled_trees.py [--rows 50000] [--trees 300]
+
+CatBoost models with categorical features are not compiled and show n/a.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_model_artifacts import make_data, fit
+
+from src.preprocessing import fit_category_levels, to_model_input, build_feature_schema
+from src.artifacts import save_native_model
+from app.utils.native_model import load_native_model, CompiledModel
+from app.utils.tree_compiler import compile_booster, verify_compiled
+from app.utils.feature_schema import apply_feature_schema
+
+
+def median_us(predict, requests):
+    predict(requests[0])
+    timings = []
+    for request in requests:
+        t = time.perf_counter()
+        predict(request)
+        timings.append(time.perf_counter() - t)
+    return np.median(timings) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--trees", type=int, default=300)
+    parser.add_argument("--batch", type=int, default=10000)
+    args = parser.parse_args()
+
+    X, y = make_data(args.rows)
+    levels = fit_category_levels(X)
+
+    print(f"{'model':<10}{'path':<10}{'1 row us':>12}{f'{args.batch} rows ms':>16}{'bit-exact':>11}")
+    for model_name in ["lgbm", "xgboost", "catboost"]:
+        X_model = to_model_input(model_name, X, levels)
+        model = fit(model_name, X_model, y, args.trees)
+        schema = build_feature_schema(model_name, X, levels)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            save_native_model(model, model_name, schema, tmp_dir)
+            native = load_native_model(tmp_dir)
+
+        requests = [apply_feature_schema(X.iloc[[i]], schema) for i in range(200)]
+        batch = apply_feature_schema(X.iloc[np.resize(np.arange(len(X)), args.batch)], schema)
+        paths = [("sklearn", model.predict, None), ("native", native.predict, None)]
+        try:
+            compiled = compile_booster(native.library, native.booster)
+            paths.append((
+                "compiled",
+                CompiledModel(native, compiled, max_rows=len(batch)).predict,
+                verify_compiled(compiled, native.booster)
+            ))
+        except NotImplementedError:
+            compiled = None
+
+        for path, predict, exact in paths:
+            t = time.perf_counter()
+            predict(batch)
+            batch_ms = (time.perf_counter() - t) * 1000
+            print(
+                f"{model_name:<10}{path:<10}{median_us(predict, requests):>12.0f}{batch_ms:>16.1f}"
+                f"{'' if exact is None else str(exact):>11}"
+            )
+        if compiled is None:
+            print(f"{model_name:<10}{'compiled':<10}{'n/a':>12}{'n/a':>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Throughput and latency of single-row predictions with and without
+micro-batching under open-loop Poisson arrivals at increasing rates.
+Latency runs from the scheduled arrival, so queueing behind a busy model
+counts. The HTTP layer is left out: requests call the batcher used by
+/api/predict.
+
+    python benchmarks/bench_micro_batching.py [--model lgbm] [--requests 5000]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_model_artifacts import make_data, fit
+
+from src.preprocessing import fit_category_levels, to_model_input, build_feature_schema
+from src.artifacts import save_native_model
+from app.models.prediction_input import PredictionInput
+from app.utils.native_model import load_native_model
+from app.utils.feature_vector import FeatureLayout, predict_items
+from app.utils.micro_batcher import MicroBatcher
+
+
+async def open_loop(batcher, items, rate, n_requests, seed=0):
+    arrivals = np.cumsum(np.random.default_rng(seed).exponential(1 / rate, n_requests))
+    latencies = np.empty(n_requests)
+
+    async def request(i):
+        await batcher.submit(items[i % len(items)])
+        latencies[i] = time.perf_counter() - (start + arrivals[i])
+
+    start = time.perf_counter()
+    tasks = []
+    for i, arrival in enumerate(arrivals):
+        delay = start + arrival - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(request(i)))
+    await asyncio.gather(*tasks)
+    return n_requests / (time.perf_counter() - start), latencies * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="lgbm", choices=["lgbm", "xgboost", "catboost"])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--trees", type=int, default=300)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    X, y = make_data(args.rows)
+    X = X[list(PredictionInput.model_fields)]
+    levels = fit_category_levels(X)
+    model = fit(args.model, to_model_input(args.model, X, levels), y, args.trees)
+    schema = build_feature_schema(args.model, X, levels)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        save_native_model(model, args.model, schema, tmp_dir)
+        native = load_native_model(tmp_dir)
+
+    layout = FeatureLayout(schema)
+    items = [PredictionInput(**row) for row in X.head(1000).to_dict(orient="records")]
+
+    def predict(batch):
+        return predict_items(native, batch, layout)
+
+    # Warm up lazily built booster state before timing
+    predict(items[:64])
+
+    print(f"{'offered/s':>10}{'batching':>10}{'served/s':>10}{'mean batch':>12}{'p50 ms':>9}{'p99 ms':>9}")
+    for rate in [1000, 5000, 10000, 20000, 40000]:
+        for label, max_batch_size in [("off", 1), ("on", 64)]:
+            batcher = MicroBatcher(predict, max_batch_size=max_batch_size, max_wait_ms=args.max_wait_ms)
+            served, latencies = asyncio.run(open_loop(batcher, items, rate, args.requests))
+            print(
+                f"{rate:>10}{label:>10}{served:>10.0f}"
+                f"{batcher.stats()['mean_batch_size']:>12.1f}"
+                f"{np.percentile(latencies, 50):>9.2f}{np.percentile(latencies, 99):>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
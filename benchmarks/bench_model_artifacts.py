@@ -0,0 +1,125 @@
+"""
+Artifact size and load time of the pickled sklearn wrappers (what
+mlflow.sklearn.log_model stores) against the native booster files.
+
+    python benchmarks/bench_model_artifacts.py [--rows 50000] [--trees 300]
+
+Cold load time is measured in a fresh interpreter so it includes imports.
+"""
+import os
+import sys
+import time
+import pickle
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+from src.preprocessing import fit_category_levels, to_model_input, build_feature_schema
+from src.artifacts import save_native_model
+from app.utils.native_model import load_native_model
+
+
+def make_data(n_rows, seed=0):
+    sample = pd.read_csv(os.path.join(ROOT, "data", "Data_for_test.csv"))
+    rng = np.random.default_rng(seed)
+    X = sample.sample(n_rows, replace=True, random_state=seed).reset_index(drop=True)
+    X["item_id"] = rng.integers(0, 3049, n_rows)
+    y = X["sold_lag_1"] + rng.normal(0, 1, n_rows)
+    return X, y
+
+
+def fit(model_name, X, y, n_trees):
+    from lightgbm import LGBMRegressor
+    from xgboost import XGBRegressor
+    from catboost import CatBoostRegressor
+    from src.preprocessing import get_categorical_features
+
+    if model_name == "lgbm":
+        return LGBMRegressor(n_estimators=n_trees, num_leaves=50, verbose=-1).fit(
+            X, y, categorical_feature=get_categorical_features(X)
+        )
+    if model_name == "xgboost":
+        return XGBRegressor(n_estimators=n_trees, tree_method="hist", enable_categorical=True).fit(X, y)
+    return CatBoostRegressor(
+        iterations=n_trees, depth=8, verbose=0, cat_features=get_categorical_features(X),
+        allow_writing_files=False
+    ).fit(X, y)
+
+
+def cold_load_seconds(snippet, repeat=3):
+    code = (
+        f"import sys, time; sys.path[:0] = [{ROOT!r}, {os.path.join(ROOT, 'backend')!r}]\n"
+        f"t = time.perf_counter()\n{snippet}\nprint(time.perf_counter() - t)"
+    )
+    runs = [
+        float(subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout)
+        for _ in range(repeat)
+    ]
+    return min(runs)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--trees", type=int, default=300)
+    args = parser.parse_args()
+
+    X, y = make_data(args.rows)
+    levels = fit_category_levels(X)
+
+    print(f"{'model':<10}{'format':<10}{'size KB':>10}{'warm ms':>10}{'cold ms':>10}{'max |diff|':>12}")
+    for model_name in ["lgbm", "xgboost", "catboost"]:
+        X_model = to_model_input(model_name, X, levels)
+        model = fit(model_name, X_model, y, args.trees)
+        expected = model.predict(X_model)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pickle_path = os.path.join(tmp_dir, "model.pkl")
+            with open(pickle_path, "wb") as f:
+                pickle.dump(model, f)
+            native_dir = os.path.join(tmp_dir, "native")
+            os.makedirs(native_dir)
+            native_path = save_native_model(
+                model, model_name, build_feature_schema(model_name, X, levels), native_dir
+            )
+
+            t = time.perf_counter()
+            with open(pickle_path, "rb") as f:
+                pickle.load(f)
+            pickle_warm = time.perf_counter() - t
+            pickle_cold = cold_load_seconds(
+                f"import pickle; pickle.load(open({pickle_path!r}, 'rb'))"
+            )
+
+            t = time.perf_counter()
+            native = load_native_model(native_dir)
+            native_warm = time.perf_counter() - t
+            native_cold = cold_load_seconds(
+                f"from app.utils.native_model import load_native_model; load_native_model({native_dir!r})"
+            )
+            diff = np.max(np.abs(native.predict(X_model) - expected))
+
+            for fmt, path, warm, cold, d in [
+                ("pickle", pickle_path, pickle_warm, pickle_cold, 0.0),
+                ("native", native_path, native_warm, native_cold, diff),
+            ]:
+                print(
+                    f"{model_name:<10}{fmt:<10}{os.path.getsize(path) / 1024:>10.1f}"
+                    f"{warm * 1000:>10.1f}{cold * 1000:>10.1f}{d:>12.2e}"
+                )
+
+    # The current serving path also pays for importing mlflow.pyfunc
+    try:
+        print(f"\nimport mlflow.pyfunc (cold): {cold_load_seconds('import mlflow.pyfunc') * 1000:.1f} ms")
+    except subprocess.CalledProcessError:
+        print("\nmlflow is not installed, pyfunc import cost not measured")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Startup time and memory of N serving workers: the pre-fork server (model
+loaded once, shared copy-on-write) against `uvicorn --workers N`, where
+every worker loads its own copy. Memory is the summed PSS of all server
+processes, which splits shared pages between the processes using them.
+
+    python benchmarks/bench_prefork.py --model-dir /path/to/native_model [--workers 1 2 4 8]
+
+Linux only (reads /proc).
+"""
+import os
+import sys
+import time
+import signal
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND = os.path.join(ROOT, "backend")
+
+
+def descendants(pid):
+    children = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+    found, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        found.append(current)
+        stack.extend(children.get(current, []))
+    return found
+
+
+def pss_mb(pids):
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/smaps_rollup") as f:
+                for line in f:
+                    if line.startswith("Pss:"):
+                        total += int(line.split()[1])
+        except OSError:
+            pass
+    return total / 1024
+
+
+def start(command, env, workers, log_path, timeout=300):
+    """Seconds until every worker finished its startup, and the process."""
+    log = open(log_path, "w")
+    t = time.perf_counter()
+    process = subprocess.Popen(
+        command, cwd=BACKEND, env=env, stdout=log, stderr=subprocess.STDOUT, start_new_session=True
+    )
+    while time.perf_counter() - t < timeout:
+        with open(log_path) as f:
+            if f.read().count("Application startup complete") >= workers:
+                return time.perf_counter() - t, process
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited, see {log_path}")
+        time.sleep(0.05)
+    raise TimeoutError(f"Workers not up after {timeout} s, see {log_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model-dir", required=True)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--port", type=int, default=8799)
+    args = parser.parse_args()
+
+    env = {
+        **os.environ,
+        "MODEL_DIR": os.path.abspath(args.model_dir),
+        "SERVE_PORT": str(args.port),
+        "MLFLOW_DISABLE_AGENT_HINT": "1",
+    }
+    print(f"{'mode':<18}{'workers':>8}{'startup s':>11}{'PSS MB':>10}{'PSS/worker':>12}")
+    for workers in args.workers:
+        modes = [
+            ("prefork", [sys.executable, "-m", "app.serve"], {"SERVE_WORKERS": str(workers)}),
+            ("uvicorn --workers", [
+                sys.executable, "-m", "uvicorn", "app.main:app",
+                "--port", str(args.port), "--workers", str(workers)
+            ], {}),
+        ]
+        for mode, command, extra_env in modes:
+            log_path = f"/tmp/bench_prefork_{mode.split()[0]}_{workers}.log"
+            seconds, process = start(command, {**env, **extra_env}, workers, log_path)
+            time.sleep(1)
+            memory = pss_mb(descendants(process.pid))
+            os.killpg(process.pid, signal.SIGTERM)
+            process.wait(timeout=60)
+            print(f"{mode:<18}{workers:>8}{seconds:>11.2f}{memory:>10.0f}{memory / workers:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
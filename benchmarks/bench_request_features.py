@@ -0,0 +1,66 @@
+"""
+Per-request cost of turning validated PredictionInput objects into model
+input: the previous model_dump -> DataFrame -> apply_feature_schema path
+against FeatureLayout writing into a float32 buffer. Model time excluded.
+
+    python benchmarks/bench_request_features.py [--repeat 200]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+from src.preprocessing import fit_category_levels, build_feature_schema
+from app.models.prediction_input import PredictionInput
+from app.utils.feature_schema import apply_feature_schema
+from app.utils.feature_vector import FeatureLayout
+
+
+def median_us(fn, repeat):
+    fn()
+    timings = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t)
+    return np.median(timings) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    sample = pd.read_csv(os.path.join(ROOT, "data", "Data_for_test.csv"))
+    X = sample[list(PredictionInput.model_fields)]
+    items = [PredictionInput(**row) for row in X.to_dict(orient="records")]
+
+    print(f"{'encoding':<10}{'rows':>6}{'DataFrame us':>15}{'buffer us':>12}{'speedup':>10}")
+    for model_name in ["lgbm", "catboost"]:
+        schema = build_feature_schema(model_name, X, fit_category_levels(X))
+        layout = FeatureLayout(schema)
+        for n_rows in [1, 10, 100, 1000]:
+            batch = (items * (n_rows // len(items) + 1))[:n_rows]
+
+            def before():
+                return apply_feature_schema(pd.DataFrame([item.model_dump() for item in batch]), schema)
+
+            def after():
+                return layout.fill(batch)
+
+            before_us = median_us(before, args.repeat)
+            after_us = median_us(after, args.repeat)
+            print(
+                f"{schema['categorical_encoding']:<10}{n_rows:>6}{before_us:>15.1f}"
+                f"{after_us:>12.1f}{before_us / after_us:>9.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
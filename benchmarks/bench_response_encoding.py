@@ -0,0 +1,76 @@
+"""
+Encode time and size of a /predict-batch response: FastAPI's default
+encoding of BatchPredictionOutput against the negotiated JSON (orjson),
+MessagePack and raw float32 bodies, each also with gzip and zstd as
+CompressionMiddleware applies them.
+
+    python benchmarks/bench_response_encoding.py [--rows 1000 100000 1000000]
+"""
+import time
+import argparse
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.models.batch_prediction_output import BatchPredictionOutput
+from app.utils.transport import encode_response, _compressor, JSON, MSGPACK, FLOAT32
+
+
+def default_response(predictions):
+    output = BatchPredictionOutput(predictions=predictions.tolist(), model_name="Model", model_version="1")
+    return JSONResponse(jsonable_encoder(output)).body
+
+
+def negotiated_response(media_type):
+    def encode(predictions):
+        return encode_response(media_type, {
+            "predictions": predictions, "model_name": "Model", "model_version": "1"
+        }).body
+    return encode
+
+
+def compress(encoding):
+    def run(body):
+        compress_chunk, finish = _compressor(encoding)
+        return compress_chunk(body) + finish()
+    return run
+
+
+def best_of(fn, arg, repeat=3):
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = fn(arg)
+        times.append(time.perf_counter() - t)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 100000, 1000000])
+    args = parser.parse_args()
+
+    formats = [
+        ("default", default_response),
+        ("orjson", negotiated_response(JSON)),
+        ("msgpack", negotiated_response(MSGPACK)),
+        ("float32", negotiated_response(FLOAT32)),
+    ]
+    print(f"{'rows':>8}{'format':>10}{'encoding':>10}{'KB':>10}{'ms':>10}")
+    for n_rows in args.rows:
+        predictions = np.random.default_rng(0).gamma(2.0, 3.0, n_rows)
+        for name, encode in formats:
+            encode_s, body = best_of(encode, predictions)
+            print(f"{n_rows:>8}{name:>10}{'identity':>10}{len(body) / 1024:>10.1f}{encode_s * 1000:>10.1f}")
+            if name == "default":
+                continue
+            for encoding in ("gzip", "zstd"):
+                compress_s, compressed = best_of(compress(encoding), body)
+                print(
+                    f"{n_rows:>8}{name:>10}{encoding:>10}{len(compressed) / 1024:>10.1f}"
+                    f"{(encode_s + compress_s) * 1000:>10.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import os
+import json
+import tempfile
+import mlflow
+import mlflow.sklearn
+
+NATIVE_ARTIFACT_PATH = "native_model"
+MANIFEST_FILE = "native_model.json"
+
+# File name and library of the native format of each trained model
+NATIVE_FORMATS = {
+    "lgbm": ("lightgbm", "model.txt"),
+    "xgboost": ("xgboost", "model.ubj"),
+    "catboost": ("catboost", "model.cbm"),
+}
+
+
+def save_native_model(model, model_name, feature_schema, out_dir):
+    """
+    Write the booster in its own library format plus the feature schema and
+    a small manifest, so serving can load it without sklearn/mlflow pickles.
+    """
+    if model_name == "ensemble":
+        return save_native_ensemble(model, feature_schema, out_dir)
+    if model_name not in NATIVE_FORMATS:
+        raise ValueError(f"Unknown model: {model_name}")
+    library, file_name = NATIVE_FORMATS[model_name]
+    model_path = os.path.join(out_dir, file_name)
+
+    if model_name == "lgbm":
+        model.booster_.save_model(model_path)
+    elif model_name == "xgboost":
+        booster = model.get_booster()
+        # sklearn predict stops at the early-stopping best iteration, a raw
+        # Booster uses every tree, so only the trees up to it are written
+        best_iteration = getattr(model, "best_iteration", None)
+        if best_iteration is not None:
+            booster = booster[: best_iteration + 1]
+        booster.save_model(model_path)
+    else:
+        model.save_model(model_path, format="cbm")
+
+    with open(os.path.join(out_dir, "feature_schema.json"), "w") as f:
+        json.dump(feature_schema, f)
+    with open(os.path.join(out_dir, MANIFEST_FILE), "w") as f:
+        json.dump({"library": library, "model_file": file_name, "model_name": model_name}, f)
+    return model_path
+
+
+def save_native_ensemble(ensemble, feature_schema, out_dir):
+    """
+    Each member of an EnsembleRegressor in its own subdirectory, plus a
+    manifest listing the members and their weights. Returns `out_dir`.
+    """
+    members = []
+    for name, model in ensemble.models.items():
+        member_dir = os.path.join(out_dir, name)
+        os.makedirs(member_dir, exist_ok=True)
+        save_native_model(model, name, ensemble.feature_schemas[name], member_dir)
+        members.append({"model_dir": name, "model_name": name, "weight": ensemble.weights[name]})
+
+    with open(os.path.join(out_dir, "feature_schema.json"), "w") as f:
+        json.dump(feature_schema, f)
+    with open(os.path.join(out_dir, MANIFEST_FILE), "w") as f:
+        json.dump({"library": "ensemble", "model_name": "ensemble", "members": members}, f)
+    return out_dir
+
+
+def log_native_model(run, model, model_name, feature_schema):
+    """Native booster files of `model` as artifacts of the DeferredRun `run`."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        save_native_model(model, model_name, feature_schema, tmp_dir)
+        run.log_artifacts(tmp_dir, artifact_path=NATIVE_ARTIFACT_PATH)
+
+
+def log_sklearn_model(run, model, artifact_path="model"):
+    """
+    The sklearn flavor of `model`, saved locally and logged as artifacts of
+    the DeferredRun `run`, as mlflow.sklearn.log_model would upload it.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_dir = os.path.join(tmp_dir, artifact_path)
+        mlflow.sklearn.save_model(model, model_dir)
+        run.log_artifacts(model_dir, artifact_path=artifact_path)
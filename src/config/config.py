@@ -8,4 +8,32 @@ common_params = {
     }
 MLFLOW_TRACKING_URI_PORT = os.getenv("MLFLOW_TRACKING_URI_PORT")
 MLFLOW_EXPERIMENT_NAME = os.getenv("MLFLOW_EXPERIMENT_NAME")
+# Metrics/params that could not reach the tracking server wait here for replay
+MLFLOW_SPOOL_DIR = os.getenv("MLFLOW_SPOOL_DIR", "mlflow_spool")
 
+# Label-encoded id columns that must be split as categories, not ordinals
+CATEGORICAL_FEATURES = [
+    "item_id",
+    "dept_id",
+    "cat_id",
+    "store_id",
+    "state_id",
+    "event_name_1",
+    "event_type_1",
+    "event_name_2",
+    "event_type_2",
+]
+
+# Metric used to pick the model registered as BestRegressionModel (lower is better):
+# "wrmsse" (M5 competition metric) or "combined_metric"
+SELECTION_METRIC = os.getenv("SELECTION_METRIC", "wrmsse")
+
+# Content-addressed outputs of the training pipeline stages (kept next to the data volume)
+PIPELINE_CACHE_DIR = os.getenv("PIPELINE_CACHE_DIR", "data/.pipeline_cache")
+
+# How serving cost weighs in when picking BestRegressionModel:
+# "metric" (ignore latency), "latency_cap" (best metric under SELECTION_MAX_LATENCY_MS
+# single-row p99) or "tradeoff" (metric + SELECTION_LATENCY_WEIGHT * p99 ms)
+SELECTION_POLICY = os.getenv("SELECTION_POLICY", "metric")
+SELECTION_MAX_LATENCY_MS = float(os.getenv("SELECTION_MAX_LATENCY_MS", "5.0"))
+SELECTION_LATENCY_WEIGHT = float(os.getenv("SELECTION_LATENCY_WEIGHT", "0.01"))
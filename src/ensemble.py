@@ -0,0 +1,68 @@
+import numpy as np
+from scipy.optimize import minimize
+from src.preprocessing import split_train_test, prepare_features, to_model_input
+
+ENSEMBLE_NAME = "ensemble"
+
+
+def fit_ensemble_weights(predictions, y):
+    """
+    Non-negative weights summing to one that minimize the squared error of
+    the weighted sum of `predictions` (model name -> validation predictions)
+    against `y`. Only the small Gram matrix of the predictions is optimized,
+    whatever the number of rows.
+    """
+    names = list(predictions)
+    P = np.column_stack([np.asarray(predictions[name], dtype=np.float64).ravel() for name in names])
+    y = np.asarray(y, dtype=np.float64).ravel()
+    gram = P.T @ P
+    cross = P.T @ y
+    # Relative scale keeps the optimizer's tolerances meaningful for any target size
+    scale = max(float(np.abs(gram).max()), 1e-12)
+
+    result = minimize(
+        lambda w: (w @ gram @ w - 2 * cross @ w) / scale,
+        np.full(len(names), 1 / len(names)),
+        jac=lambda w: (2 * gram @ w - 2 * cross) / scale,
+        bounds=[(0.0, 1.0)] * len(names),
+        constraints=[{"type": "eq", "fun": lambda w: w.sum() - 1.0, "jac": lambda w: np.ones_like(w)}],
+        method="SLSQP"
+    )
+    weights = np.clip(result.x, 0.0, None)
+    weights /= weights.sum()
+    return {name: float(w) for name, w in zip(names, weights)}
+
+
+def holdout_split(X_train, y_train, train_fraction=0.8):
+    """
+    Head and tail of the training period by day, as X_head, X_tail, y_head,
+    y_tail. The ensemble weights are fit on the tail, so the validation
+    period stays unseen until the ensemble is scored with the other models.
+    """
+    df_head, df_tail = split_train_test(X_train.assign(sold=np.asarray(y_train)), train_fraction)
+    return prepare_features(df_head, df_tail)
+
+
+class EnsembleRegressor:
+    """
+    Weighted sum of trained models. Takes the raw features and gives each
+    member its own model input (categoricals encoded or not, per its
+    feature schema).
+    """
+
+    def __init__(self, models, weights, feature_schemas):
+        self.models = dict(models)
+        self.weights = dict(weights)
+        self.feature_schemas = dict(feature_schemas)
+
+    def member_predictions(self, X):
+        return {
+            name: np.asarray(model.predict(
+                to_model_input(name, X, self.feature_schemas[name]["category_levels"])
+            ), dtype=np.float64).ravel()
+            for name, model in self.models.items()
+        }
+
+    def predict(self, X):
+        predictions = self.member_predictions(X)
+        return sum(self.weights[name] * predictions[name] for name in self.models)
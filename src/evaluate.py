@@ -1,17 +1,174 @@
 import numpy as np
-from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
-
-def evaluate_model(model, X_valid, y_valid):
-    y_pred = model.predict(X_valid)
-
-    rmse = np.sqrt(mean_squared_error(y_valid, y_pred))
-    mse = mean_squared_error(y_valid, y_pred)
-    mae = mean_absolute_error(y_valid, y_pred)
-    r2 = r2_score(y_valid, y_pred)
-
-    return {
-        "rmse": rmse,
-        "mse": mse,
-        "mae": mae,
-        "r2": r2
-    }
\ No newline at end of file
+
+# Weights of the model selection score (lower is better)
+COMBINED_METRIC_WEIGHTS = {
+    "rmse": 0.4,
+    "mae": 0.3,
+    "mse": 0.2,
+    "r2": 0.1
+}
+
+
+def combined_metric(metrics):
+    return (
+        COMBINED_METRIC_WEIGHTS["rmse"] * metrics["rmse"] +
+        COMBINED_METRIC_WEIGHTS["mae"] * metrics["mae"] +
+        COMBINED_METRIC_WEIGHTS["mse"] * metrics["mse"] +
+        COMBINED_METRIC_WEIGHTS["r2"] * (1 - metrics["r2"])
+    )
+
+
+def _pad(values, size):
+    if len(values) >= size:
+        return values
+    return np.concatenate([values, np.zeros(size - len(values))])
+
+
+class MetricAccumulator:
+    """
+    Sufficient statistics for MSE/RMSE/MAE/R2 gathered in a single pass.
+
+    Chunks can be fed one at a time with `update`, and accumulators built on
+    other chunks or in other processes (they pickle as plain numpy state)
+    are combined with `merge`. The target variance uses the pairwise update
+    of Chan et al. so merging stays numerically stable.
+    """
+
+    def __init__(self, wrmsse=None):
+        # Optional WRMSSEAccumulator fed with the same chunks
+        self.wrmsse = wrmsse
+        self.n = 0
+        self.sse = 0.0
+        self.sae = 0.0
+        self.y_mean = 0.0
+        self.y_m2 = 0.0
+        # Per-group sums indexed by integer code (e.g. store_id)
+        self.group_n = np.zeros(0)
+        self.group_sse = np.zeros(0)
+        self.group_sae = np.zeros(0)
+        # Rows without a group (e.g. a store_id unseen in training), left out of the breakdown
+        self.ungrouped_n = 0
+
+    def update(self, y_true, y_pred, group_codes=None, X=None):
+        y_true = np.asarray(y_true, dtype=np.float64).ravel()
+        y_pred = np.asarray(y_pred, dtype=np.float64).ravel()
+        if y_true.shape != y_pred.shape:
+            raise ValueError(
+                f"y_true and y_pred lengths differ: {len(y_true)} != {len(y_pred)}"
+            )
+        n = len(y_true)
+        if n == 0:
+            return self
+        if self.wrmsse is not None:
+            if X is None:
+                raise ValueError("X is required to key WRMSSE errors by series and day")
+            self.wrmsse.update(X, y_true, y_pred)
+
+        err = y_pred - y_true
+        sq_err = err * err
+        abs_err = np.abs(err)
+
+        chunk_mean = y_true.mean()
+        chunk_m2 = float(np.dot(y_true - chunk_mean, y_true - chunk_mean))
+        self._merge_moments(n, float(sq_err.sum()), float(abs_err.sum()), chunk_mean, chunk_m2)
+
+        if group_codes is not None:
+            codes = np.asarray(group_codes, dtype=np.float64).ravel()
+            if codes.shape != y_true.shape:
+                raise ValueError("group_codes must have one code per row")
+            # Missing codes (NaN) would turn into arbitrary indices once cast
+            grouped = ~np.isnan(codes)
+            codes = codes[grouped]
+            if len(codes) and (codes.min() < 0 or (codes != np.floor(codes)).any()):
+                raise ValueError("group_codes must be non-negative integers")
+            self.ungrouped_n += int(n - len(codes))
+            codes = codes.astype(np.intp)
+            size = max(len(self.group_n), int(codes.max()) + 1 if len(codes) else 0)
+            self._resize_groups(size)
+            self.group_n += np.bincount(codes, minlength=size)
+            self.group_sse += np.bincount(codes, weights=sq_err[grouped], minlength=size)
+            self.group_sae += np.bincount(codes, weights=abs_err[grouped], minlength=size)
+        return self
+
+    def merge(self, other):
+        if self.wrmsse is not None and other.wrmsse is not None:
+            self.wrmsse.merge(other.wrmsse)
+        if other.n:
+            self._merge_moments(other.n, other.sse, other.sae, other.y_mean, other.y_m2)
+        self.ungrouped_n += other.ungrouped_n
+        size = max(len(self.group_n), len(other.group_n))
+        self._resize_groups(size)
+        self.group_n += _pad(other.group_n, size)
+        self.group_sse += _pad(other.group_sse, size)
+        self.group_sae += _pad(other.group_sae, size)
+        return self
+
+    def _merge_moments(self, n, sse, sae, y_mean, y_m2):
+        total = self.n + n
+        delta = y_mean - self.y_mean
+        self.y_m2 += y_m2 + delta * delta * self.n * n / total
+        self.y_mean += delta * n / total
+        self.n = total
+        self.sse += sse
+        self.sae += sae
+
+    def _resize_groups(self, size):
+        self.group_n = _pad(self.group_n, size)
+        self.group_sse = _pad(self.group_sse, size)
+        self.group_sae = _pad(self.group_sae, size)
+
+    def result(self):
+        if self.n == 0:
+            raise ValueError("No predictions accumulated")
+        mse = self.sse / self.n
+        if self.y_m2 > 0:
+            r2 = 1.0 - self.sse / self.y_m2
+        else:
+            # Same convention as sklearn for a constant target
+            r2 = 1.0 if self.sse == 0 else 0.0
+        metrics = {
+            "rmse": float(np.sqrt(mse)),
+            "mse": float(mse),
+            "mae": float(self.sae / self.n),
+            "r2": float(r2)
+        }
+        if self.wrmsse is not None:
+            metrics["wrmsse"] = self.wrmsse.result()
+        return metrics
+
+    def group_result(self):
+        """Per-group metrics as arrays indexed by group code (NaN if empty)."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mse = self.group_sse / self.group_n
+            mae = self.group_sae / self.group_n
+        return {
+            "count": self.group_n.astype(np.int64),
+            "rmse": np.sqrt(mse),
+            "mse": mse,
+            "mae": mae
+        }
+
+
+def accumulate_predictions(model, X_valid, y_valid, group_col=None, chunk_size=None, wrmsse=None):
+    """
+    Predict and accumulate metrics chunk by chunk so the full prediction
+    vector never has to be held in memory at once. Pass a WRMSSEEvaluator
+    as `wrmsse` to score the hierarchy in the same pass.
+    """
+    accumulator = MetricAccumulator(wrmsse.accumulator() if wrmsse is not None else None)
+    n_rows = len(X_valid)
+    step = chunk_size or n_rows or 1
+    y_valid = np.asarray(y_valid)
+    for start in range(0, n_rows, step):
+        X_chunk = X_valid[start:start + step]
+        groups = None
+        if group_col is not None:
+            groups = np.asarray(X_chunk[group_col])
+        accumulator.update(y_valid[start:start + step], model.predict(X_chunk), groups, X_chunk)
+    return accumulator
+
+
+def evaluate_model(model, X_valid, y_valid, chunk_size=None, wrmsse=None):
+    return accumulate_predictions(
+        model, X_valid, y_valid, chunk_size=chunk_size, wrmsse=wrmsse
+    ).result()
@@ -0,0 +1,55 @@
+"""
+The M5 sales hierarchy, shared by training (WRMSSE) and serving
+(reconciliation). Only NumPy, pandas and SciPy are imported, so the
+backend image copies this module without the rest of the training code.
+"""
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+HIERARCHY_COLS = ["item_id", "dept_id", "cat_id", "store_id", "state_id"]
+SERIES_KEYS = ["item_id", "store_id"]
+
+# The 12 aggregation levels of the M5 competition, top to bottom, as grouping
+# columns of the bottom (item, store) series. An empty tuple is the grand
+# total; the last level is the bottom series themselves.
+M5_LEVELS = [
+    (),
+    ("state_id",),
+    ("store_id",),
+    ("cat_id",),
+    ("dept_id",),
+    ("state_id", "cat_id"),
+    ("state_id", "dept_id"),
+    ("store_id", "cat_id"),
+    ("store_id", "dept_id"),
+    ("item_id",),
+    ("item_id", "state_id"),
+    ("item_id", "store_id"),
+]
+
+
+def level_blocks(series, levels=M5_LEVELS):
+    """
+    Per level, the sparse 0/1 matrix mapping bottom series (columns) to the
+    level's aggregate series (rows) and the key values of each row.
+    """
+    n_series = len(series)
+    cols = np.arange(n_series)
+    blocks = []
+    for level in levels:
+        if level:
+            rows, uniques = pd.MultiIndex.from_frame(series[list(level)]).factorize()
+            keys = [tuple(int(v) for v in u) for u in uniques]
+        else:
+            rows, keys = np.zeros(n_series, dtype=np.int64), [()]
+        blocks.append((
+            sparse.csr_matrix((np.ones(n_series), (rows, cols)), shape=(len(keys), n_series)),
+            keys
+        ))
+    return blocks
+
+
+def build_summing_matrix(series, levels=M5_LEVELS):
+    """Sparse summing matrix of `series`, one CSR block per level."""
+    return [block for block, _ in level_blocks(series, levels)]
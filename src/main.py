@@ -1,91 +1,279 @@
 import os
 from src.utils import load_data , get_latest_data_file
-from src.preprocessing import split_train_test, prepare_features
+from src.preprocessing import split_train_test, prepare_features, fit_category_levels, to_model_input, build_feature_schema
 from src.train.trainer import train
-from src.evaluate import evaluate_model
-from src.config.config import common_params , MLFLOW_TRACKING_URI_PORT , MLFLOW_EXPERIMENT_NAME
+from src.evaluate import accumulate_predictions, combined_metric
+from src.wrmsse import WRMSSEEvaluator
+from src.config.config import common_params , MLFLOW_TRACKING_URI_PORT , MLFLOW_EXPERIMENT_NAME , SELECTION_METRIC , MLFLOW_SPOOL_DIR , PIPELINE_CACHE_DIR
+from src.config.config import SELECTION_POLICY , SELECTION_MAX_LATENCY_MS , SELECTION_LATENCY_WEIGHT
+from src.tracking import BatchLogger
+from src.artifacts import log_native_model, log_sklearn_model
+from src.pipeline import StageCache, data_fingerprint, code_fingerprint
+from src.selection import profile_model, select_model
+from src.ensemble import ENSEMBLE_NAME, EnsembleRegressor, fit_ensemble_weights, holdout_split
+import src.utils
+import src.config.config
+import src.preprocessing
+import src.evaluate
+import src.wrmsse
+import src.artifacts
+import src.tracking
+import src.selection
+import src.ensemble
+import src.train.trainer
+import src.train.lgbm
+import src.train.catboost
+import src.train.xgboost
+import sys
 import json
 from datetime import datetime
 import mlflow
-import mlflow.sklearn
+
+MODEL_NAMES = ["lgbm", "catboost", "xgboost"]
+# Trained models plus their weighted ensemble compete for registration
+CANDIDATE_NAMES = MODEL_NAMES + [ENSEMBLE_NAME]
+TRAINER_MODULES = {
+    "lgbm": src.train.lgbm,
+    "catboost": src.train.catboost,
+    "xgboost": src.train.xgboost,
+}
 
 
 def main():
+    # Only sets the URI: runs, artifacts and registrations are spooled and
+    # sent by the tracker in the background, so training never contacts the server
     mlflow.set_tracking_uri(MLFLOW_TRACKING_URI_PORT)
-    mlflow.set_experiment(MLFLOW_EXPERIMENT_NAME)
+    # Started before the pipeline, so runs spooled by earlier trainings are
+    # replayed even when every stage below is cached
+    tracker = BatchLogger(spool_dir=MLFLOW_SPOOL_DIR)
     try:
         data_path = get_latest_data_file(data_dir="data")
         print(f"--- Processing latest data file: {data_path} ---")
-        df = load_data(data_path)
+        data_md5 = data_fingerprint(data_path)
     except Exception as e:
         print(f"Error loading data: {e}")
-        return 
+        tracker.close()
+        return
    # df = load_data("data/CA_1_0.pkl")
-    df_train, df_valid = split_train_test(df)
-    X_train, X_valid, y_train, y_valid = prepare_features(df_train, df_valid)
-    
-    # Track best model
-    best_score = float('inf')  # Lower is better for combined metric
-    best_run_id = None
-    best_model_name = None
-    
-    for model_name in ["lgbm", "catboost", "xgboost"]:
-        with mlflow.start_run(run_name=model_name) as run:
-            model = train(
+
+    # Stage keys only depend on upstream keys, so the whole pipeline is keyed
+    # before anything runs and unchanged stages are never executed
+    cache = StageCache(PIPELINE_CACHE_DIR)
+    # The config module declares CATEGORICAL_FEATURES, which every later stage depends on
+    features_key = cache.key(
+        "features",
+        code_fingerprint(src.utils, src.config.config, src.preprocessing, src.wrmsse),
+        params={"data_md5": data_md5}
+    )
+    train_keys = {
+        model_name: cache.key(
+            "train",
+            code_fingerprint(src.train.trainer, TRAINER_MODULES[model_name]),
+            params={"model_name": model_name, **common_params},
+            inputs=[features_key]
+        )
+        for model_name in MODEL_NAMES
+    }
+    # The weights come from members refit on the head of the training period
+    ensemble_key = cache.key(
+        "ensemble",
+        code_fingerprint(src.ensemble, src.preprocessing, src.train.trainer, *TRAINER_MODULES.values()),
+        params=common_params,
+        inputs=[features_key]
+    )
+    model_keys = {**train_keys, ENSEMBLE_NAME: ensemble_key}
+    evaluate_keys = {
+        model_name: cache.key(
+            "evaluate",
+            code_fingerprint(src.evaluate, src.wrmsse),
+            inputs=[features_key, model_keys[model_name]]
+        )
+        for model_name in CANDIDATE_NAMES
+    }
+    profile_keys = {
+        model_name: cache.key(
+            "profile",
+            code_fingerprint(src.selection, src.artifacts),
+            inputs=[features_key, model_keys[model_name]]
+        )
+        for model_name in CANDIDATE_NAMES
+    }
+    register_key = cache.key(
+        "register",
+        code_fingerprint(sys.modules[__name__], src.artifacts, src.tracking, src.selection),
+        params={
+            "tracking_uri": MLFLOW_TRACKING_URI_PORT,
+            "experiment": MLFLOW_EXPERIMENT_NAME,
+            "selection_metric": SELECTION_METRIC,
+            "selection_policy": SELECTION_POLICY,
+            "max_latency_ms": SELECTION_MAX_LATENCY_MS,
+            "latency_weight": SELECTION_LATENCY_WEIGHT
+        },
+        inputs=list(evaluate_keys.values()) + list(profile_keys.values())
+    )
+
+    def features():
+        def compute():
+            # Split and features in one stage, so the data is pickled once
+            df_train, df_valid = split_train_test(load_data(data_path))
+            X_train, X_valid, y_train, y_valid = prepare_features(df_train, df_valid)
+            return {
+                "X_train": X_train,
+                "X_valid": X_valid,
+                "y_train": y_train,
+                "y_valid": y_valid,
+                "category_levels": fit_category_levels(X_train),
+                # Summing matrix, scales and weights are built once and shared by all models
+                "wrmsse": WRMSSEEvaluator(df_train)
+            }
+        return cache.run("features", features_key, compute)
+
+    def trained(model_name):
+        def compute():
+            f = features()
+            return train(
                 model_name,
-                X_train, y_train,
-                X_valid, y_valid,
+                to_model_input(model_name, f["X_train"], f["category_levels"]), f["y_train"],
+                to_model_input(model_name, f["X_valid"], f["category_levels"]), f["y_valid"],
                 common_params
             )
-            
-            metrics = evaluate_model(model, X_valid, y_valid)
-            
-            # Calculate combined metric (weighted average)
-            combined_metric = (
-                0.4 * metrics["rmse"] + 
-                0.3 * metrics["mae"] + 
-                0.2 * metrics["mse"] + 
-                0.1 * (1 - metrics["r2"])
+        return cache.run("train", train_keys[model_name], compute)
+
+    def ensemble_weights():
+        def compute():
+            f = features()
+            # Members refit on the training period without its last days predict
+            # those days, and the weights are fit there: fitting them on the
+            # validation split would score the ensemble on the rows it was fit on
+            X_head, X_tail, y_head, y_tail = holdout_split(f["X_train"], f["y_train"])
+            members = EnsembleRegressor(
+                {
+                    model_name: train(
+                        model_name,
+                        to_model_input(model_name, X_head, f["category_levels"]), y_head,
+                        to_model_input(model_name, X_tail, f["category_levels"]), y_tail,
+                        common_params
+                    )
+                    for model_name in MODEL_NAMES
+                },
+                {},
+                {
+                    model_name: build_feature_schema(model_name, f["X_train"], f["category_levels"])
+                    for model_name in MODEL_NAMES
+                }
+            )
+            return fit_ensemble_weights(members.member_predictions(X_tail), y_tail)
+        return cache.run("ensemble", ensemble_key, compute)
+
+    def model(model_name):
+        # Only the weights are cached for the ensemble, its members are the trained models
+        if model_name != ENSEMBLE_NAME:
+            return trained(model_name)
+        return EnsembleRegressor(
+            {name: trained(name) for name in MODEL_NAMES},
+            ensemble_weights(),
+            {name: evaluated(name)["feature_schema"] for name in MODEL_NAMES}
+        )
+
+    def evaluated(model_name):
+        def compute():
+            f = features()
+            # Single pass over the validation predictions, broken down per store
+            accumulator = accumulate_predictions(
+                model(model_name),
+                to_model_input(model_name, f["X_valid"], f["category_levels"]),
+                f["y_valid"],
+                group_col="store_id",
+                wrmsse=f["wrmsse"]
             )
-            
-            # Add combined metric to metrics dict
-            metrics["combined_metric"] = combined_metric
-            
-            # Log all metrics
-            for k, v in metrics.items():
-                mlflow.log_metric(k, v)
-            
-            # Log parameters
-            mlflow.log_param("model_name", model_name)
-            for k, v in common_params.items():
-                mlflow.log_param(k, v)
-            
-            # Log model to current run
-            mlflow.sklearn.log_model(
-                model,
-                artifact_path="model"
+            metrics = accumulator.result()
+
+            # Calculate combined metric (weighted average)
+            metrics["combined_metric"] = combined_metric(metrics)
+            return {
+                "metrics": metrics,
+                "per_store": {k: v.tolist() for k, v in accumulator.group_result().items()},
+                # Serving needs the same categorical declaration and codes
+                "feature_schema": build_feature_schema(model_name, f["X_train"], f["category_levels"])
+            }
+        return cache.run("evaluate", evaluate_keys[model_name], compute)
+
+    def profiled(model_name):
+        def compute():
+            f = features()
+            # Serving cost measured on the validation rows the model was scored on
+            return profile_model(
+                model(model_name),
+                model_name,
+                to_model_input(model_name, f["X_valid"], f["category_levels"]),
+                evaluated(model_name)["feature_schema"]
             )
-            
-            print(f"{model_name} - Combined Metric: {combined_metric:.4f}")
-            
-            # Track best model
-            if combined_metric < best_score:
-                best_score = combined_metric
-                best_run_id = run.info.run_id
-                best_model_name = model_name
-    
+        return cache.run("profile", profile_keys[model_name], compute)
+
+    def register():
+        candidates = {
+            model_name: {"metrics": evaluated(model_name)["metrics"], "profile": profiled(model_name)}
+            for model_name in CANDIDATE_NAMES
+        }
+        best_model_name = select_model(
+            candidates,
+            SELECTION_METRIC,
+            policy=SELECTION_POLICY,
+            max_latency_ms=SELECTION_MAX_LATENCY_MS,
+            latency_weight=SELECTION_LATENCY_WEIGHT
+        )
+        best_score = candidates[best_model_name]["metrics"][SELECTION_METRIC]
+        best_run = None
+
+        for model_name in CANDIDATE_NAMES:
+            evaluation = evaluated(model_name)
+            candidate = model(model_name)
+            metrics = evaluation["metrics"]
+            profile = candidates[model_name]["profile"]
+            params = {"model_name": model_name, **common_params}
+            if model_name == ENSEMBLE_NAME:
+                params.update({f"weight_{name}": weight for name, weight in candidate.weights.items()})
+
+            # Recorded locally; the run is created on the server in the background
+            with tracker.start_run(MLFLOW_EXPERIMENT_NAME, model_name) as run:
+                run.log_metrics({**metrics, **profile})
+                run.log_params(params)
+                run.set_tags({
+                    "data_md5": data_md5,
+                    "pipeline.train_key": model_keys[model_name]
+                })
+
+                log_sklearn_model(run, candidate, "model")
+                run.log_dict(evaluation["feature_schema"], "feature_schema.json")
+                # Native booster file for fast loading without the training stack
+                log_native_model(run, candidate, model_name, evaluation["feature_schema"])
+                run.log_dict(evaluation["per_store"], "per_store_metrics.json")
+
+                print(
+                    f"{model_name} - {SELECTION_METRIC}: {metrics[SELECTION_METRIC]:.4f}, "
+                    f"p99 single-row: {profile['latency_single_p99_ms']:.2f} ms"
+                )
+
+                if model_name == best_model_name:
+                    run.register_model("model", "BestRegressionModel")
+                    best_run = run.local_id
+
+        return {
+            "best_model_name": best_model_name,
+            "best_score": best_score,
+            "best_run": best_run
+        }
+
     # Register only the best model to Model Registry
-    print(f"\nBest Model: {best_model_name}")
-    print(f"Best Combined Metric: {best_score:.4f}")
-    print(f"Best Run ID: {best_run_id}")
-    
-    model_uri = f"runs:/{best_run_id}/model"
-    mlflow.register_model(
-        model_uri=model_uri,
-        name="BestRegressionModel"
-    )
-    
-    print(f"Best model registered to Model Registry as 'BestRegressionModel'")
+    best = cache.run("register", register_key, register)
+    print(f"\nBest Model: {best['best_model_name']}")
+    print(f"Best {SELECTION_METRIC}: {best['best_score']:.4f}")
+    print(f"Best run (spooled as): {best['best_run']}")
+    print(f"Selection policy: {SELECTION_POLICY}")
+
+    # Anything the server did not take yet stays spooled for the next run
+    tracker.close()
+    print(f"Best model queued for registration as 'BestRegressionModel'")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,86 @@
+import os
+import re
+import json
+import pickle as pkl
+import hashlib
+import inspect
+
+
+def data_fingerprint(data_path):
+    """
+    md5 of the data file as recorded by DVC in `<data_path>.dvc`, so the
+    375 MB pickle does not have to be read to know whether it changed.
+    Files that are not tracked by DVC are hashed directly.
+    """
+    dvc_path = data_path + ".dvc"
+    if os.path.exists(dvc_path):
+        with open(dvc_path) as f:
+            match = re.search(r"md5:\s*([0-9a-f]{32})", f.read())
+        if match:
+            return match.group(1)
+
+    md5 = hashlib.md5()
+    with open(data_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            md5.update(block)
+    return md5.hexdigest()
+
+
+def code_fingerprint(*modules):
+    """Hash of the source of the modules a stage runs."""
+    sha = hashlib.sha256()
+    for module in modules:
+        sha.update(inspect.getsource(module).encode())
+    return sha.hexdigest()
+
+
+class StageCache:
+    """
+    Content-addressed store of pipeline stage outputs.
+
+    A stage key is the hash of the stage name, its code fingerprint, its
+    params and the keys of the stages it consumes, so keys can be computed
+    for the whole pipeline before anything runs. A stage whose key is
+    already on disk is skipped and its output loaded instead; upstream
+    stages are only computed when something downstream actually misses.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self._memory = {}
+
+    def key(self, stage, code="", params=None, inputs=()):
+        payload = json.dumps(
+            {"stage": stage, "code": code, "params": params, "inputs": list(inputs)},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, stage, key):
+        return os.path.join(self.cache_dir, stage, f"{key}.pkl")
+
+    def has(self, stage, key):
+        return (stage, key) in self._memory or os.path.exists(self._path(stage, key))
+
+    def run(self, stage, key, compute):
+        if (stage, key) in self._memory:
+            return self._memory[(stage, key)]
+
+        path = self._path(stage, key)
+        if os.path.exists(path):
+            print(f"[cache] {stage} {key[:12]} hit, skipping")
+            with open(path, "rb") as f:
+                value = pkl.load(f)
+        else:
+            print(f"[cache] {stage} {key[:12]} miss, running")
+            value = compute()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so an interrupted run never leaves a partial entry
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                pkl.dump(value, f, protocol=pkl.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+
+        self._memory[(stage, key)] = value
+        return value
@@ -1,16 +1,66 @@
+import numpy as np
 import pandas as pd 
 import pickle as pkl 
+from src.config.config import CATEGORICAL_FEATURES
 
-def split_train_test(dataframe):
-    split_idx = int(len(dataframe) * 0.8)
-    df_train_split = dataframe[:split_idx]  
-    df_valid = dataframe[split_idx:]        
-    df_train = df_train_split
-    return df_train, df_valid
+def split_train_test(dataframe, train_fraction=0.8):
+    """
+    Train on about the first `train_fraction` of the rows by day and
+    validate on the rest. The split is on `d`, so no day is in both and
+    every validation day comes after the training period.
+    """
+    days = np.sort(dataframe["d"].to_numpy())
+    if len(days) == 0 or days[0] == days[-1]:
+        raise ValueError("At least two days are needed to split training and validation")
+    # The day at the row boundary starts validation, unless it is the first day
+    boundary = max(days[int(len(days) * train_fraction)], np.unique(days)[1])
+    in_train = (dataframe["d"] < boundary).to_numpy()
+    return dataframe[in_train], dataframe[~in_train]
 
 def prepare_features(df_train, df_valid):
     y_train = df_train['sold']
     y_valid = df_valid['sold']
     X_train = df_train.drop('sold', axis=1)
     X_valid = df_valid.drop('sold', axis=1)
-    return X_train, X_valid, y_train, y_valid
\ No newline at end of file
+    return X_train, X_valid, y_train, y_valid
+
+def get_categorical_features(X):
+    return [col for col in CATEGORICAL_FEATURES if col in X.columns]
+
+def fit_category_levels(X_train):
+    """Sorted levels seen in training for every declared categorical column."""
+    return {
+        col: sorted(int(v) for v in pd.unique(X_train[col].dropna()))
+        for col in get_categorical_features(X_train)
+    }
+
+def encode_categoricals(X, category_levels):
+    """
+    Cast categorical columns to pandas categoricals over the training levels,
+    so the category codes are identical at train and serve time. Unseen
+    values become missing.
+    """
+    X = X.copy()
+    for col, levels in category_levels.items():
+        if col in X.columns:
+            X[col] = pd.Categorical(X[col].where(X[col].isin(levels)), categories=levels)
+    return X
+
+# Models fed the raw integer values of the categorical columns
+RAW_CATEGORICAL_MODELS = ("catboost", "ensemble")
+
+def to_model_input(model_name, X, category_levels):
+    # CatBoost hashes raw integer values itself and rejects missing categories;
+    # the ensemble encodes the input of each of its members itself
+    if model_name in RAW_CATEGORICAL_MODELS:
+        return X
+    return encode_categoricals(X, category_levels)
+
+def build_feature_schema(model_name, X_train, category_levels):
+    return {
+        "model_name": model_name,
+        "features": list(X_train.columns),
+        "categorical_features": get_categorical_features(X_train),
+        "categorical_encoding": "raw" if model_name in RAW_CATEGORICAL_MODELS else "category",
+        "category_levels": category_levels,
+    }
@@ -0,0 +1,106 @@
+import os
+import time
+import pickle as pkl
+import tempfile
+import numpy as np
+from src.artifacts import save_native_model
+
+SELECTION_POLICIES = ("metric", "latency_cap", "tradeoff")
+
+
+def _rss_mb():
+    # Resident set size on Linux; None elsewhere
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _artifact_size(path):
+    # A model file, or the directory of all members of an ensemble
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def _timings_ms(fn, repeat):
+    timings = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings[i] = (time.perf_counter() - start) * 1000
+    return timings
+
+
+def profile_model(model, model_name, X_valid, feature_schema, n_single=200, batch_rows=10000, seed=42):
+    """
+    Serving cost of a candidate on validation rows: single-row and
+    `batch_rows`-row predict latency, serialized sizes and the memory the
+    model takes once unpickled.
+    """
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(X_valid), size=n_single)
+    singles = [X_valid.iloc[[i]] for i in rows]
+    batch_idx = np.resize(np.arange(len(X_valid)), batch_rows)
+    batch = X_valid.iloc[batch_idx]
+
+    # Warm up lazily built predictor state before timing
+    for row in singles[:10]:
+        model.predict(row)
+
+    queue = iter(singles)
+    single = _timings_ms(lambda: model.predict(next(queue)), n_single)
+    batch_ms = _timings_ms(lambda: model.predict(batch), 5)
+
+    pickled = pkl.dumps(model, protocol=pkl.HIGHEST_PROTOCOL)
+    rss_before = _rss_mb()
+    clone = pkl.loads(pickled)
+    rss_after = _rss_mb()
+    del clone
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        native_path = save_native_model(model, model_name, feature_schema, tmp_dir)
+        artifact_size = _artifact_size(native_path)
+
+    profile = {
+        "latency_single_p50_ms": float(np.percentile(single, 50)),
+        "latency_single_p99_ms": float(np.percentile(single, 99)),
+        f"latency_batch_{batch_rows // 1000}k_ms": float(np.median(batch_ms)),
+        "pickle_size_mb": len(pickled) / 2**20,
+        "artifact_size_mb": artifact_size / 2**20
+    }
+    if rss_before is not None:
+        profile["memory_mb"] = max(rss_after - rss_before, 0.0)
+    return profile
+
+
+def select_model(candidates, metric, policy="metric", max_latency_ms=None, latency_weight=0.0):
+    """
+    Name of the candidate to register. `candidates` maps model name to
+    {"metrics": ..., "profile": ...}; lower metric and latency are better.
+
+    - metric: lowest metric, latency ignored
+    - latency_cap: lowest metric among models whose single-row p99 is within
+      `max_latency_ms`; the fastest model if none is
+    - tradeoff: lowest metric + latency_weight * single-row p99 (ms)
+    """
+    if policy not in SELECTION_POLICIES:
+        raise ValueError(f"Unknown selection policy: {policy}")
+
+    def score(name):
+        return candidates[name]["metrics"][metric]
+
+    def latency(name):
+        return candidates[name]["profile"]["latency_single_p99_ms"]
+
+    names = list(candidates)
+    if policy == "metric":
+        return min(names, key=score)
+    if policy == "latency_cap":
+        within = [name for name in names if latency(name) <= max_latency_ms]
+        if not within:
+            print(f"No model within {max_latency_ms} ms p99, selecting the fastest")
+            return min(names, key=latency)
+        return min(within, key=score)
+    return min(names, key=lambda name: score(name) + latency_weight * latency(name))
@@ -0,0 +1,295 @@
+import os
+import json
+import time
+import uuid
+import glob
+import queue
+import shutil
+import threading
+import mlflow
+from mlflow.tracking import MlflowClient
+from mlflow.entities import Metric, Param, RunTag
+
+# Per-request limits of the MLflow log_batch REST API (1000 entities in total)
+MAX_METRICS_PER_BATCH = 800
+MAX_PARAMS_PER_BATCH = 100
+MAX_TAGS_PER_BATCH = 100
+# Seconds to wait before contacting an unreachable server again
+RETRY_INTERVAL = 30
+
+
+def _empty_batch():
+    return {"metrics": [], "params": [], "tags": []}
+
+
+def _metric_entries(metrics, step):
+    timestamp = int(time.time() * 1000)
+    return [
+        {"key": key, "value": float(value), "timestamp": timestamp, "step": step}
+        for key, value in metrics.items()
+    ]
+
+
+def _write_json(path, record):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(record, f)
+    os.replace(tmp_path, path)
+
+
+def _chunks(batch):
+    metrics, params, tags = batch["metrics"], batch["params"], batch["tags"]
+    while metrics or params or tags:
+        yield (
+            metrics[:MAX_METRICS_PER_BATCH],
+            params[:MAX_PARAMS_PER_BATCH],
+            tags[:MAX_TAGS_PER_BATCH],
+        )
+        metrics = metrics[MAX_METRICS_PER_BATCH:]
+        params = params[MAX_PARAMS_PER_BATCH:]
+        tags = tags[MAX_TAGS_PER_BATCH:]
+
+
+class BatchLogger:
+    """
+    Buffers metrics, params and tags per run and sends them with
+    `log_batch` from a background thread, so training never waits on the
+    tracking server.
+
+    Every batch is written to `spool_dir` before it is sent and removed once
+    the server accepted it. Batches that fail (server slow or down, process
+    killed mid-flush) stay on disk and are replayed by `replay_spool` on a
+    later flush or when the next logger starts.
+
+    Runs started with `start_run` are spooled whole: the run itself, its
+    artifacts and its model registration are created on the server by the
+    same background replay, so nothing in training waits on it.
+    """
+
+    def __init__(self, spool_dir="mlflow_spool", flush_interval=1.0, client=None, register_model=None):
+        self.spool_dir = spool_dir
+        self.flush_interval = flush_interval
+        self._client = client
+        self._register_model = register_model or mlflow.register_model
+        self._queue = queue.Queue()
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(spool_dir, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="mlflow-batch-logger", daemon=True)
+        self._thread.start()
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = MlflowClient()
+        return self._client
+
+    def start_run(self, experiment_name, run_name):
+        """DeferredRun in `experiment_name`, sent to the server once it ends."""
+        return DeferredRun(self, experiment_name, run_name)
+
+    def log_metrics(self, run_id, metrics, step=0):
+        for entry in _metric_entries(metrics, step):
+            self._queue.put((run_id, "metrics", entry))
+
+    def log_params(self, run_id, params):
+        for key, value in params.items():
+            self._queue.put((run_id, "params", {"key": key, "value": str(value)}))
+
+    def set_tags(self, run_id, tags):
+        for key, value in tags.items():
+            self._queue.put((run_id, "tags", {"key": key, "value": str(value)}))
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far has been sent or spooled."""
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        return done.wait(timeout)
+
+    def close(self, timeout=30):
+        """
+        Flush and stop the background thread. Anything still in flight after
+        `timeout` is already on disk and will be replayed by the next run.
+        """
+        self._queue.put(("stop", None))
+        self._thread.join(timeout)
+
+    def _run(self):
+        self.replay_spool()
+        pending = {}
+        spooled = False
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                item = None
+
+            if item is not None and item[0] == "spooled":
+                spooled = True
+                continue
+            if item is not None and item[0] not in ("flush", "stop"):
+                run_id, kind, entry = item
+                pending.setdefault(run_id, _empty_batch())[kind].append(entry)
+                continue
+
+            # Interval elapsed, flush requested or stopping
+            for run_id, batch in pending.items():
+                self._spool(run_id, batch)
+            if (pending or spooled) and time.monotonic() >= self._retry_at:
+                self.replay_spool()
+                spooled = False
+            pending = {}
+            deadline = time.monotonic() + self.flush_interval
+            if item is not None:
+                command, done = item
+                if command == "flush":
+                    done.set()
+                else:
+                    return
+
+    def _spool(self, run_id, batch):
+        path = os.path.join(self.spool_dir, f"{time.time_ns()}-{uuid.uuid4().hex}.json")
+        _write_json(path, {"run_id": run_id, **batch})
+        return path
+
+    def _spool_run(self, record):
+        path = os.path.join(self.spool_dir, f"{time.time_ns()}-{uuid.uuid4().hex}.json")
+        _write_json(path, record)
+        self._queue.put(("spooled", None))
+        return path
+
+    def _replay_run(self, path, record):
+        """
+        Create a spooled run on the server, log its data and artifacts and
+        register its model. Progress is written back after every step, so a
+        failed replay resumes where it stopped instead of creating the run
+        again.
+        """
+        if record["run_id"] is None:
+            experiment = self.client.get_experiment_by_name(record["experiment"])
+            if experiment is None:
+                experiment_id = self.client.create_experiment(record["experiment"])
+            else:
+                experiment_id = experiment.experiment_id
+            record["run_id"] = self.client.create_run(experiment_id, run_name=record["run_name"]).info.run_id
+            _write_json(path, record)
+        run_id = record["run_id"]
+        if not record["logged"]:
+            self._log_batch(run_id, record)
+            record["logged"] = True
+            _write_json(path, record)
+        for artifact in record["artifacts"]:
+            if not artifact["logged"]:
+                self.client.log_artifacts(run_id, artifact["local_dir"], artifact["artifact_path"])
+                artifact["logged"] = True
+                _write_json(path, record)
+        if not record["terminated"]:
+            self.client.set_terminated(run_id)
+            record["terminated"] = True
+            _write_json(path, record)
+        if record["register"] is not None:
+            self._register_model(f"runs:/{run_id}/{record['register']['artifact_path']}", record["register"]["name"])
+        shutil.rmtree(record["run_dir"], ignore_errors=True)
+
+    def _log_batch(self, run_id, batch):
+        for metrics, params, tags in _chunks(batch):
+            self.client.log_batch(
+                run_id,
+                metrics=[Metric(m["key"], m["value"], m["timestamp"], m["step"]) for m in metrics],
+                params=[Param(p["key"], p["value"]) for p in params],
+                tags=[RunTag(t["key"], t["value"]) for t in tags],
+                synchronous=True,
+            )
+
+    def replay_spool(self):
+        """
+        Send spooled batches oldest first; stop at the first failure.
+        Unreadable files are renamed to *.bad and skipped.
+        """
+        replayed = 0
+        with self._lock:
+            for path in sorted(glob.glob(os.path.join(self.spool_dir, "*.json"))):
+                try:
+                    with open(path) as f:
+                        record = json.load(f)
+                    deferred = record.get("kind") == "run"
+                    run_id = None if deferred else record.pop("run_id")
+                except Exception as e:
+                    os.replace(path, path + ".bad")
+                    print(f"Unreadable MLflow spool file moved to {path}.bad: {str(e)}")
+                    continue
+                try:
+                    if deferred:
+                        self._replay_run(path, record)
+                    else:
+                        self._log_batch(run_id, record)
+                except Exception as e:
+                    # Do not pay connection timeouts again on every flush
+                    self._retry_at = time.monotonic() + RETRY_INTERVAL
+                    print(f"MLflow tracking unavailable, keeping batches in {self.spool_dir}: {str(e)}")
+                    break
+                os.remove(path)
+                replayed += 1
+        return replayed
+
+
+class DeferredRun:
+    """
+    MLflow run recorded on disk while training continues. Metrics, params,
+    tags, copies of its artifacts and the model to register are spooled
+    when the run ends, and the owning BatchLogger creates everything on the
+    server in the background, however late it becomes reachable.
+    """
+
+    def __init__(self, logger, experiment_name, run_name):
+        self._logger = logger
+        self.local_id = uuid.uuid4().hex
+        self.run_dir = os.path.abspath(os.path.join(logger.spool_dir, "runs", self.local_id))
+        os.makedirs(self.run_dir)
+        self.record = {
+            "kind": "run", "experiment": experiment_name, "run_name": run_name, "run_id": None,
+            "run_dir": self.run_dir, "metrics": [], "params": [], "tags": [], "artifacts": [],
+            "register": None, "logged": False, "terminated": False,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            # A run that failed halfway is not worth sending
+            shutil.rmtree(self.run_dir, ignore_errors=True)
+            return
+        self.end()
+
+    def log_metrics(self, metrics, step=0):
+        self.record["metrics"].extend(_metric_entries(metrics, step))
+
+    def log_params(self, params):
+        self.record["params"].extend({"key": key, "value": str(value)} for key, value in params.items())
+
+    def set_tags(self, tags):
+        self.record["tags"].extend({"key": key, "value": str(value)} for key, value in tags.items())
+
+    def log_artifacts(self, local_dir, artifact_path=None):
+        """Copy the files of `local_dir` into the spool, to be uploaded under `artifact_path`."""
+        copy = os.path.join(self.run_dir, str(len(self.record["artifacts"])))
+        shutil.copytree(local_dir, copy)
+        self.record["artifacts"].append({"local_dir": copy, "artifact_path": artifact_path, "logged": False})
+
+    def log_dict(self, dictionary, artifact_file):
+        directory, file_name = os.path.split(artifact_file)
+        staging = os.path.join(self.run_dir, f"{len(self.record['artifacts'])}-dict")
+        os.makedirs(staging)
+        with open(os.path.join(staging, file_name), "w") as f:
+            json.dump(dictionary, f)
+        self.log_artifacts(staging, directory or None)
+        shutil.rmtree(staging)
+
+    def register_model(self, artifact_path, name):
+        """Register the model logged at `artifact_path` as a new version of `name` once the run exists."""
+        self.record["register"] = {"artifact_path": artifact_path, "name": name}
+
+    def end(self):
+        self._logger._spool_run(self.record)
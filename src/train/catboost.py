@@ -1,4 +1,5 @@
 from catboost import CatBoostRegressor
+from src.preprocessing import get_categorical_features
 
 def train_catboost(X_train, y_train, X_valid, y_valid):
     model = CatBoostRegressor(
@@ -8,8 +9,9 @@ def train_catboost(X_train, y_train, X_valid, y_valid):
         loss_function="RMSE",
         early_stopping_rounds=10,
         verbose=5,
-        random_state=42
+        random_state=42,
+        cat_features=get_categorical_features(X_train)
     )
 
     model.fit(X_train, y_train, eval_set=(X_valid, y_valid))
-    return model
\ No newline at end of file
+    return model
@@ -1,5 +1,6 @@
 import lightgbm as lgb
 from lightgbm import LGBMRegressor
+from src.preprocessing import get_categorical_features
 
 def train_lgbm(X_train, y_train, X_valid, y_valid, common_params):
     model = LGBMRegressor(
@@ -14,9 +15,10 @@ def train_lgbm(X_train, y_train, X_valid, y_valid, common_params):
     model.fit(
         X_train, y_train,
         eval_set=[(X_train, y_train), (X_valid, y_valid)],
+        categorical_feature=get_categorical_features(X_train),
         callbacks=[
             lgb.early_stopping(10, verbose=True),
             lgb.log_evaluation(5)
         ]
     )
-    return model
\ No newline at end of file
+    return model
@@ -6,7 +6,9 @@ def train_xgboost(X_train, y_train, X_valid, y_valid, common_params):
         subsample=0.8,
         colsample_bytree=0.8,
         n_jobs=-1,
-        early_stopping_rounds=10
+        early_stopping_rounds=10,
+        tree_method="hist",
+        enable_categorical=True
     )
 
     model.fit(
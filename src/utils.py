@@ -8,7 +8,7 @@ def save_model(model, model_path):
         pkl.dump(model, f)
 
 def load_data(data_path):
-    with open('data/CA_1_0.pkl', 'rb') as f:
+    with open(data_path, 'rb') as f:
         df_train = pkl.load(f)
     return df_train 
 
@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+# Shared with the backend's reconciliation, so both use one hierarchy
+from src.hierarchy import M5_LEVELS, SERIES_KEYS, HIERARCHY_COLS, build_summing_matrix
+
+WEIGHT_DAYS = 28
+
+
+def _int_codes(values):
+    # Works for plain integer columns and for the categorical inputs of lgbm/xgboost
+    return pd.Series(values).astype("float64").fillna(-1).to_numpy(np.int64)
+
+
+class WRMSSEEvaluator:
+    """
+    Weighted root mean squared scaled error over the M5 hierarchy.
+
+    The summing matrix, the per-series scales (in-sample one-step naive
+    MSE from the first non-zero sale) and the revenue weights of the last
+    28 training days are built once from the training frame. Scoring a
+    forecast is then one sparse product of the bottom-level error matrix.
+    """
+
+    def __init__(self, df_train, levels=M5_LEVELS):
+        series = (
+            df_train[HIERARCHY_COLS]
+            .drop_duplicates(SERIES_KEYS)
+            .sort_values(SERIES_KEYS)
+            .reset_index(drop=True)
+        )
+        self.n_series = len(series)
+        item = series["item_id"].to_numpy(np.int64)
+        store = series["store_id"].to_numpy(np.int64)
+        self._lookup = np.full((item.max() + 1, store.max() + 1), -1, dtype=np.int64)
+        self._lookup[item, store] = np.arange(self.n_series)
+
+        days = df_train["d"].to_numpy(np.int64)
+        self.first_day = int(days.min())
+        self.last_day = int(days.max())
+        n_days = self.last_day - self.first_day + 1
+        rows = self.series_index(df_train)
+        day_idx = days - self.first_day
+
+        history = np.zeros((self.n_series, n_days))
+        history[rows, day_idx] = df_train["sold"].to_numpy(np.float64)
+
+        recent = day_idx >= n_days - WEIGHT_DAYS
+        revenue = np.bincount(
+            rows[recent],
+            weights=(df_train["sold"].to_numpy(np.float64) * df_train["sell_price"].to_numpy(np.float64))[recent],
+            minlength=self.n_series
+        )
+        total_revenue = revenue.sum()
+
+        blocks = build_summing_matrix(series, levels)
+        factors = []
+        for block in blocks:
+            aggregated = block @ history
+            started = np.maximum.accumulate(aggregated != 0, axis=1)[:, :-1]
+            diff2 = np.diff(aggregated, axis=1) ** 2
+            counts = started.sum(axis=1)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                scale = (diff2 * started).sum(axis=1) / counts
+                factor = (block @ revenue) / total_revenue / np.sqrt(scale)
+            # Series without history cannot be scaled and carry no weight
+            factor[~np.isfinite(factor)] = 0.0
+            factors.append(factor / len(blocks))
+
+        self.summing_matrix = sparse.vstack(blocks, format="csr")
+        self.factors = np.concatenate(factors)
+
+    def series_index(self, X):
+        """Bottom series index of every row, -1 for series unseen in training."""
+        item = _int_codes(X["item_id"])
+        store = _int_codes(X["store_id"])
+        known = (
+            (item >= 0) & (item < self._lookup.shape[0]) &
+            (store >= 0) & (store < self._lookup.shape[1])
+        )
+        index = np.full(len(item), -1, dtype=np.int64)
+        index[known] = self._lookup[item[known], store[known]]
+        return index
+
+    def accumulator(self):
+        return WRMSSEAccumulator(self)
+
+    def score(self, X, y_true, y_pred):
+        return self.accumulator().update(X, y_true, y_pred).result()
+
+
+class WRMSSEAccumulator:
+    """
+    Bottom-level forecast errors per (series, forecast day). Errors are
+    summed before aggregation, so chunks and processes can be merged.
+    """
+
+    def __init__(self, evaluator):
+        self.evaluator = evaluator
+        self.errors = np.zeros((evaluator.n_series, 0))
+        self.days_seen = np.zeros(0, dtype=bool)
+
+    def _grow(self, n_days):
+        if n_days > self.errors.shape[1]:
+            extra = n_days - self.errors.shape[1]
+            self.errors = np.hstack([self.errors, np.zeros((self.errors.shape[0], extra))])
+            self.days_seen = np.concatenate([self.days_seen, np.zeros(extra, dtype=bool)])
+
+    def update(self, X, y_true, y_pred):
+        rows = self.evaluator.series_index(X)
+        day = _int_codes(X["d"]) - (self.evaluator.last_day + 1)
+        keep = (rows >= 0) & (day >= 0)
+        if not keep.any():
+            return self
+        rows, day = rows[keep], day[keep]
+        err = (np.asarray(y_pred, dtype=np.float64).ravel() - np.asarray(y_true, dtype=np.float64).ravel())[keep]
+        self._grow(int(day.max()) + 1)
+        np.add.at(self.errors, (rows, day), err)
+        self.days_seen[day] = True
+        return self
+
+    def merge(self, other):
+        self._grow(other.errors.shape[1])
+        self.errors[:, :other.errors.shape[1]] += other.errors
+        self.days_seen[:len(other.days_seen)] |= other.days_seen
+        return self
+
+    def result(self):
+        if not self.days_seen.any():
+            raise ValueError("No forecast days after the training period accumulated")
+        aggregated = self.evaluator.summing_matrix @ self.errors[:, self.days_seen]
+        rmsse = np.sqrt(np.mean(aggregated ** 2, axis=1))
+        return float(self.evaluator.factors @ rmsse)
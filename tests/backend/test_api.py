@@ -10,6 +10,8 @@ sys.modules['mlflow.sklearn'] = MagicMock()
 sys.modules['mlflow.pyfunc'] = MagicMock()
 
 from app.main import app
+from app.models.prediction_input import PredictionInput
+from app.utils.inference_pool import PoolSaturated
 
 
 @pytest.fixture
@@ -145,7 +147,7 @@ class TestPredictEndpoint:
         assert data['prediction'] == 42.5
     
     @patch('app.api.endpoints.loaded_model', None)
-    @patch('app.api.endpoints.load_best_model_from_mlflow')
+    @patch('app.api.endpoints.load_serving_model')
     def test_predict_model_not_loaded(self, mock_load_model, client):
         """Test prediction when model is not initially loaded"""
         mock_load_model.side_effect = Exception("Failed to load model")
@@ -262,3 +264,82 @@ class TestBatchPredictEndpoint:
         assert 'predictions' in data
         assert len(data['predictions']) == 2
         assert data['predictions'] == [42.5, 38.2]
+
+
+class TestHierarchyPredictEndpoint:
+    """Test cases for /predict-batch-hierarchy endpoint"""
+
+    def test_hierarchy_predict_bottom_up(self, client, mock_model_and_info):
+        """Test that aggregates are returned for every hierarchy node"""
+        mock_model, mock_info = mock_model_and_info
+        mock_model.predict.return_value = [2.0, 3.0]
+        row = {key: 0 for key in PredictionInput.model_fields}
+        row.update({"item_id": 1001, "dept_id": 1, "cat_id": 1, "store_id": 1, "state_id": 1, "d": 1000})
+        input_data = {"data": [row, {**row, "item_id": 1002}]}
+
+        with patch('app.api.endpoints.loaded_model', mock_model):
+            with patch('app.api.endpoints.model_info', mock_info):
+                response = client.post("/api/predict-batch-hierarchy", json=input_data)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data['days'] == [1000]
+        nodes = {node['node']: node for node in data['nodes']}
+        assert nodes['total']['forecasts'] == [5.0]
+        assert nodes['store_id=1/cat_id=1']['forecasts'] == [5.0]
+        assert nodes['item_id=1002/store_id=1']['forecasts'] == [3.0]
+        assert nodes['store_id=1']['keys'] == {'store_id': 1}
+
+    def test_hierarchy_reconciled_off_event_loop(self, client, mock_model_and_info):
+        """Test that reconciliation runs on an inference thread, not the event loop"""
+        import threading
+        from app.api import endpoints
+        mock_model, mock_info = mock_model_and_info
+        mock_model.predict.return_value = [2.0, 3.0]
+        row = {key: 0 for key in PredictionInput.model_fields}
+        row.update({"item_id": 1001, "dept_id": 1, "cat_id": 1, "store_id": 1, "state_id": 1, "d": 1000})
+        input_data = {"data": [row, {**row, "item_id": 1002}]}
+        threads = []
+        reconcile_batch = endpoints.reconcile_batch
+
+        def recording_reconcile(*args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return reconcile_batch(*args, **kwargs)
+
+        with patch('app.api.endpoints.loaded_model', mock_model):
+            with patch('app.api.endpoints.model_info', mock_info):
+                with patch('app.api.endpoints.reconcile_batch', recording_reconcile):
+                    response = client.post("/api/predict-batch-hierarchy", json=input_data)
+
+        assert response.status_code == 200
+        assert len(threads) == 1
+        assert threads[0].startswith("inference")
+
+
+class TestBackpressure:
+    """Test cases for rejecting requests when the inference executor is full"""
+
+    def test_batch_predict_saturated(self, client, mock_model_and_info):
+        """Test a full executor answers 503 with Retry-After"""
+        mock_model, mock_info = mock_model_and_info
+        row = {key: 0 for key in PredictionInput.model_fields}
+
+        async def full(*args):
+            raise PoolSaturated("Inference queue full")
+
+        with patch('app.api.endpoints.loaded_model', mock_model):
+            with patch('app.api.endpoints.model_info', mock_info):
+                with patch('app.api.endpoints.inference_pool.run', full):
+                    response = client.post("/api/predict-batch", json={"data": [row]})
+
+        assert response.status_code == 503
+        assert response.headers['retry-after'] == '1'
+
+    def test_executor_metrics(self, client):
+        """Test saturation metrics of the executor and the batcher are exposed"""
+        response = client.get("/api/executor-metrics")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert {'running', 'queued', 'utilization', 'rejected'} <= set(data['executor'])
+        assert 'mean_batch_size' in data['batching']
@@ -0,0 +1,218 @@
+import io
+import sys
+import gzip
+import json
+import asyncio
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as pa_ipc
+import pyarrow.parquet as pq
+import pytest
+from unittest.mock import patch, MagicMock
+
+# Mock mlflow before importing app
+sys.modules['mlflow'] = MagicMock()
+sys.modules['mlflow.sklearn'] = MagicMock()
+sys.modules['mlflow.pyfunc'] = MagicMock()
+
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+import app.api.endpoints as endpoints_module
+from app.main import app
+from app.models.prediction_input import PredictionInput
+from app.utils.columnar import ColumnValidationError, validate_columns, INTEGER_FIELDS
+
+
+def make_frame(n_rows):
+    frame = pd.DataFrame({name: np.zeros(n_rows, dtype=np.int64) for name in INTEGER_FIELDS})
+    for name in PredictionInput.model_fields:
+        if name not in INTEGER_FIELDS:
+            frame[name] = np.zeros(n_rows)
+    frame["sell_price"] = np.arange(n_rows) + 0.5
+    return frame[list(PredictionInput.model_fields)]
+
+
+def arrow_stream_body(frame):
+    sink = io.BytesIO()
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    with pa_ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def parquet_body(frame):
+    sink = io.BytesIO()
+    pq.write_table(pa.Table.from_pandas(frame, preserve_index=False), sink)
+    return sink.getvalue()
+
+
+def csv_body(frame):
+    return frame.to_csv(index=False).encode()
+
+
+@pytest.fixture
+def served():
+    """Serves a model predicting 10 x sell_price through the DataFrame path"""
+    model = MagicMock()
+    model.predict.side_effect = lambda df: df["sell_price"].to_numpy() * 10
+    with patch.object(endpoints_module, 'loaded_model', model), \
+         patch.object(endpoints_module, 'model_info', {"name": "Model", "version": "7"}), \
+         patch.object(endpoints_module, 'COLUMNAR_CHUNK_ROWS', 4):
+        yield model
+
+
+class TestValidateColumns:
+    """Test cases for vectorized column validation"""
+
+    def test_valid_columns_normalized(self):
+        """Test integer fields become int64 and float fields float64"""
+        columns = validate_columns({"item_id": np.array([1.0, 2.0]), "sell_price": np.array([1, 2])}, ["item_id", "sell_price"])
+        assert columns["item_id"].dtype == np.int64
+        assert columns["sell_price"].dtype == np.float64
+
+    def test_all_problems_reported(self):
+        """Test missing, fractional and non-finite columns are reported together"""
+        columns = {"item_id": np.array([1.0, 2.5]), "sell_price": np.array([1.0, np.nan])}
+        with pytest.raises(ColumnValidationError) as error:
+            validate_columns(columns, ["item_id", "sell_price", "d"], row_offset=10)
+        message = str(error.value)
+        assert "item_id: expected integers, got 2.5 at row 11" in message
+        assert "sell_price: missing or non-finite value at row 11" in message
+        assert "d: missing" in message
+
+    def test_lengths_must_match(self):
+        """Test columns of different lengths are rejected"""
+        with pytest.raises(ColumnValidationError):
+            validate_columns({"item_id": np.array([1]), "d": np.array([1, 2])}, ["item_id", "d"])
+
+
+class TestColumnarEndpoint:
+    """Test cases for /predict-batch-columnar"""
+
+    @pytest.mark.parametrize("content_type,body", [
+        ("application/vnd.apache.arrow.stream", arrow_stream_body),
+        ("application/vnd.apache.parquet", parquet_body),
+        ("text/csv", csv_body),
+    ])
+    def test_formats_stream_ndjson(self, served, content_type, body):
+        """Test every input format is predicted in chunks and streamed as NDJSON"""
+        frame = make_frame(10)
+        response = TestClient(app).post(
+            "/api/predict-batch-columnar", content=body(frame), headers={"Content-Type": content_type}
+        )
+        assert response.status_code == 200
+        assert response.headers["x-model-version"] == "7"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["prediction"] for line in lines] == (frame["sell_price"] * 10).tolist()
+        assert [len(call.args[0]) for call in served.predict.call_args_list] == [4, 4, 2]
+
+    def test_arrow_response(self, served):
+        """Test an Arrow Accept header returns an Arrow IPC stream"""
+        frame = make_frame(6)
+        response = TestClient(app).post(
+            "/api/predict-batch-columnar",
+            content=arrow_stream_body(frame),
+            headers={"Content-Type": "application/vnd.apache.arrow.stream", "Accept": "application/vnd.apache.arrow.stream"}
+        )
+        table = pa_ipc.open_stream(response.content).read_all()
+        assert table.column("prediction").to_pylist() == (frame["sell_price"] * 10).tolist()
+
+    def test_invalid_batch_rejected_before_streaming(self, served):
+        """Test a bad value in a late chunk fails the request with 422"""
+        frame = make_frame(10)
+        frame.loc[9, "sell_price"] = np.nan
+        response = TestClient(app).post(
+            "/api/predict-batch-columnar", content=parquet_body(frame),
+            headers={"Content-Type": "application/vnd.apache.parquet"}
+        )
+        assert response.status_code == 422
+        assert "row 9" in response.json()["detail"]
+        served.predict.assert_not_called()
+
+    def test_unsupported_content_type(self, served):
+        """Test bodies other than Arrow, Parquet or CSV are refused"""
+        response = TestClient(app).post(
+            "/api/predict-batch-columnar", content=b"{}", headers={"Content-Type": "application/json"}
+        )
+        assert response.status_code == 415
+
+
+class TestSpoolCleanup:
+    """Test cases for removing spooled request bodies"""
+
+    @pytest.fixture
+    def spool_dir(self, served, tmp_path):
+        with patch.object(endpoints_module, 'COLUMNAR_SPOOL_DIR', str(tmp_path)):
+            yield tmp_path
+
+    def test_streamed_batch_leaves_no_file(self, spool_dir):
+        """Test the spooled body is removed once the response is sent"""
+        response = TestClient(app).post(
+            "/api/predict-batch-columnar", content=csv_body(make_frame(6)), headers={"Content-Type": "text/csv"}
+        )
+        assert response.status_code == 200
+        assert list(spool_dir.iterdir()) == []
+
+    def test_corrupt_body_leaves_no_file(self, spool_dir):
+        """Test a body failing mid-stream is removed with the 400"""
+        body = gzip.compress(csv_body(make_frame(200)))
+        response = TestClient(app).post(
+            "/api/predict-batch-columnar", content=body[:len(body) // 2] + b"garbage" * 10,
+            headers={"Content-Type": "text/csv", "Content-Encoding": "gzip"}
+        )
+        assert response.status_code == 400
+        assert list(spool_dir.iterdir()) == []
+
+    def test_unsent_response_cleans_up(self, spool_dir):
+        """Test the response's background task removes the body if it is never streamed"""
+        body = csv_body(make_frame(6))
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def respond():
+            request = Request({
+                "type": "http", "method": "POST", "path": "/api/predict-batch-columnar",
+                "headers": [(b"content-type", b"text/csv")], "query_string": b"",
+            }, receive)
+            response = await endpoints_module.predict_batch_columnar(request)
+            assert len(list(spool_dir.iterdir())) == 1
+            await response.background()
+
+        asyncio.run(respond())
+        assert list(spool_dir.iterdir()) == []
+
+
+class TestColumnJsonBatch:
+    """Test cases for the column-oriented /predict-batch payload"""
+
+    def test_columns_match_rows(self, served):
+        """Test one array per feature predicts the same as one object per row"""
+        frame = make_frame(5)
+        client = TestClient(app)
+        with patch.object(endpoints_module, 'prediction_cache', None):
+            by_rows = client.post("/api/predict-batch", json={"data": frame.to_dict(orient="records")})
+            by_columns = client.post("/api/predict-batch", json={"columns": frame.to_dict(orient="list")})
+        assert served.predict.call_count == 2
+        assert by_columns.status_code == 200
+        assert by_columns.json()["predictions"] == by_rows.json()["predictions"] == (frame["sell_price"] * 10).tolist()
+
+    def test_invalid_column_rejected(self, served):
+        """Test a bad column value is a 422 naming the column and row"""
+        columns = make_frame(3).to_dict(orient="list")
+        columns["store_id"][2] = 1.5
+        columns["sell_price"][0] = "cheap"
+        response = TestClient(app).post("/api/predict-batch", json={"columns": columns})
+        assert response.status_code == 422
+        detail = response.json()["detail"]
+        assert "store_id: expected integers, got 1.5 at row 2" in detail
+        assert "sell_price: expected numbers only" in detail
+
+    def test_exactly_one_layout(self, served):
+        """Test sending both or neither of rows and columns is refused"""
+        frame = make_frame(1)
+        client = TestClient(app)
+        both = {"data": frame.to_dict(orient="records"), "columns": frame.to_dict(orient="list")}
+        assert client.post("/api/predict-batch", json=both).status_code == 422
+        assert client.post("/api/predict-batch", json={}).status_code == 422
@@ -0,0 +1,104 @@
+import os
+import time
+import signal
+import threading
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+from app.utils.feature_vector import FeatureLayout, predict_columns
+from app.utils.native_model import EnsembleModel, load_ensemble_model
+
+
+class SlowMember:
+    """Member whose predict waits without holding the GIL, as a booster does"""
+
+    def __init__(self, value, delay_s=0.0, feature_schema=None):
+        self.value = value
+        self.delay_s = delay_s
+        self.feature_schema = feature_schema
+        self.inputs = []
+        self.threads = []
+
+    def predict_matrix(self, X):
+        self.inputs.append(X)
+        self.threads.append(threading.current_thread().name)
+        time.sleep(self.delay_s)
+        return np.full(len(X), self.value)
+
+
+def make_schema(encoding):
+    return {
+        "features": ["sell_price", "store_id"],
+        "categorical_features": ["store_id"],
+        "categorical_encoding": encoding,
+        "category_levels": {"store_id": [3, 5]},
+    }
+
+
+def identity(X):
+    return X
+
+
+class TestEnsembleModel:
+    """Test cases for the parallel weighted ensemble"""
+
+    def test_weighted_sum(self):
+        """Test predictions are the weighted sum of the members"""
+        members = [SlowMember(1.0), SlowMember(2.0), SlowMember(4.0)]
+        model = EnsembleModel(members, [0.5, 0.25, 0.25], [identity] * 3)
+        assert model.predict_matrix(np.zeros((100, 2))).tolist() == [2.0] * 100
+
+    def test_members_predict_concurrently(self):
+        """Test a large batch takes about the slowest member, not the sum"""
+        members = [SlowMember(1.0, delay_s=0.2) for _ in range(3)]
+        model = EnsembleModel(members, [1 / 3] * 3, [identity] * 3)
+        start = time.perf_counter()
+        model.predict_matrix(np.zeros((100, 2)))
+        assert time.perf_counter() - start < 0.45
+        assert all(member.threads[0].startswith("ensemble") for member in members)
+
+    def test_small_batches_stay_on_the_caller(self):
+        """Test batches under parallel_min_rows skip the thread pool"""
+        members = [SlowMember(1.0), SlowMember(1.0)]
+        model = EnsembleModel(members, [0.5, 0.5], [identity] * 2, parallel_min_rows=64)
+        model.predict_matrix(np.zeros((1, 2)))
+        assert [member.threads[0] for member in members] == [threading.current_thread().name] * 2
+
+    def test_forked_worker_after_warm_up(self):
+        """Test a child forked after a parallel batch in the parent predicts on its own pool"""
+        members = [SlowMember(1.0), SlowMember(3.0)]
+        model = EnsembleModel(members, [0.5, 0.5], [identity] * 2, parallel_min_rows=64)
+        # The warm-up batch starts the parent's pool threads
+        model.predict_matrix(np.zeros((64, 2)))
+        pid = os.fork()
+        if pid == 0:
+            try:
+                signal.alarm(5)
+                ok = model.predict_matrix(np.zeros((64, 2))).tolist() == [2.0] * 64
+                os._exit(0 if ok else 1)
+            finally:
+                os._exit(2)
+        _, status = os.waitpid(pid, 0)
+        assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+        assert model.predict_matrix(np.zeros((64, 2))).tolist() == [2.0] * 64
+
+    def test_members_get_their_encoding(self, tmp_path):
+        """Test raw ensemble features are encoded per member schema"""
+        members = {"lgbm": SlowMember(1.0, feature_schema=make_schema("category")),
+                   "catboost": SlowMember(3.0, feature_schema=make_schema("raw"))}
+        manifest = {"members": [{"model_dir": name, "weight": 0.5} for name in members]}
+        with patch("app.utils.native_model.load_native_model", side_effect=lambda path: members[path.rsplit("/", 1)[-1]]):
+            model = load_ensemble_model(str(tmp_path), manifest, make_schema("raw"))
+
+        columns = {"sell_price": np.array([2.5]), "store_id": np.array([5])}
+        predictions = predict_columns(model, columns, FeatureLayout(make_schema("raw")))
+        assert predictions.tolist() == [2.0]
+        assert members["lgbm"].inputs[0].tolist() == [[2.5, 1.0]]
+        assert members["catboost"].inputs[0].tolist() == [[2.5, 5.0]]
+
+    def test_dataframe_predict(self):
+        """Test predict takes a DataFrame in the ensemble's feature order"""
+        member = SlowMember(2.0)
+        model = EnsembleModel([member], [1.0], [identity], make_schema("raw"))
+        assert model.predict(pd.DataFrame({"store_id": [5], "sell_price": [1.5]})).tolist() == [2.0]
+        assert member.inputs[0].tolist() == [[1.5, 5.0]]
@@ -0,0 +1,111 @@
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import patch, MagicMock
+
+# Mock mlflow before importing app
+sys.modules['mlflow'] = MagicMock()
+sys.modules['mlflow.sklearn'] = MagicMock()
+sys.modules['mlflow.pyfunc'] = MagicMock()
+
+from fastapi.testclient import TestClient
+import app.api.endpoints as endpoints_module
+from app.main import app
+from app.models.prediction_input import PredictionInput
+from app.utils.feature_store import FeatureStore, MissingKeysError, build_feature_store
+
+
+def make_table():
+    """Two items in two stores over three days, sell_price encoding the key"""
+    rows = []
+    for item_id in (100, 102):
+        for store_id in (0, 1):
+            for d in (1850, 1851, 1852):
+                row = {name: 0 for name in PredictionInput.model_fields}
+                row.update(item_id=item_id, store_id=store_id, d=d, sell_price=item_id + store_id / 10 + (d - 1850) / 100)
+                rows.append(row)
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def store(tmp_path):
+    build_feature_store(make_table(), str(tmp_path))
+    return FeatureStore.load(str(tmp_path))
+
+
+class TestFeatureStore:
+    """Test cases for building and reading a feature store"""
+
+    def test_lookup(self, store):
+        """Test keys map to their rows in any order, from memory-mapped files"""
+        assert isinstance(store.features, np.memmap)
+        rows = store.rows([102, 100], [1, 0], [1852, 1850])
+        columns = store.columns(rows)
+        assert columns["sell_price"].tolist() == pytest.approx([102.12, 100.0])
+        assert columns["item_id"].tolist() == [102, 100]
+
+    def test_missing_keys(self, store):
+        """Test keys absent from the table, inside or outside its range, are reported"""
+        with pytest.raises(MissingKeysError) as error:
+            store.rows([101, 100, 100], [0, 0, 5], [1850, 1850, 1850])
+        assert "2 of 3" in str(error.value)
+        assert "(101, 0, 1850)" in str(error.value)
+
+    def test_overrides(self, store):
+        """Test a single override applies to every key and a list to each key"""
+        rows = store.rows([100, 102], [0, 0], [1850, 1850])
+        columns = store.columns(rows, {"sell_price": 1.5, "snap_CA": [0, 1]})
+        assert columns["sell_price"].tolist() == [1.5, 1.5]
+        assert columns["snap_CA"].tolist() == [0, 1]
+
+    def test_duplicate_keys_rejected(self, tmp_path):
+        """Test a table with a key twice cannot be built"""
+        table = make_table()
+        with pytest.raises(ValueError):
+            build_feature_store(pd.concat([table, table.iloc[:1]]), str(tmp_path))
+
+
+class TestPredictKeys:
+    """Test cases for /predict-keys"""
+
+    @pytest.fixture
+    def client(self, store):
+        model = MagicMock()
+        model.predict.side_effect = lambda df: df["sell_price"].to_numpy() * 10
+        with patch.object(endpoints_module, 'loaded_model', model), \
+             patch.object(endpoints_module, 'model_info', {"name": "Model", "version": "2"}), \
+             patch.object(endpoints_module, 'prediction_cache', None), \
+             patch.object(endpoints_module, 'feature_store', store):
+            yield TestClient(app)
+
+    def test_keys_match_full_rows(self, client):
+        """Test predicting from keys equals sending every field"""
+        table = make_table().iloc[[7, 0, 11]]
+        by_rows = client.post("/api/predict-batch", json={"data": table.to_dict(orient="records")})
+        by_keys = client.post("/api/predict-keys", json={
+            "item_id": table["item_id"].tolist(), "store_id": table["store_id"].tolist(), "d": table["d"].tolist()
+        })
+        assert by_keys.status_code == 200
+        assert by_keys.json()["predictions"] == pytest.approx(by_rows.json()["predictions"])
+
+    def test_override(self, client):
+        """Test overrides replace the stored value"""
+        response = client.post("/api/predict-keys", json={
+            "item_id": [100, 102], "store_id": [0, 0], "d": [1850, 1850], "overrides": {"sell_price": 2.0}
+        })
+        assert response.json()["predictions"] == [20.0, 20.0]
+
+    def test_errors(self, client):
+        """Test missing keys, bad overrides and bad keys are client errors"""
+        keys = {"item_id": [100], "store_id": [0], "d": [1850]}
+        assert client.post("/api/predict-keys", json={**keys, "d": [1900]}).status_code == 404
+        assert client.post("/api/predict-keys", json={**keys, "overrides": {"d": 1851}}).status_code == 422
+        assert client.post("/api/predict-keys", json={**keys, "overrides": {"sell_price": [1.0, 2.0]}}).status_code == 422
+        assert client.post("/api/predict-keys", json={**keys, "item_id": [100.5]}).status_code == 422
+
+    def test_no_store(self, client):
+        """Test the endpoint is unavailable without a feature store"""
+        with patch.object(endpoints_module, 'feature_store', None):
+            response = client.post("/api/predict-keys", json={"item_id": [100], "store_id": [0], "d": [1850]})
+        assert response.status_code == 503
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+from unittest.mock import MagicMock
+from app.models.prediction_input import PredictionInput
+from app.utils.feature_schema import apply_feature_schema
+from app.utils.feature_vector import FeatureLayout, predict_items
+from app.utils.native_model import NativeModel
+from app.utils.tree_compiler import frame_to_matrix
+
+
+def make_input(**overrides):
+    values = {name: 0 for name in PredictionInput.model_fields}
+    values.update({"sell_price": 2.5, "item_id": 7, "store_id": 1, "event_name_1": -1})
+    values.update(overrides)
+    return PredictionInput(**values)
+
+
+def make_schema(encoding="category"):
+    return {
+        "features": ["sell_price", "store_id", "item_id", "event_name_1"],
+        "categorical_features": ["store_id", "item_id", "event_name_1"],
+        "categorical_encoding": encoding,
+        "category_levels": {"store_id": [0, 1, 2], "item_id": [3, 7, 9], "event_name_1": [-1, 4]},
+    }
+
+
+class TestFeatureLayout:
+    """Test cases for the schema-ordered float32 feature buffer"""
+
+    def test_field_order_without_schema(self):
+        """Test PredictionInput field order is used when no schema exists"""
+        layout = FeatureLayout()
+        X = layout.fill([make_input()])
+        assert X.dtype == np.float32
+        assert X.shape == (1, len(PredictionInput.model_fields))
+        assert X[0, layout.features.index("sell_price")] == 2.5
+
+    def test_categorical_codes(self):
+        """Test columns follow the schema and categoricals become training codes"""
+        X = FeatureLayout(make_schema()).fill([make_input()])
+        assert X[0].tolist() == [2.5, 1.0, 1.0, 0.0]
+
+    def test_unseen_categories_are_missing(self):
+        """Test values outside or between the training levels become NaN"""
+        layout = FeatureLayout(make_schema())
+        X = layout.fill([make_input(item_id=8), make_input(item_id=100), make_input(item_id=0, event_name_1=-5)])
+        assert np.isnan(X[:, 2]).all()
+        assert np.isnan(X[2, 3])
+
+    def test_matches_dataframe_path(self):
+        """Test the buffer equals the DataFrame built by apply_feature_schema"""
+        schema = make_schema()
+        items = [make_input(item_id=i, store_id=s) for i in [3, 5, 9] for s in [0, 2, 4]]
+        expected_df = apply_feature_schema(pd.DataFrame([item.model_dump() for item in items]), schema)
+        expected = frame_to_matrix(expected_df, schema["features"]).astype(np.float32)
+        np.testing.assert_array_equal(FeatureLayout(schema).fill(items), expected)
+
+    def test_raw_encoding_keeps_values(self):
+        """Test raw-encoded (CatBoost) categoricals keep their raw values"""
+        X = FeatureLayout(make_schema("raw")).fill([make_input()])
+        assert X[0].tolist() == [2.5, 1.0, 7.0, -1.0]
+
+    def test_fill_preallocated_buffer(self):
+        """Test values are written into the given buffer"""
+        layout = FeatureLayout(make_schema())
+        out = np.zeros((2, layout.n_features), dtype=np.float32)
+        result = layout.fill([make_input(), make_input(sell_price=1.0)], out=out)
+        assert result is out
+        assert out[:, 0].tolist() == [2.5, 1.0]
+
+
+class TestPredictItems:
+    """Test cases for routing inputs to the model"""
+
+    def test_native_model_gets_buffer(self):
+        """Test native models are called with the float32 matrix"""
+        booster = MagicMock()
+        booster.predict.return_value = np.array([3.0])
+        model = NativeModel("lightgbm", booster)
+        result = predict_items(model, [make_input()], FeatureLayout(make_schema()))
+        assert result.tolist() == [3.0]
+        X = booster.predict.call_args[0][0]
+        assert isinstance(X, np.ndarray) and X.dtype == np.float32
+
+    def test_catboost_categoricals_as_integers(self):
+        """Test CatBoost receives categorical columns as integers"""
+        booster = MagicMock()
+        booster.get_cat_feature_indices.return_value = [1, 2, 3]
+        booster.predict.return_value = np.array([3.0])
+        model = NativeModel("catboost", booster)
+        predict_items(model, [make_input()], FeatureLayout(make_schema("raw")))
+        X = booster.predict.call_args[0][0]
+        assert [type(v) for v in X[0, 1:]] == [int, int, int]
+
+    def test_other_models_get_dataframe(self):
+        """Test pyfunc models still receive a schema-ordered DataFrame"""
+        model = MagicMock()
+        model.predict.return_value = [1.0]
+        predict_items(model, [make_input()], FeatureLayout(make_schema()))
+        input_df = model.predict.call_args[0][0]
+        assert list(input_df.columns) == make_schema()["features"]
@@ -0,0 +1,136 @@
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import patch, MagicMock
+
+# Mock mlflow before importing app
+sys.modules['mlflow'] = MagicMock()
+sys.modules['mlflow.sklearn'] = MagicMock()
+sys.modules['mlflow.pyfunc'] = MagicMock()
+
+from fastapi.testclient import TestClient
+import app.api.endpoints as endpoints_module
+from app.main import app
+from app.models.prediction_input import PredictionInput
+from app.utils.feature_store import FeatureStore, build_feature_store
+from app.utils.forecasting import fill_rolling_gaps, recursive_forecast
+from app.utils.sales_history import SalesHistory, LAGS
+
+
+def linear_model(columns):
+    """Stand-in model depending on every derived feature"""
+    lags = sum(np.asarray(columns[f"sold_lag_{lag}"]) * (0.1 + lag / 100) for lag in LAGS)
+    return 0.3 * lags + 0.2 * np.asarray(columns["rolling_sold_mean"]) + 0.1 * np.asarray(columns["expanding_sold_mean"]) + 0.5
+
+
+def reference_features(sold):
+    """Features of the day after `sold`, computed from the whole series"""
+    features = {f"sold_lag_{lag}": sold[-lag] if lag <= len(sold) else 0.0 for lag in LAGS}
+    features["rolling_sold_mean"] = np.sum(sold[-7:]) / 7
+    features["expanding_sold_mean"] = np.mean(sold)
+    return features
+
+
+class TestRecursiveForecast:
+    """Test cases for the recursive forecast loop"""
+
+    def test_matches_day_by_day_client(self):
+        """Test the forecast equals predicting one day at a time with recomputed features"""
+        rng = np.random.default_rng(1)
+        series = [list(rng.integers(0, 6, size=n).astype(float)) for n in (60, 20)]
+        history = SalesHistory()
+        for i, sold in enumerate(series):
+            history.push([i] * len(sold), [0] * len(sold), np.arange(len(sold)) + 101 - len(sold), sold)
+        past, total, days = history.window_before([0, 1], [0, 0], 101)
+
+        def day_columns(k):
+            return {name: np.zeros(2) for name in reference_features([0.0])}
+
+        predictions = recursive_forecast(linear_model, day_columns, past, total, days, horizon=10)
+
+        expected = []
+        for _ in range(10):
+            features = [reference_features(sold) for sold in series]
+            day = linear_model({name: np.array([f[name] for f in features]) for name in features[0]})
+            expected.append(day)
+            for sold, value in zip(series, day):
+                sold.append(max(value, 0.0))
+        np.testing.assert_allclose(predictions, np.array(expected))
+
+    def test_given_features_without_history(self):
+        """Test day 0 uses the given features and later days shift predictions in"""
+        columns = {f"sold_lag_{lag}": np.array([float(lag)]) for lag in LAGS}
+        columns.update(rolling_sold_mean=np.array([4.0]), expanding_sold_mean=np.array([2.0]))
+        seen = []
+
+        def predict(day):
+            seen.append({name: float(values[0]) for name, values in day.items()})
+            return np.array([10.0])
+
+        past = np.full((1, 36), np.nan)
+        recursive_forecast(predict, lambda k: {name: values.copy() for name, values in columns.items()},
+                           past, np.array([np.nan]), np.array([9]), horizon=3)
+        assert seen[0]["sold_lag_1"] == 1.0 and seen[0]["rolling_sold_mean"] == pytest.approx(4.0)
+        assert (seen[1]["sold_lag_1"], seen[1]["sold_lag_2"]) == (10.0, 2.0)
+        assert seen[2]["rolling_sold_mean"] == pytest.approx((5 * 4.0 + 20.0) / 7)
+        assert seen[2]["expanding_sold_mean"] == pytest.approx((18.0 + 20.0) / 11)
+
+    def test_fill_rolling_gaps(self):
+        """Test unknown days are filled to the known mean, known days kept"""
+        past = np.full((2, 10), np.nan)
+        past[0, -3:] = [1.0, 2.0, 3.0]
+        filled = fill_rolling_gaps(past, np.array([3.0, 0.5]))
+        assert filled[:, -7:].mean(axis=1) == pytest.approx([3.0, 0.5])
+        assert filled[0, -3:].tolist() == [1.0, 2.0, 3.0]
+        assert np.isnan(filled[:, :3]).all()
+
+
+class TestForecastEndpoint:
+    """Test cases for /forecast"""
+
+    @pytest.fixture
+    def client(self, tmp_path):
+        rows = []
+        for item_id in (100, 101):
+            for d in (1850, 1851):
+                row = {name: 0 for name in PredictionInput.model_fields}
+                row.update(item_id=item_id, store_id=0, d=d, sell_price=1.0 + d - 1850, sold_lag_1=item_id - 99)
+                rows.append(row)
+        build_feature_store(pd.DataFrame(rows), str(tmp_path))
+        model = MagicMock()
+        model.predict.side_effect = lambda df: (df["sold_lag_1"] + df["sell_price"]).to_numpy()
+        with patch.object(endpoints_module, 'loaded_model', model), \
+             patch.object(endpoints_module, 'model_info', {"name": "Model", "version": "1"}), \
+             patch.object(endpoints_module, 'prediction_cache', None), \
+             patch.object(endpoints_module, 'feature_store', FeatureStore.load(str(tmp_path))), \
+             patch.object(endpoints_module, 'sales_history', SalesHistory()):
+            yield TestClient(app), model
+
+    def test_horizon_matrix(self, client):
+        """Test one row per day, with the last stored day's features carried forward"""
+        client, model = client
+        response = client.post("/api/forecast", json={"item_id": [100, 101], "store_id": [0, 0], "d": 1850, "horizon": 3})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["days"] == [1850, 1851, 1852]
+        assert body["predictions"] == [[2.0, 3.0], [4.0, 5.0], [6.0, 7.0]]
+        assert [len(call.args[0]) for call in model.predict.call_args_list] == [2, 2, 2]
+
+    def test_pushed_sales_start_the_forecast(self, client):
+        """Test sales pushed up to the day before replace the stored lags"""
+        client, _ = client
+        client.post("/api/sales", json={"item_id": [100], "store_id": [0], "d": [1849], "sold": [7]})
+        response = client.post("/api/forecast", json={"item_id": [100], "store_id": [0], "d": 1850, "horizon": 2})
+        assert response.json()["predictions"] == [[8.0], [10.0]]
+
+    def test_errors(self, client):
+        """Test bad horizons, overrides and unknown series are client errors"""
+        client, _ = client
+        series = {"item_id": [100], "store_id": [0], "d": 1850}
+        assert client.post("/api/forecast", json={**series, "horizon": 0}).status_code == 422
+        assert client.post("/api/forecast", json={**series, "horizon": 29}).status_code == 422
+        assert client.post("/api/forecast", json={**series, "overrides": {"sold_lag_1": 1}}).status_code == 422
+        assert client.post("/api/forecast", json={**series, "item_id": [102]}).status_code == 404
+        with patch.object(endpoints_module, 'feature_store', None):
+            assert client.post("/api/forecast", json=series).status_code == 503
@@ -0,0 +1,67 @@
+import asyncio
+import threading
+import pytest
+from app.utils.inference_pool import InferencePool, PoolSaturated
+
+
+class TestInferencePool:
+    """Test cases for the bounded inference executor"""
+
+    def test_runs_off_event_loop(self):
+        """Test calls run on a pool thread and return their result"""
+        pool = InferencePool(max_workers=1, max_queue=1)
+        name = asyncio.run(pool.run(lambda: threading.current_thread().name))
+        assert name.startswith("inference")
+        assert pool.stats()["completed"] == 1
+        pool.shutdown()
+
+    def test_event_loop_stays_responsive(self):
+        """Test other coroutines progress while a call blocks a worker"""
+        pool = InferencePool(max_workers=1, max_queue=0)
+        release = threading.Event()
+
+        async def run():
+            call = asyncio.create_task(pool.run(release.wait, 5))
+            await asyncio.sleep(0.01)
+            progressed = not call.done()
+            release.set()
+            await call
+            return progressed
+
+        assert asyncio.run(run())
+        pool.shutdown()
+
+    def test_rejects_when_full(self):
+        """Test calls beyond workers plus queue fail fast"""
+        pool = InferencePool(max_workers=1, max_queue=1)
+        release = threading.Event()
+
+        async def run():
+            calls = [asyncio.create_task(pool.run(release.wait, 5)) for _ in range(2)]
+            await asyncio.sleep(0.01)
+            with pytest.raises(PoolSaturated):
+                await pool.run(release.wait, 5)
+            stats = pool.stats()
+            release.set()
+            await asyncio.gather(*calls)
+            return stats
+
+        stats = asyncio.run(run())
+        assert stats["running"] == 1
+        assert stats["queued"] == 1
+        assert stats["utilization"] == 1.0
+        assert stats["rejected"] == 1
+        pool.shutdown()
+
+    def test_errors_propagate(self):
+        """Test exceptions from the model call reach the caller"""
+        pool = InferencePool(max_workers=1, max_queue=1)
+
+        def failing():
+            raise RuntimeError("booster failed")
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(pool.run(failing))
+        assert pool.stats()["failed"] == 1
+        assert pool.stats()["queued"] == 0
+        pool.shutdown()
@@ -0,0 +1,121 @@
+import sys
+import re
+import pytest
+from unittest.mock import patch, MagicMock
+
+# Mock mlflow before importing app
+sys.modules['mlflow'] = MagicMock()
+sys.modules['mlflow.sklearn'] = MagicMock()
+sys.modules['mlflow.pyfunc'] = MagicMock()
+
+from fastapi.testclient import TestClient
+import app.api.endpoints as endpoints_module
+from app.main import app
+from app.models.prediction_input import PredictionInput
+from app.utils.metrics import Registry, Histogram, Counter, Gauge
+from app.utils.prediction_cache import PredictionCache
+
+
+def samples(text):
+    """Sample lines of a Prometheus text exposition as {name{labels}: value}"""
+    values = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            key, value = line.rsplit(" ", 1)
+            values[key] = float(value)
+    return values
+
+
+def make_rows(n_rows):
+    return [{**{name: 0 for name in PredictionInput.model_fields}, "sell_price": i + 0.5} for i in range(n_rows)]
+
+
+class TestRegistry:
+    """Test cases for the metric types and their text format"""
+
+    def test_histogram_buckets_cumulative(self):
+        """Test buckets count values up to their bound, inclusive, and add up"""
+        registry = Registry()
+        histogram = registry.register(Histogram("latency_seconds", "Latency", ["stage"], buckets=(0.1, 1.0)))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.labels("predict").observe(value)
+        values = samples(registry.render())
+        assert values['latency_seconds_bucket{stage="predict",le="0.1"}'] == 2
+        assert values['latency_seconds_bucket{stage="predict",le="1"}'] == 3
+        assert values['latency_seconds_bucket{stage="predict",le="+Inf"}'] == 4
+        assert values['latency_seconds_count{stage="predict"}'] == 4
+        assert values['latency_seconds_sum{stage="predict"}'] == pytest.approx(3.65)
+
+    def test_counters_gauges_and_collected_values(self):
+        """Test plain, labelled and collected values are rendered with HELP and TYPE"""
+        registry = Registry()
+        registry.register(Counter("requests_total", "Requests", ["status"])).labels(200).inc(3)
+        registry.register(Gauge("in_flight", "In flight")).inc()
+        registry.register(Gauge("model_info", "Model", ["version"], collect=lambda: {("4",): 1}))
+        registry.register(Gauge("unknown", "Unknown", collect=lambda: None))
+        text = registry.render()
+        assert "# TYPE requests_total counter" in text
+        assert samples(text) == {'requests_total{status="200"}': 3, "in_flight": 1, 'model_info{version="4"}': 1}
+
+    def test_label_values_escaped_and_checked(self):
+        """Test quotes are escaped and a wrong number of labels is refused"""
+        registry = Registry()
+        counter = registry.register(Counter("errors_total", "Errors", ["detail"]))
+        counter.labels('bad "value"').inc()
+        assert 'errors_total{detail="bad \\"value\\""} 1' in registry.render()
+        with pytest.raises(ValueError):
+            counter.labels()
+        with pytest.raises(ValueError):
+            registry.register(Counter("errors_total", "Again"))
+
+
+class TestMetricsEndpoint:
+    """Test cases for /api/metrics"""
+
+    def test_prediction_recorded(self):
+        """Test a batch prediction shows up in stage, batch size and request metrics"""
+        model = MagicMock()
+        model.predict.side_effect = lambda df: df["sell_price"].to_numpy() * 10
+        client = TestClient(app)
+        with patch.object(endpoints_module, 'loaded_model', model), \
+             patch.object(endpoints_module, 'model_info', {"name": "Model", "version": "9", "source": "registry"}), \
+             patch.object(endpoints_module, 'prediction_cache', None):
+            before = samples(client.get("/api/metrics").text)
+            assert client.post("/api/predict-batch", json={"data": make_rows(3)}).status_code == 200
+            response = client.get("/api/metrics")
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        after = samples(response.text)
+
+        def delta(key):
+            return after.get(key, 0) - before.get(key, 0)
+
+        for stage in ("validation", "queue", "features", "predict", "serialization"):
+            assert delta(f'prediction_stage_seconds_count{{stage="{stage}"}}') == 1
+        assert delta('prediction_batch_rows_bucket{endpoint="/api/predict-batch",le="2"}') == 0
+        assert delta('prediction_batch_rows_bucket{endpoint="/api/predict-batch",le="4"}') == 1
+        assert delta('http_requests_total{endpoint="/api/predict-batch",status="200"}') == 1
+        assert after['model_info{name="Model",version="9",source="registry"}'] == 1
+        # The scrape itself is the only request in flight
+        assert after["http_requests_in_flight"] == 1
+        assert "inference_pool_queued" in after
+
+    def test_cached_path_times_features_once(self):
+        """Test a batch through the prediction cache records one features observation"""
+        model = MagicMock()
+        model.predict.side_effect = lambda df: df["sell_price"].to_numpy() * 10
+        client = TestClient(app)
+        with patch.object(endpoints_module, 'loaded_model', model), \
+             patch.object(endpoints_module, 'model_info', {"name": "Model", "version": "9"}), \
+             patch.object(endpoints_module, 'prediction_cache', PredictionCache(100, 60)):
+            before = samples(client.get("/api/metrics").text)
+            assert client.post("/api/predict-batch", json={"data": make_rows(3)}).status_code == 200
+            after = samples(client.get("/api/metrics").text)
+
+        key = 'prediction_stage_seconds_count{stage="features"}'
+        assert after[key] - before.get(key, 0) == 1
+
+    def test_unmatched_paths_share_a_label(self):
+        """Test unknown paths do not create one label value each"""
+        client = TestClient(app)
+        client.get("/no-such-path")
+        assert re.search(r'http_requests_total\{endpoint="unmatched",status="404"\} \d+', client.get("/api/metrics").text)
@@ -0,0 +1,96 @@
+import asyncio
+import pytest
+from app.utils.micro_batcher import MicroBatcher
+
+
+class RecordingModel:
+    """Doubles every item and records the batches it was called with"""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        return [2 * item for item in items]
+
+
+async def submit_all(batcher, items):
+    return await asyncio.gather(*(batcher.submit(item) for item in items))
+
+
+class TestMicroBatcher:
+    """Test cases for coalescing concurrent predictions"""
+
+    def test_concurrent_requests_share_one_call(self):
+        """Test requests queued together are predicted in one call"""
+        model = RecordingModel()
+        batcher = MicroBatcher(model, max_batch_size=64)
+        results = asyncio.run(submit_all(batcher, range(10)))
+        assert results == [2 * i for i in range(10)]
+        assert model.batches == [list(range(10))]
+
+    def test_batches_capped_at_max_size(self):
+        """Test a full queue is flushed without waiting for the window"""
+        model = RecordingModel()
+        batcher = MicroBatcher(model, max_batch_size=4)
+        results = asyncio.run(submit_all(batcher, range(10)))
+        assert results == [2 * i for i in range(10)]
+        assert [len(b) for b in model.batches] == [4, 4, 2]
+
+    def test_sequential_requests_do_not_wait(self):
+        """Test requests arriving one at a time are predicted alone at once"""
+        model = RecordingModel()
+        batcher = MicroBatcher(model, max_batch_size=64, max_wait_ms=1000)
+
+        async def sequential():
+            return [await batcher.submit(i) for i in range(3)]
+
+        results = asyncio.run(sequential())
+        assert results == [0, 2, 4]
+        assert [len(b) for b in model.batches] == [1, 1, 1]
+
+    def test_window_follows_load(self):
+        """Test the window opens under load, grows while it gains rows and closes when it does not"""
+        batcher = MicroBatcher(RecordingModel(), max_batch_size=10, max_wait_ms=8)
+        assert batcher.window() == 0.0
+
+        # Requests 0.1 ms apart: a window is tried after PROBE_EVERY batches
+        batcher._gap = 0.0001
+        batcher._since_probe = MicroBatcher.PROBE_EVERY - 1
+        batcher._adapt(1)
+        assert batcher.window() == pytest.approx(0.001)
+
+        # Rows arrived during the wait: additive increase, capped at max_wait_ms
+        batcher._timed, batcher._ready_rows = True, 1
+        batcher._adapt(3)
+        assert batcher.window() == pytest.approx(0.002)
+        for _ in range(10):
+            batcher._adapt(3)
+        assert batcher.window() == pytest.approx(0.008)
+
+        # Nothing gained: halved until closed
+        for _ in range(6):
+            batcher._adapt(1)
+        assert batcher.window() == 0.0
+
+    def test_errors_reach_every_caller(self):
+        """Test a failed model call fails all requests of the batch"""
+        def failing(items):
+            raise RuntimeError("booster failed")
+
+        batcher = MicroBatcher(failing)
+
+        async def run():
+            return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+        results = asyncio.run(run())
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    def test_stats(self):
+        """Test batch counters"""
+        batcher = MicroBatcher(RecordingModel(), max_batch_size=4)
+        asyncio.run(submit_all(batcher, range(8)))
+        stats = batcher.stats()
+        assert stats["batches"] == 2
+        assert stats["rows"] == 8
+        assert stats["mean_batch_size"] == 4.0
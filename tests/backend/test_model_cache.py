@@ -0,0 +1,141 @@
+import os
+import json
+import shutil
+import numpy as np
+import pytest
+from unittest.mock import patch, MagicMock
+from app.utils.model_cache import ModelCache, directory_digest
+from app.utils.registry_watcher import RegistryWatcher
+from app.utils.load_model import refresh_model_cache, load_model_with_cache
+
+lgb = pytest.importorskip("lightgbm")
+
+
+def write_native_model(model_dir, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(200, 3))
+    y = X[:, 0] * 2 + rng.normal(size=200)
+    booster = lgb.train({"verbose": -1, "num_leaves": 4}, lgb.Dataset(X, y), num_boost_round=3)
+    os.makedirs(model_dir, exist_ok=True)
+    booster.save_model(os.path.join(model_dir, "model.txt"))
+    with open(os.path.join(model_dir, "native_model.json"), "w") as f:
+        json.dump({"library": "lightgbm", "model_file": "model.txt", "model_name": "lgbm"}, f)
+    return model_dir
+
+
+def version_info(version):
+    return {"name": "Model", "version": str(version), "stage": "None", "run_id": f"run-{version}"}
+
+
+def mock_registry(versions, model_dirs):
+    """mlflow double listing `versions` and downloading from `model_dirs` by run id"""
+    registry = MagicMock()
+    registry.tracking.MlflowClient.return_value.get_latest_versions.return_value = [
+        MagicMock(version=str(v), current_stage="None", run_id=f"run-{v}") for v in versions
+    ]
+
+    def download_artifacts(run_id, artifact_path, dst_path):
+        return shutil.copytree(model_dirs[run_id], os.path.join(dst_path, artifact_path))
+
+    registry.artifacts.download_artifacts.side_effect = download_artifacts
+    return registry
+
+
+class TestModelCache:
+    """Test cases for the content-addressed model cache"""
+
+    def test_put_and_latest(self, tmp_path):
+        """Test the newest cached version is returned with its digest"""
+        cache = ModelCache(str(tmp_path / "cache"))
+        assert cache.latest("Model") is None
+        cache.put(version_info(1), write_native_model(str(tmp_path / "m1")))
+        model_dir = write_native_model(str(tmp_path / "m2"), seed=1)
+        entry = cache.put(version_info(2), model_dir)
+        assert cache.latest("Model") == entry
+        assert entry["digest"] == directory_digest(model_dir)
+        assert sorted(os.listdir(cache.path(entry))) == sorted(os.listdir(model_dir))
+
+    def test_identical_content_stored_once(self, tmp_path):
+        """Test versions with the same files share one directory"""
+        cache = ModelCache(str(tmp_path / "cache"))
+        model_dir = write_native_model(str(tmp_path / "m"))
+        first = cache.put(version_info(1), model_dir)
+        second = cache.put(version_info(2), model_dir)
+        assert first["digest"] == second["digest"]
+        assert len(os.listdir(tmp_path / "cache" / "objects")) == 1
+
+    def test_corrupt_entry_skipped(self, tmp_path):
+        """Test an edited cached copy falls back to the previous version"""
+        cache = ModelCache(str(tmp_path / "cache"))
+        old = cache.put(version_info(1), write_native_model(str(tmp_path / "m1")))
+        new = cache.put(version_info(2), write_native_model(str(tmp_path / "m2"), seed=1))
+        with open(os.path.join(cache.path(new), "model.txt"), "a") as f:
+            f.write("truncated")
+        assert cache.latest("Model") == old
+
+    def test_old_versions_pruned(self, tmp_path):
+        """Test only the newest `keep` versions stay on disk"""
+        cache = ModelCache(str(tmp_path / "cache"), keep=2)
+        for version in range(1, 5):
+            cache.put(version_info(version), write_native_model(str(tmp_path / f"m{version}"), seed=version))
+        assert [e["version"] for e in cache.entries("Model")] == ["3", "4"]
+        assert len(os.listdir(tmp_path / "cache" / "objects")) == 2
+
+
+class TestCachedLoading:
+    """Test cases for starting from the cache and refreshing it from the registry"""
+
+    def test_refresh_downloads_new_version_once(self, tmp_path):
+        """Test a new registry version is downloaded and cached only once"""
+        cache = ModelCache(str(tmp_path / "cache"))
+        registry = mock_registry([1, 2], {"run-2": write_native_model(str(tmp_path / "m2"))})
+        with patch('app.utils.load_model.mlflow', registry):
+            entry = refresh_model_cache(cache, "Model")
+            assert refresh_model_cache(cache, "Model") == entry
+        assert entry["version"] == "2"
+        assert entry["run_id"] == "run-2"
+        assert registry.artifacts.download_artifacts.call_count == 1
+
+    def test_starts_from_cache_without_registry(self, tmp_path):
+        """Test a cached model loads while the tracking server is unreachable"""
+        cache = ModelCache(str(tmp_path / "cache"))
+        cache.put(version_info(3), write_native_model(str(tmp_path / "m3")))
+        registry = MagicMock()
+        registry.tracking.MlflowClient.side_effect = ConnectionError("tracking server down")
+        with patch('app.utils.load_model.mlflow', registry):
+            model, info = load_model_with_cache(cache, model_name="Model")
+        assert info["source"] == "cache"
+        assert info["version"] == "3"
+        assert model.predict_matrix(np.zeros((1, 3), dtype=np.float32)).shape == (1,)
+        registry.tracking.MlflowClient.assert_not_called()
+
+    def test_empty_cache_filled_from_registry(self, tmp_path):
+        """Test the first start downloads into the cache and serves that copy"""
+        cache = ModelCache(str(tmp_path / "cache"))
+        registry = mock_registry([1], {"run-1": write_native_model(str(tmp_path / "m1"))})
+        with patch('app.utils.load_model.mlflow', registry):
+            model, info = load_model_with_cache(cache, model_name="Model")
+        assert info["source"] == "cache"
+        assert cache.latest("Model")["digest"] == info["digest"]
+
+
+class TestRegistryWatcher:
+    """Test cases for the background registry check"""
+
+    def test_check_records_latest_and_errors(self):
+        """Test failures are recorded without losing the last known version"""
+        check = MagicMock(side_effect=[version_info(2), ConnectionError("unreachable")])
+        watcher = RegistryWatcher(check, interval_s=60)
+        watcher.check_once()
+        watcher.check_once()
+        stats = watcher.stats()
+        assert stats["latest_cached_version"] == "2"
+        assert stats["last_error"] == "unreachable"
+
+    def test_runs_in_background(self):
+        """Test the first check runs on the watcher thread right after start"""
+        check = MagicMock(return_value=None)
+        watcher = RegistryWatcher(check, interval_s=60)
+        watcher.start()
+        watcher.stop()
+        check.assert_called_once()
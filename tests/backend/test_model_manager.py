@@ -0,0 +1,134 @@
+import sys
+import threading
+import time
+from unittest.mock import patch, MagicMock, PropertyMock
+
+# Mock mlflow before importing app
+sys.modules['mlflow'] = MagicMock()
+sys.modules['mlflow.sklearn'] = MagicMock()
+sys.modules['mlflow.pyfunc'] = MagicMock()
+
+from fastapi.testclient import TestClient
+import app.api.endpoints as endpoints_module
+from app.main import app
+from app.utils.model_manager import ModelManager
+
+
+def entry(version, digest=None):
+    return {"name": "Model", "version": str(version), "digest": digest or f"digest-{version}"}
+
+
+class ServedModel:
+    """Stands in for the endpoints' served model globals"""
+
+    def __init__(self, load_delay=0.0, fail_warm=()):
+        self.info = None
+        self.loads = []
+        self.load_delay = load_delay
+        self.fail_warm = fail_warm
+        self.loading = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def load(self, cached):
+        self.loads.append(cached)
+        self.loading.set()
+        self.release.wait()
+        time.sleep(self.load_delay)
+        info = dict(cached) if cached else {"name": "Model", "version": "1", "digest": "digest-1"}
+        return MagicMock(), info, None
+
+    def warm(self, model, schema):
+        if self.active() and self.loads[-1] and self.loads[-1]["version"] in self.fail_warm:
+            raise ValueError("non-finite predictions")
+
+    def install(self, model, info, schema):
+        self.info = info
+
+    def active(self):
+        return self.info
+
+    def manager(self):
+        return ModelManager(self.load, self.install, self.active, self.warm)
+
+
+class TestModelManager:
+    """Test cases for single-flight loading and background model swaps"""
+
+    def test_concurrent_first_loads_share_one(self):
+        """Test callers arriving during a load wait for it instead of loading again"""
+        served = ServedModel(load_delay=0.05)
+        manager = served.manager()
+        threads = [threading.Thread(target=manager.ensure_loaded) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert served.loads == [None]
+        assert served.info["version"] == "1"
+
+    def test_new_version_swapped_in(self):
+        """Test a new cached version replaces the active one, the same one is skipped"""
+        served = ServedModel()
+        manager = served.manager()
+        manager.ensure_loaded()
+        assert manager.offer(entry(2)) is True
+        assert served.info["version"] == "2"
+        assert manager.offer(entry(2)) is False
+        assert manager.offer(None) is False
+        assert manager.stats()["swaps"] == 1
+
+    def test_failed_candidate_keeps_active_model(self):
+        """Test a version failing its warm-up is not installed nor retried"""
+        served = ServedModel(fail_warm=("2",))
+        manager = served.manager()
+        manager.ensure_loaded()
+        assert manager.offer(entry(2)) is False
+        assert served.info["version"] == "1"
+        assert "non-finite" in manager.stats()["last_error"]
+        assert manager.offer(entry(2)) is False
+        assert len(served.loads) == 2
+
+    def test_pending_version_while_loading(self):
+        """Test the candidate is reported as pending until it is installed"""
+        served = ServedModel()
+        manager = served.manager()
+        manager.ensure_loaded()
+        served.loading.clear()
+        served.release.clear()
+        thread = threading.Thread(target=manager.offer, args=(entry(3),))
+        thread.start()
+        served.loading.wait()
+        assert manager.stats()["pending"]["version"] == "3"
+        assert served.info["version"] == "1"
+        served.release.set()
+        thread.join()
+        assert manager.stats()["pending"] is None
+        assert served.info["version"] == "3"
+
+
+class TestModelInfoVersions:
+    """Test cases for active and pending versions on /model-info"""
+
+    def test_active_and_pending_versions(self):
+        """Test /model-info reports the served version and the one being loaded"""
+        client = TestClient(app)
+        with patch.object(endpoints_module, 'loaded_model', MagicMock()), \
+             patch.object(endpoints_module, 'model_info', {"name": "Model", "version": "4"}), \
+             patch.object(endpoints_module.model_manager, 'pending', {"version": "5", "digest": "d"}):
+            data = client.get("/api/model-info").json()
+        assert data["active_version"] == "4"
+        assert data["pending_version"] == "5"
+        assert data["reload"]["swaps"] == 0
+
+    def test_pending_cleared_between_reads(self):
+        """Test /model-info survives the candidate being installed mid-request"""
+        client = TestClient(app)
+        # The first read sees the candidate, every later one sees it installed
+        pending = PropertyMock(side_effect=[{"version": "5", "digest": "d"}] + [None] * 10)
+        with patch.object(endpoints_module, 'loaded_model', MagicMock()), \
+             patch.object(endpoints_module, 'model_info', {"name": "Model", "version": "4"}), \
+             patch.object(ModelManager, 'pending', pending, create=True):
+            response = client.get("/api/model-info")
+        assert response.status_code == 200
+        assert response.json()["pending_version"] == "5"
@@ -0,0 +1,108 @@
+import sys
+import numpy as np
+from unittest.mock import patch, MagicMock
+
+# Mock mlflow before importing app
+sys.modules['mlflow'] = MagicMock()
+sys.modules['mlflow.sklearn'] = MagicMock()
+sys.modules['mlflow.pyfunc'] = MagicMock()
+
+from fastapi.testclient import TestClient
+import app.api.endpoints as endpoints_module
+from app.main import app
+from app.models.prediction_input import PredictionInput
+from app.utils.prediction_cache import PredictionCache
+
+
+def rows(*values):
+    return np.array([[v, 1.0] for v in values], dtype=np.float32)
+
+
+def make_input(**overrides):
+    values = {name: 0 for name in PredictionInput.model_fields}
+    values.update(overrides)
+    return values
+
+
+def sell_price_model():
+    """Predicts each row's sell_price, recording how many rows it was called with"""
+    model = MagicMock()
+    model.predict.side_effect = lambda df: df["sell_price"].to_numpy() * 10
+    return model
+
+
+class TestPredictionCache:
+    """Test cases for the feature-row prediction cache"""
+
+    def test_hits_and_misses(self):
+        """Test stored rows are returned and only unseen rows reported missing"""
+        cache, model = PredictionCache(), object()
+        values, missing = cache.lookup(model, rows(1, 2))
+        assert missing == [0, 1]
+        cache.store(model, rows(1, 2), [10.0, 20.0])
+        values, missing = cache.lookup(model, rows(2, 3, 1))
+        assert missing == [1]
+        assert values[0] == 20.0 and values[2] == 10.0
+        assert cache.stats()["hits"] == 2
+        assert cache.stats()["misses"] == 3
+
+    def test_least_recently_used_evicted(self):
+        """Test the oldest unused row is dropped once the cache is full"""
+        cache, model = PredictionCache(max_entries=2), object()
+        cache.lookup(model, rows())
+        cache.store(model, rows(1, 2), [10.0, 20.0])
+        cache.lookup(model, rows(1))
+        cache.store(model, rows(3), [30.0])
+        _, missing = cache.lookup(model, rows(1, 2, 3))
+        assert missing == [1]
+        assert cache.stats()["evictions"] == 1
+
+    def test_entries_expire(self):
+        """Test rows older than the TTL are predicted again"""
+        cache, model = PredictionCache(ttl_s=0.0), object()
+        cache.lookup(model, rows())
+        cache.store(model, rows(1), [10.0])
+        _, missing = cache.lookup(model, rows(1))
+        assert missing == [0]
+
+    def test_model_swap_invalidates(self):
+        """Test a new model empties the cache and late results of the old one are dropped"""
+        cache, old, new = PredictionCache(), object(), object()
+        cache.lookup(old, rows())
+        cache.store(old, rows(1), [10.0])
+        _, missing = cache.lookup(new, rows(1))
+        assert missing == [0]
+        cache.store(old, rows(2), [20.0])
+        assert cache.stats()["entries"] == 0
+        assert cache.stats()["invalidations"] == 1
+
+
+class TestCachedEndpoints:
+    """Test cases for serving repeated rows from the prediction cache"""
+
+    def test_repeated_predict_served_from_cache(self):
+        """Test an identical /predict request does not call the model again"""
+        client, model = TestClient(app), sell_price_model()
+        schema = {"features": [name for name in PredictionInput.model_fields if name != "id"]}
+        with patch.object(endpoints_module, 'loaded_model', model), \
+             patch.object(endpoints_module, 'model_info', {"name": "Model", "version": "1"}), \
+             patch.object(endpoints_module, 'feature_schema', schema):
+            first = client.post("/api/predict", json=make_input(sell_price=2.5))
+            # `id` is not a model feature, so the row is the same
+            second = client.post("/api/predict", json=make_input(sell_price=2.5, id=9))
+        assert first.json()["prediction"] == second.json()["prediction"] == 25.0
+        assert model.predict.call_count == 1
+
+    def test_batch_predicts_only_missing_rows(self):
+        """Test /predict-batch sends only uncached rows to the model"""
+        client, model = TestClient(app), sell_price_model()
+        with patch.object(endpoints_module, 'loaded_model', model), \
+             patch.object(endpoints_module, 'model_info', {"name": "Model", "version": "1"}):
+            client.post("/api/predict-batch", json={"data": [make_input(sell_price=1.0), make_input(sell_price=2.0)]})
+            response = client.post("/api/predict-batch", json={"data": [
+                make_input(sell_price=2.0), make_input(sell_price=3.0), make_input(sell_price=1.0)
+            ]})
+            stats = client.get("/api/executor-metrics").json()["prediction_cache"]
+        assert response.json()["predictions"] == [20.0, 30.0, 10.0]
+        assert len(model.predict.call_args_list[-1].args[0]) == 1
+        assert stats["hits"] >= 2
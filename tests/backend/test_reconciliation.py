@@ -0,0 +1,143 @@
+import pytest
+import numpy as np
+import pandas as pd
+from app.utils.reconciliation import (
+    HIERARCHY_LEVELS,
+    get_hierarchy,
+    reconcile,
+    reconcile_batch,
+    shrink_covariance,
+)
+from src.hierarchy import M5_LEVELS
+
+
+@pytest.fixture
+def batch():
+    """Three items in two categories, two stores in two states, two days"""
+    rows = []
+    for d in [1000, 1001]:
+        for item_id, dept_id, cat_id in [(0, 0, 0), (1, 0, 0), (2, 1, 1)]:
+            for store_id, state_id in [(0, 0), (1, 1)]:
+                rows.append({
+                    'item_id': item_id, 'dept_id': dept_id, 'cat_id': cat_id,
+                    'store_id': store_id, 'state_id': state_id, 'd': d,
+                })
+    df = pd.DataFrame(rows)
+    predictions = np.arange(len(df), dtype=float)
+    return df, predictions
+
+
+class TestReconciliation:
+    """Test cases for hierarchical forecast reconciliation"""
+
+    def test_bottom_up_totals(self, batch):
+        """Test that bottom-up aggregates are sums of the bottom predictions"""
+        df, predictions = batch
+
+        days, hierarchy, reconciled = reconcile_batch(df, predictions)
+
+        assert list(days) == [1000, 1001]
+        total = reconciled[hierarchy.index['total']]
+        assert list(total) == [predictions[:6].sum(), predictions[6:].sum()]
+        store_0 = reconciled[hierarchy.index['store_id=0']]
+        assert store_0[0] == predictions[[0, 2, 4]].sum()
+
+    def test_hierarchy_is_cached(self, batch):
+        """Test that the same catalogue reuses the summing matrix"""
+        df, predictions = batch
+        _, first, _ = reconcile_batch(df, predictions)
+        _, again, _ = reconcile_batch(df, predictions * 2)
+
+        assert again is first
+
+    def test_mint_shrink_is_coherent(self, batch):
+        """Test that MinT output is coherent and keeps coherent input unchanged"""
+        df, predictions = batch
+        rng = np.random.default_rng(0)
+        _, hierarchy, bottom_up = reconcile_batch(df, predictions)
+        S = hierarchy.summing_matrix
+        residuals = rng.normal(size=(40, S.shape[0]))
+
+        # Coherent base forecasts are a fixed point
+        unchanged = reconcile(hierarchy, bottom_up, 'mint_shrink', residuals)
+        np.testing.assert_allclose(unchanged, bottom_up, atol=1e-8)
+
+        # Incoherent base forecasts come out coherent
+        base = bottom_up + rng.normal(size=bottom_up.shape)
+        for res in [residuals, None]:
+            reconciled = reconcile(hierarchy, base, 'mint_shrink', res)
+            np.testing.assert_allclose(S @ reconciled[-hierarchy.n_bottom:], reconciled, atol=1e-8)
+
+    def test_aggregate_forecast_override(self, batch):
+        """Test that a planner total pulls the reconciled total towards it"""
+        df, predictions = batch
+        _, hierarchy, bottom_up = reconcile_batch(df, predictions)
+        target = list(bottom_up[hierarchy.index['total']] + 12.0)
+
+        _, _, reconciled = reconcile_batch(
+            df, predictions, 'mint_shrink', aggregate_forecasts={'total': target}
+        )
+
+        total = reconciled[hierarchy.index['total']]
+        assert (total > bottom_up[hierarchy.index['total']]).all()
+        assert (total < np.array(target)).all()
+
+    def test_unknown_node(self, batch):
+        """Test that an unknown node label is rejected"""
+        df, predictions = batch
+
+        with pytest.raises(ValueError, match="Unknown hierarchy node"):
+            reconcile_batch(df, predictions, 'mint_shrink', aggregate_forecasts={'store_id=9': [1.0, 2.0]})
+
+    def test_shrink_covariance_keeps_variances(self):
+        """Test that shrinkage only scales the off-diagonal"""
+        residuals = np.random.default_rng(1).normal(size=(30, 4))
+        cov = residuals.T @ residuals / 30
+
+        shrunk = shrink_covariance(residuals)
+
+        np.testing.assert_allclose(np.diag(shrunk), np.diag(cov))
+        assert np.all(np.abs(shrunk) <= np.abs(cov) + 1e-12)
+
+    def test_shrink_covariance_matches_dense_estimate(self):
+        """Test that the shrinkage intensity matches the node x node formula"""
+        residuals = np.random.default_rng(2).normal(size=(12, 6))
+        residuals[:, 1] += residuals[:, 0]
+        n = residuals.shape[0]
+        cov = residuals.T @ residuals / n
+        scaled = residuals / np.sqrt(np.diag(cov))
+        corr = scaled.T @ scaled / n
+        var_corr = ((scaled ** 2).T @ (scaled ** 2) - n * corr ** 2) / (n * (n - 1))
+        off = ~np.eye(6, dtype=bool)
+        lam = min(max(var_corr[off].sum() / (corr[off] ** 2).sum(), 0.0), 1.0)
+
+        np.testing.assert_allclose(shrink_covariance(residuals)[off], (1 - lam) * cov[off])
+
+    def test_mint_shrink_matches_dense_solve(self, batch):
+        """Test that the low-rank solve matches MinT with a dense W"""
+        df, predictions = batch
+        rng = np.random.default_rng(3)
+        _, hierarchy, bottom_up = reconcile_batch(df, predictions)
+        S = hierarchy.summing_matrix.toarray()
+        residuals = rng.normal(size=(40, S.shape[0]))
+        base = bottom_up + rng.normal(size=bottom_up.shape)
+
+        w_inv_S = np.linalg.solve(shrink_covariance(residuals), S)
+        expected = S @ np.linalg.solve(S.T @ w_inv_S, w_inv_S.T @ base)
+
+        np.testing.assert_allclose(reconcile(hierarchy, base, 'mint_shrink', residuals), expected, atol=1e-6)
+
+    def test_duplicate_rows_rejected(self, batch):
+        """Test that a (series, day) given twice is rejected instead of summed"""
+        df, predictions = batch
+        doubled = pd.concat([df, df.iloc[[0]]], ignore_index=True)
+
+        with pytest.raises(ValueError, match="duplicate"):
+            reconcile_batch(doubled, np.append(predictions, 1.0))
+
+    def test_levels_shared_with_training(self):
+        """Test that serving and WRMSSE use the same hierarchy definition"""
+        from src import wrmsse
+
+        assert wrmsse.M5_LEVELS is M5_LEVELS
+        assert HIERARCHY_LEVELS is M5_LEVELS
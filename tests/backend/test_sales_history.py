@@ -0,0 +1,197 @@
+import sys
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import patch, MagicMock
+
+# Mock mlflow before importing app
+sys.modules['mlflow'] = MagicMock()
+sys.modules['mlflow.sklearn'] = MagicMock()
+sys.modules['mlflow.pyfunc'] = MagicMock()
+
+from fastapi.testclient import TestClient
+import app.api.endpoints as endpoints_module
+from app.main import app, start_sales_snapshots
+from app.models.prediction_input import PredictionInput
+from app.utils.feature_store import FeatureStore, build_feature_store
+from app.utils.sales_history import SalesHistory, SalesError, SnapshotWriter, LAGS
+
+
+def features_at(history, item_id, store_id, d):
+    return {name: values[0] for name, values in history.features([item_id], [store_id], [d]).items()}
+
+
+class TestSalesHistory:
+    """Test cases for ring-buffer sales history and derived features"""
+
+    def test_model_lags(self):
+        """Test the lags follow the sold_lag_* fields of PredictionInput"""
+        assert LAGS == (1, 2, 3, 6, 12, 24, 36)
+        assert SalesHistory().window == 36
+
+    def test_matches_pandas(self):
+        """Test features equal the training notebook's shift, rolling and expanding means"""
+        rng = np.random.default_rng(0)
+        frame = pd.DataFrame([
+            {"item_id": item_id, "store_id": store_id, "d": d, "sold": int(rng.integers(0, 9))}
+            for item_id, store_id, first in [(5, 0, 1), (7, 2, 20), (3000, 9, 3)]
+            for d in range(first, 101)
+        ])
+        history = SalesHistory(capacity=1)
+        # Pushed one day for every series at a time, in shuffled order
+        for _, day in frame.sample(frac=1, random_state=0).groupby("d"):
+            history.push(day["item_id"], day["store_id"], day["d"], day["sold"])
+
+        for (item_id, store_id), series in frame.groupby(["item_id", "store_id"]):
+            sold = series["sold"].reset_index(drop=True)
+            # The last pushed day gets the training definitions, which include day t
+            features = features_at(history, item_id, store_id, 100)
+            assert features["rolling_sold_mean"] == pytest.approx(sold.rolling(window=7).mean().iloc[-1])
+            assert features["expanding_sold_mean"] == pytest.approx(sold.expanding(2).mean().iloc[-1])
+            # The next day, not pushed yet, falls back to the days before it
+            features = features_at(history, item_id, store_id, 101)
+            for lag in LAGS:
+                assert features[f"sold_lag_{lag}"] == sold.shift(lag - 1).fillna(0).iloc[-1]
+            assert features["rolling_sold_mean"] == pytest.approx(sold.iloc[-7:].mean())
+            assert features["expanding_sold_mean"] == pytest.approx(sold.mean())
+
+    def test_expanding_needs_two_days(self):
+        """Test the expanding mean through day t is NaN for a single day, as expanding(2) is"""
+        history = SalesHistory()
+        history.push([1], [0], [10], [4])
+        assert np.isnan(features_at(history, 1, 0, 10)["expanding_sold_mean"])
+        history.push([1], [0], [11], [6])
+        assert features_at(history, 1, 0, 11)["expanding_sold_mean"] == pytest.approx(5)
+
+    def test_unknown_values_are_nan(self):
+        """Test days not pushed yet and unknown series give NaN, days before the first give 0"""
+        history = SalesHistory()
+        history.push([1, 1, 1], [0, 0, 0], [10, 11, 12], [4, 5, 6])
+        features = features_at(history, 1, 0, 13)
+        assert (features["sold_lag_1"], features["sold_lag_6"]) == (6, 0)
+        assert features["rolling_sold_mean"] == pytest.approx(15 / 7)
+        later = features_at(history, 1, 0, 15)
+        assert np.isnan(later["sold_lag_1"]) and later["sold_lag_3"] == 6
+        assert np.isnan(later["expanding_sold_mean"])
+        assert all(np.isnan(value) for value in features_at(history, 2, 0, 13).values())
+
+    def test_corrections(self):
+        """Test a day pushed again replaces its value in lags and means"""
+        history = SalesHistory()
+        history.push([1] * 3, [0] * 3, [1, 2, 3], [3, 3, 3])
+        history.push([1, 1], [0, 0], [2, 4], [0, 6])
+        features = features_at(history, 1, 0, 5)
+        assert (features["sold_lag_1"], features["sold_lag_3"]) == (6, 0)
+        assert features["expanding_sold_mean"] == pytest.approx(12 / 4)
+
+    def test_rejected_batch_changes_nothing(self):
+        """Test gaps, duplicates, stale corrections and negative values are refused as a whole"""
+        history = SalesHistory()
+        history.push([1], [0], [50], [1])
+        version = history.version
+        for batch in [
+            ([2, 1], [0, 0], [1, 52], [1, 1]),
+            ([1, 1], [0, 0], [51, 51], [1, 1]),
+            ([1], [0], [10], [1]),
+            ([1], [0], [51], [-1]),
+        ]:
+            with pytest.raises(SalesError):
+                history.push(*batch)
+        assert history.version == version
+        assert len(history) == 1
+
+    def test_snapshot_restore(self, tmp_path):
+        """Test a restored history derives the same features and accepts the next day"""
+        history = SalesHistory()
+        path = str(tmp_path / "sales.npz")
+        writer = SnapshotWriter(history, path)
+        assert not writer.write_if_changed()
+        history.push([1, 1, 2], [0, 0, 3], [1, 2, 7], [2, 4, 9])
+        assert writer.write_if_changed()
+        assert not writer.write_if_changed()
+
+        restored = SalesHistory.restore(path)
+        keys = ([1, 2, 9], [0, 3, 9], [3, 8, 1])
+        for name, values in history.features(*keys).items():
+            np.testing.assert_array_equal(restored.features(*keys)[name], values)
+        restored.push([1], [0], [3], [1])
+        assert features_at(restored, 1, 0, 4)["expanding_sold_mean"] == pytest.approx(7 / 3)
+
+    def test_concurrent_snapshots_leave_one_file(self, tmp_path):
+        """Test writers snapshotting to the same path never share a temporary file"""
+        histories = [SalesHistory() for _ in range(4)]
+        for i, history in enumerate(histories):
+            history.push([1], [0], [1], [i])
+        path = str(tmp_path / "sales.npz")
+        threads = [threading.Thread(target=history.snapshot, args=(path,)) for history in histories for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert [p.name for p in tmp_path.iterdir()] == ["sales.npz"]
+        assert len(SalesHistory.restore(path)) == 1
+
+
+class TestSalesEndpoints:
+    """Test cases for /sales and live features in /predict-keys"""
+
+    @pytest.fixture
+    def client(self, tmp_path):
+        rows = []
+        for item_id in (100, 101):
+            row = {name: 0 for name in PredictionInput.model_fields}
+            row.update(item_id=item_id, store_id=0, d=1850, sold_lag_1=1)
+            rows.append(row)
+        build_feature_store(pd.DataFrame(rows), str(tmp_path))
+        model = MagicMock()
+        model.predict.side_effect = lambda df: df["sold_lag_1"].to_numpy() * 1.0
+        with patch.object(endpoints_module, 'loaded_model', model), \
+             patch.object(endpoints_module, 'model_info', {"name": "Model", "version": "1"}), \
+             patch.object(endpoints_module, 'prediction_cache', None), \
+             patch.object(endpoints_module, 'feature_store', FeatureStore.load(str(tmp_path))), \
+             patch.object(endpoints_module, 'sales_history', SalesHistory()):
+            yield TestClient(app)
+
+    def test_pushed_sales_update_predictions(self, client):
+        """Test pushed days replace stored lags, for series with history only"""
+        keys = {"item_id": [100, 101], "store_id": [0, 0], "d": [1850, 1850]}
+        assert client.post("/api/predict-keys", json=keys).json()["predictions"] == [1.0, 1.0]
+
+        response = client.post("/api/sales", json={"item_id": [100, 100], "store_id": [0, 0], "d": [1848, 1849], "sold": [5, 7]})
+        assert response.json() == {"pushed": 2, "new_series": 1, "series": 1}
+        assert client.post("/api/predict-keys", json=keys).json()["predictions"] == [7.0, 1.0]
+
+        features = client.post("/api/sales/features", json={"item_id": [100, 101], "store_id": [0, 0], "d": [1850, 1850]}).json()
+        assert features["sold_lag_2"] == [5.0, None]
+        assert features["expanding_sold_mean"] == [6.0, None]
+
+    def test_invalid_sales(self, client):
+        """Test malformed or out-of-order sales are rejected"""
+        base = {"item_id": [100], "store_id": [0], "d": [1849], "sold": [1]}
+        assert client.post("/api/sales", json=base).status_code == 200
+        assert client.post("/api/sales", json={**base, "d": [1851]}).status_code == 422
+        assert client.post("/api/sales", json={**base, "sold": ["a"]}).status_code == 422
+
+    def test_pushes_refused_with_several_workers(self, client):
+        """Test /sales is refused when pre-forked workers would each keep a history"""
+        with patch.object(endpoints_module, 'sales_push_enabled', False):
+            response = client.post("/api/sales", json={"item_id": [100], "store_id": [0], "d": [1849], "sold": [1]})
+        assert response.status_code == 503
+        assert len(endpoints_module.sales_history) == 0
+
+
+class TestSalesSnapshots:
+    """Test cases for restoring and writing snapshots at startup"""
+
+    def test_workers_only_restore(self, tmp_path):
+        """Test several workers restore the snapshot but start no writer"""
+        path = str(tmp_path / "sales.npz")
+        history = SalesHistory()
+        history.push([1], [0], [1], [3])
+        history.snapshot(path)
+        with patch('app.main.SALES_HISTORY_PATH', path), \
+             patch.object(endpoints_module, 'sales_history', SalesHistory()), \
+             patch.object(endpoints_module, 'sales_push_enabled', False):
+            assert start_sales_snapshots(endpoints_module) is None
+            assert len(endpoints_module.sales_history) == 1
@@ -0,0 +1,163 @@
+import sys
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from unittest.mock import patch, MagicMock
+
+# Mock mlflow before importing app
+sys.modules['mlflow'] = MagicMock()
+sys.modules['mlflow.sklearn'] = MagicMock()
+sys.modules['mlflow.pyfunc'] = MagicMock()
+
+from fastapi.testclient import TestClient
+import app.api.endpoints as endpoints_module
+from app.main import app
+from app.models.prediction_input import PredictionInput
+from app.utils.feature_vector import FeatureLayout
+from app.utils.scoring_jobs import ScoringJobs, JobError
+
+
+def make_frame(n_rows):
+    frame = pd.DataFrame({name: np.zeros(n_rows, dtype=np.int64) for name in PredictionInput.model_fields})
+    frame["id"] = np.arange(n_rows)
+    frame["sell_price"] = np.arange(n_rows) + 0.5
+    return frame
+
+
+def make_model(on_predict=None):
+    """Model predicting 10 x sell_price through the DataFrame path"""
+    model = MagicMock()
+
+    def predict(df):
+        if on_predict is not None:
+            on_predict()
+        return df["sell_price"].to_numpy() * 10
+
+    model.predict.side_effect = predict
+    return model
+
+
+def make_jobs(tmp_path, model, version="1", **kwargs):
+    info = {"name": "Model", "version": version, "digest": "sha-" + version}
+    return ScoringJobs(
+        str(tmp_path / "jobs"), str(tmp_path / "data"), lambda: (model, FeatureLayout(None), info),
+        chunk_rows=4, **kwargs
+    )
+
+
+@pytest.fixture
+def datasets(tmp_path):
+    (tmp_path / "data").mkdir()
+    frame = make_frame(10)
+    frame.to_parquet(tmp_path / "data" / "CA_1_9.parquet", index=False)
+    frame.to_csv(tmp_path / "data" / "CA_1_9.csv", index=False)
+    return frame
+
+
+def rows_predicted(model):
+    return sum(len(call.args[0]) for call in model.predict.call_args_list)
+
+
+class TestScoringJobs:
+    """Test cases for chunked, resumable scoring jobs"""
+
+    @pytest.mark.parametrize("dataset", ["CA_1_9.parquet", "CA_1_9.csv"])
+    def test_job_scores_every_row(self, tmp_path, datasets, dataset):
+        """Test a job predicts the dataset in chunks into one Parquet file"""
+        model = make_model()
+        jobs = make_jobs(tmp_path, model, workers=2)
+        job = jobs.submit(dataset)
+        assert jobs.run_pending() == 1
+
+        job = jobs.get(job["id"])
+        assert job["status"] == "completed"
+        assert (job["total_rows"], job["total_chunks"], job["rows_done"], job["progress"]) == (10, 3, 10, 1.0)
+        result = pq.read_table(jobs.result_path(job["id"])).to_pandas()
+        assert result["id"].tolist() == list(range(10))
+        assert result["prediction"].tolist() == (datasets["sell_price"] * 10).tolist()
+        # Two workers predict chunks in any order; the result keeps row order
+        assert sorted(len(call.args[0]) for call in model.predict.call_args_list) == [2, 4, 4]
+
+    def test_interrupted_job_resumes_at_next_chunk(self, tmp_path, datasets):
+        """Test a restarted runner predicts only the chunks without a written part"""
+        first = make_jobs(tmp_path, None)
+        # Stops the runner while its first chunk is predicted, as a shutdown would
+        first.served = lambda: (make_model(on_predict=first._stop.set), FeatureLayout(None), {"version": "1"})
+        job = first.submit("CA_1_9.parquet")
+        first.run_pending()
+        interrupted = first.get(job["id"])
+        assert interrupted["status"] == "running"
+        assert 0 < interrupted["rows_done"] < 10
+
+        model = make_model()
+        restarted = make_jobs(tmp_path, model)
+        restarted.served = lambda: (model, FeatureLayout(None), {"version": "1"})
+        restarted.run_pending()
+        assert restarted.get(job["id"])["status"] == "completed"
+        assert rows_predicted(model) == 10 - interrupted["rows_done"]
+        result = pq.read_table(restarted.result_path(job["id"])).to_pandas()
+        assert result["prediction"].tolist() == (datasets["sell_price"] * 10).tolist()
+
+    def test_model_change_starts_over(self, tmp_path, datasets):
+        """Test parts predicted by another model version are not reused"""
+        first = make_jobs(tmp_path, None)
+        first.served = lambda: (make_model(on_predict=first._stop.set), FeatureLayout(None), {"version": "1"})
+        job = first.submit("CA_1_9.parquet")
+        first.run_pending()
+
+        model = make_model()
+        restarted = make_jobs(tmp_path, model, version="2")
+        restarted.run_pending()
+        assert rows_predicted(model) == 10
+        assert restarted.get(job["id"])["model"]["version"] == "2"
+
+    def test_invalid_rows_fail_the_job(self, tmp_path, datasets):
+        """Test a validation error is recorded with the row it happened at"""
+        frame = make_frame(10)
+        frame["sell_price"] = frame["sell_price"].astype(float)
+        frame.loc[6, "sell_price"] = np.nan
+        frame.to_parquet(tmp_path / "data" / "CA_1_bad.parquet", index=False)
+        jobs = make_jobs(tmp_path, make_model())
+        job = jobs.submit("CA_1_bad.parquet")
+        jobs.run_pending()
+        job = jobs.get(job["id"])
+        assert job["status"] == "failed"
+        assert "row 6" in job["error"]
+
+    def test_datasets_restricted(self, tmp_path, datasets):
+        """Test only matching Parquet or CSV files inside the data directory are accepted"""
+        (tmp_path / "secret.parquet").write_bytes(b"")
+        jobs = make_jobs(tmp_path, make_model())
+        for dataset in ["../secret.parquet", "other.parquet", "CA_1_9.pkl"]:
+            with pytest.raises(JobError):
+                jobs.submit(dataset)
+        with pytest.raises(FileNotFoundError):
+            jobs.submit("CA_1_404.parquet")
+        assert jobs.get("../../etc") is None
+
+
+class TestScoringJobEndpoints:
+    """Test cases for /api/jobs"""
+
+    def test_submit_poll_and_download(self, tmp_path, datasets):
+        """Test a submitted job can be polled and its predictions downloaded"""
+        jobs = make_jobs(tmp_path, make_model())
+        client = TestClient(app)
+        with patch.object(endpoints_module, 'scoring_jobs', jobs):
+            response = client.post("/api/jobs", json={"dataset": "CA_1_9.parquet"})
+            assert response.status_code == 202
+            job_id = response.json()["id"]
+            assert client.get(f"/api/jobs/{job_id}/result").status_code == 409
+
+            jobs.run_pending()
+            assert client.get(f"/api/jobs/{job_id}").json()["status"] == "completed"
+            assert [job["id"] for job in client.get("/api/jobs").json()["jobs"]] == [job_id]
+            result = client.get(f"/api/jobs/{job_id}/result")
+            assert result.status_code == 200
+            assert pq.read_table(pa.BufferReader(result.content)).num_rows == 10
+
+            assert client.post("/api/jobs", json={"dataset": "CA_1_404.parquet"}).status_code == 404
+            assert client.post("/api/jobs", json={"dataset": "../x.csv"}).status_code == 422
+            assert client.get("/api/jobs/unknown").status_code == 404
@@ -0,0 +1,48 @@
+import sys
+import socket
+from unittest.mock import patch, MagicMock
+
+# Mock mlflow before importing app
+sys.modules['mlflow'] = MagicMock()
+sys.modules['mlflow.sklearn'] = MagicMock()
+sys.modules['mlflow.pyfunc'] = MagicMock()
+
+from fastapi.testclient import TestClient
+import app.api.endpoints as endpoints_module
+from app.main import app
+from app.serve import load_shared_model, bind_socket
+
+
+class TestPreforkServing:
+    """Test cases for loading the model once before forking workers"""
+
+    def test_parent_loads_model_for_workers(self):
+        """Test the parent sets the model every worker inherits"""
+        model, info, schema = MagicMock(), {"name": "local"}, {"features": ["sell_price"]}
+        with patch('app.api.endpoints.load_serving_model', return_value=(model, info, schema)):
+            with patch.object(endpoints_module, 'loaded_model', None), \
+                 patch.object(endpoints_module, 'model_info', {}), \
+                 patch.object(endpoints_module, 'feature_schema', None):
+                load_shared_model()
+                assert endpoints_module.loaded_model is model
+                assert endpoints_module.model_info == info
+                assert endpoints_module.feature_schema == schema
+
+    def test_worker_startup_skips_loading(self):
+        """Test a worker with an inherited model does not load it again"""
+        with patch('app.api.endpoints.load_serving_model') as load, \
+             patch('app.main.start_registry_watcher', return_value=None), \
+             patch.object(endpoints_module.inference_pool, 'shutdown'):
+            with patch.object(endpoints_module, 'loaded_model', MagicMock()):
+                with TestClient(app) as client:
+                    assert client.get("/api/health").status_code == 200
+        load.assert_not_called()
+
+    def test_socket_is_inheritable(self):
+        """Test the listening socket can be shared with forked workers"""
+        sock = bind_socket("127.0.0.1", 0)
+        try:
+            assert sock.get_inheritable()
+            assert sock.getsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR)
+        finally:
+            sock.close()
@@ -0,0 +1,164 @@
+import sys
+import gzip
+import json
+import msgpack
+import numpy as np
+import pytest
+import zstandard
+from fastapi import HTTPException
+from unittest.mock import patch, MagicMock
+
+# Mock mlflow before importing app
+sys.modules['mlflow'] = MagicMock()
+sys.modules['mlflow.sklearn'] = MagicMock()
+sys.modules['mlflow.pyfunc'] = MagicMock()
+
+from fastapi.testclient import TestClient
+import app.api.endpoints as endpoints_module
+from app.main import app
+from app.models.prediction_input import PredictionInput
+from app.utils.transport import CompressionMiddleware, negotiate, accepted_encoding, JSON, MSGPACK, FLOAT32
+
+
+def make_rows(n_rows):
+    rows = []
+    for i in range(n_rows):
+        row = {name: 0 for name in PredictionInput.model_fields}
+        row["sell_price"] = i + 0.5
+        rows.append(row)
+    return rows
+
+
+@pytest.fixture
+def client():
+    """Client of the app serving a model predicting 10 x sell_price"""
+    model = MagicMock()
+    model.predict.side_effect = lambda df: df["sell_price"].to_numpy() * 10
+    with patch.object(endpoints_module, 'loaded_model', model), \
+         patch.object(endpoints_module, 'model_info', {"name": "Model", "version": "3"}), \
+         patch.object(endpoints_module, 'prediction_cache', None):
+        yield TestClient(app)
+
+
+class TestNegotiation:
+    """Test cases for Accept and Accept-Encoding handling"""
+
+    def test_media_types(self):
+        """Test the first acceptable type wins, JSON by default"""
+        offered = (JSON, MSGPACK, FLOAT32)
+        assert negotiate(None, offered) == JSON
+        assert negotiate("text/html, */*;q=0.8", offered) == JSON
+        assert negotiate("application/x-msgpack", offered) == MSGPACK
+        assert negotiate("application/octet-stream;q=0, application/msgpack", offered) == MSGPACK
+
+    def test_not_acceptable(self):
+        """Test a request accepting nothing offered is refused with 406"""
+        with pytest.raises(HTTPException) as error:
+            negotiate("application/octet-stream", (JSON, MSGPACK))
+        assert error.value.status_code == 406
+
+    def test_encodings(self):
+        """Test zstd is preferred over gzip and q=0 excludes an encoding"""
+        assert accepted_encoding("gzip, deflate, zstd") == "zstd"
+        assert accepted_encoding("gzip, zstd;q=0") == "gzip"
+        assert accepted_encoding("br") is None
+
+
+class TestResponseFormats:
+    """Test cases for negotiated prediction responses"""
+
+    def test_json_default(self, client):
+        """Test batch predictions are still plain JSON by default"""
+        response = client.post("/api/predict-batch", json={"data": make_rows(3)})
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == {"predictions": [5.0, 15.0, 25.0], "model_name": "Model", "model_version": "3"}
+
+    def test_msgpack(self, client):
+        """Test MessagePack carries the same fields"""
+        response = client.post("/api/predict-batch", json={"data": make_rows(3)}, headers={"Accept": "application/msgpack"})
+        content = msgpack.unpackb(response.content)
+        assert content["predictions"] == [5.0, 15.0, 25.0]
+        assert content["model_version"] == "3"
+
+    def test_raw_float32(self, client):
+        """Test the raw body is little-endian float32 with the model in headers"""
+        response = client.post("/api/predict-batch", json={"data": make_rows(3)}, headers={"Accept": "application/octet-stream"})
+        assert np.frombuffer(response.content, dtype="<f4").tolist() == [5.0, 15.0, 25.0]
+        assert response.headers["x-model-name"] == "Model"
+        assert response.headers["x-model-version"] == "3"
+        assert response.headers["x-rows"] == "3"
+
+    def test_single_prediction_raw(self, client):
+        """Test /predict offers the raw format too"""
+        response = client.post("/api/predict", json=make_rows(1)[0], headers={"Accept": "application/octet-stream"})
+        assert np.frombuffer(response.content, dtype="<f4").tolist() == [5.0]
+
+    def test_unacceptable_format(self, client):
+        """Test an unsupported Accept header fails before predicting"""
+        response = client.post("/api/predict-batch", json={"data": make_rows(1)}, headers={"Accept": "text/csv"})
+        assert response.status_code == 406
+        endpoints_module.loaded_model.predict.assert_not_called()
+
+
+class TestCompression:
+    """Test cases for gzip and zstd transport"""
+
+    def test_compressed_requests(self, client):
+        """Test gzip and zstd request bodies are decompressed"""
+        body = json.dumps({"data": make_rows(3)}).encode()
+        for encoding, compressed in [("gzip", gzip.compress(body)), ("zstd", zstandard.ZstdCompressor().compress(body))]:
+            response = client.post(
+                "/api/predict-batch", content=compressed,
+                headers={"Content-Type": "application/json", "Content-Encoding": encoding}
+            )
+            assert response.status_code == 200
+            assert response.json()["predictions"] == [5.0, 15.0, 25.0]
+
+    def test_corrupt_and_unknown_encodings(self, client):
+        """Test bodies that cannot be decompressed are rejected"""
+        headers = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+        assert client.post("/api/predict-batch", content=b"not gzip", headers=headers).status_code == 400
+        headers["Content-Encoding"] = "br"
+        assert client.post("/api/predict-batch", content=b"{}", headers=headers).status_code == 415
+
+    def test_decompressed_size_limit(self):
+        """Test bodies inflating past the limit are refused with 413, smaller ones pass"""
+        from fastapi import FastAPI, Request
+
+        echo = FastAPI()
+
+        @echo.post("/echo")
+        async def body_size(request: Request):
+            return {"size": len(await request.body())}
+
+        echo.add_middleware(CompressionMiddleware, max_body_size=64 * 1024)
+        echo_client = TestClient(echo)
+        bomb = bytes(16 * 1024 * 1024)
+        for encoding, compress in [("gzip", gzip.compress), ("zstd", zstandard.ZstdCompressor().compress)]:
+            headers = {"Content-Encoding": encoding}
+            response = echo_client.post("/echo", content=compress(bomb), headers=headers)
+            assert response.status_code == 413
+            response = echo_client.post("/echo", content=compress(bytes(64 * 1024)), headers=headers)
+            assert response.json() == {"size": 64 * 1024}
+
+    def test_large_responses_compressed(self, client):
+        """Test responses above the minimum size are compressed, small ones are not"""
+        headers = {"Accept-Encoding": "zstd"}
+        large = client.post("/api/predict-batch", json={"data": make_rows(200)}, headers=headers)
+        assert large.headers["content-encoding"] == "zstd"
+        assert len(large.json()["predictions"]) == 200
+        small = client.post("/api/predict-batch", json={"data": make_rows(1)}, headers=headers)
+        assert "content-encoding" not in small.headers
+
+    def test_streamed_response_compressed(self, client):
+        """Test streamed NDJSON is compressed chunk by chunk"""
+        csv = "\n".join([",".join(PredictionInput.model_fields)] + [
+            ",".join(str(v) for v in row.values()) for row in make_rows(10)
+        ]).encode()
+        with patch.object(endpoints_module, 'COLUMNAR_CHUNK_ROWS', 4):
+            response = client.post(
+                "/api/predict-batch-columnar", content=csv,
+                headers={"Content-Type": "text/csv", "Accept-Encoding": "gzip"}
+            )
+        assert response.headers["content-encoding"] == "gzip"
+        assert [json.loads(line)["prediction"] for line in response.text.splitlines()] == [10 * i + 5.0 for i in range(10)]
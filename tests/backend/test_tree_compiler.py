@@ -0,0 +1,176 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.utils.tree_compiler import (
+    CompiledEnsemble,
+    compile_booster,
+    MISSING_NONE,
+    MISSING_ZERO,
+    MISSING_NAN,
+    frame_to_matrix,
+    probe_matrix,
+    verify_compiled,
+)
+
+
+def split(feature, threshold, left, right, default_left=True, missing=MISSING_NAN, categories=None):
+    node = {
+        "feature": feature, "threshold": threshold, "left": left, "right": right,
+        "default_left": default_left, "missing": missing, "value": 0.0,
+    }
+    if categories is not None:
+        node["categories"] = categories
+    return node
+
+
+def leaf(index, value):
+    return {
+        "feature": 0, "threshold": 0.0, "left": index, "right": index,
+        "default_left": True, "missing": MISSING_NONE, "value": value,
+    }
+
+
+def stump(library, missing=MISSING_NAN, default_left=True, categories=None):
+    """One split on feature 0 at 1.0 (or on categories) with leaves 10 / 20"""
+    nodes = [
+        split(0, 1.0, 1, 2, default_left, missing, categories),
+        leaf(1, 10.0),
+        leaf(2, 20.0),
+    ]
+    return CompiledEnsemble(library, ["f0"], nodes, [0])
+
+
+class TestCompiledEnsemble:
+    """Test cases for the array-backed tree evaluator"""
+
+    def test_lightgbm_threshold_is_inclusive(self):
+        """Test LightGBM sends x <= threshold left"""
+        model = stump("lightgbm")
+        result = model.predict_matrix(np.array([[0.5], [1.0], [1.5]]))
+        assert result.tolist() == [10.0, 10.0, 20.0]
+
+    def test_xgboost_threshold_is_strict(self):
+        """Test XGBoost sends x < threshold left and adds the base score"""
+        nodes = [split(0, 1.0, 1, 2), leaf(1, 10.0), leaf(2, 20.0)]
+        model = CompiledEnsemble("xgboost", ["f0"], nodes, [0], base_score=np.float32(0.5))
+        result = model.predict_matrix(np.array([[0.5], [1.0]]))
+        assert result.dtype == np.float32
+        assert result.tolist() == [10.5, 20.5]
+
+    def test_missing_values_follow_default_direction(self):
+        """Test NaN takes the default direction of a split"""
+        assert stump("lightgbm", default_left=False).predict_matrix(np.array([[np.nan]]))[0] == 20.0
+        assert stump("lightgbm", default_left=True).predict_matrix(np.array([[np.nan]]))[0] == 10.0
+
+    def test_lightgbm_nan_as_zero(self):
+        """Test NaN is compared as zero when the split has no missing handling"""
+        model = stump("lightgbm", missing=MISSING_NONE, default_left=False)
+        assert model.predict_matrix(np.array([[np.nan]]))[0] == 10.0
+
+    def test_lightgbm_zero_as_missing(self):
+        """Test zero takes the default direction for zero-as-missing splits"""
+        nodes = [split(0, -1.0, 1, 2, True, MISSING_ZERO), leaf(1, 10.0), leaf(2, 20.0)]
+        model = CompiledEnsemble("lightgbm", ["f0"], nodes, [0])
+        result = model.predict_matrix(np.array([[0.0], [np.nan], [1.0]]))
+        assert result.tolist() == [10.0, 10.0, 20.0]
+
+    def test_categorical_split_direction(self):
+        """Test categories in the set go left for LightGBM and right for XGBoost"""
+        X = np.array([[3.0], [4.0], [100.0], [-1.0], [np.nan]])
+        lightgbm = stump("lightgbm", default_left=False, categories=[1, 3])
+        assert lightgbm.predict_matrix(X).tolist() == [10.0, 20.0, 20.0, 20.0, 20.0]
+        xgboost = stump("xgboost", default_left=True, categories=[1, 3])
+        assert xgboost.predict_matrix(X).tolist() == [20.0, 10.0, 10.0, 10.0, 10.0]
+
+    def test_trees_of_different_depth(self):
+        """Test shallow trees stay on their leaf while deeper ones are walked"""
+        nodes = [
+            split(0, 1.0, 1, 2), leaf(1, 1.0),
+            split(1, 0.0, 3, 4), leaf(3, 2.0), leaf(4, 3.0),
+            leaf(5, 100.0),
+        ]
+        model = CompiledEnsemble("lightgbm", ["f0", "f1"], nodes, [0, 5])
+        assert model.max_depth == 2
+        result = model.predict_matrix(np.array([[0.0, 0.0], [2.0, -1.0], [2.0, 1.0]]))
+        assert result.tolist() == [101.0, 102.0, 103.0]
+
+    def test_catboost_scale_and_bias(self):
+        """Test CatBoost applies scale and bias to the sum of leaves"""
+        nodes = [split(0, 1.0, 1, 2), leaf(1, 1.0), leaf(2, 2.0)]
+        model = CompiledEnsemble("catboost", ["f0"], nodes, [0], base_score=0.5, scale=2.0)
+        assert model.predict_matrix(np.array([[5.0]]))[0] == 4.5
+
+    def test_probe_matrix_covers_thresholds(self):
+        """Test probe rows hit the split values and missing values"""
+        model = stump("lightgbm")
+        X = probe_matrix(model, n_rows=256)
+        assert X.shape == (256, 1)
+        assert (X[:, 0] == 1.0).any()
+        assert np.isnan(X[:, 0]).any()
+
+
+class TestFrameToMatrix:
+    """Test cases for converting request frames to feature matrices"""
+
+    def test_categorical_codes_and_order(self):
+        """Test columns follow model order and categoricals become codes"""
+        df = pd.DataFrame({
+            "store_id": pd.Categorical([1, np.nan], categories=[0, 1, 2]),
+            "sell_price": [1.5, 2.0],
+        })
+        X = frame_to_matrix(df, ["sell_price", "store_id"])
+        assert X[:, 0].tolist() == [1.5, 2.0]
+        assert X[0, 1] == 1.0
+        assert np.isnan(X[1, 1])
+
+
+@pytest.fixture
+def sales_frame():
+    """Training frame with a categorical store, missing prices and missing stores"""
+    rng = np.random.default_rng(0)
+    n = 600
+    df = pd.DataFrame({
+        "store_id": pd.Categorical(rng.integers(0, 6, n), categories=range(6)),
+        "sell_price": rng.normal(5.0, 2.0, n),
+        "lag_7": rng.poisson(3, n).astype(float),
+    })
+    df.loc[rng.random(n) < 0.15, "sell_price"] = np.nan
+    df.loc[rng.random(n) < 0.1, "store_id"] = np.nan
+    y = (
+        2.0 * df["store_id"].cat.codes.to_numpy()
+        + np.nan_to_num(df["sell_price"].to_numpy())
+        + df["lag_7"].to_numpy()
+        + rng.normal(0.0, 0.1, n)
+    )
+    return df, y
+
+
+class TestBoosterParity:
+    """Test cases comparing compiled trees with the libraries' own predictions"""
+
+    def test_lightgbm_parity(self, sales_frame):
+        """Test a trained LightGBM booster with categoricals and NaN compiles exactly"""
+        lgb = pytest.importorskip("lightgbm")
+        df, y = sales_frame
+        model = lgb.LGBMRegressor(n_estimators=30, num_leaves=15, min_child_samples=5, verbose=-1)
+        model.fit(df, y)
+        compiled = compile_booster("lightgbm", model.booster_)
+        assert compiled.categorical.any()
+        X = frame_to_matrix(df, compiled.feature_names)
+        assert np.array_equal(compiled.predict_matrix(X), model.predict(df))
+        assert verify_compiled(compiled, model.booster_)
+
+    def test_xgboost_parity(self, sales_frame):
+        """Test a trained XGBoost booster with categoricals and NaN compiles exactly"""
+        xgb = pytest.importorskip("xgboost")
+        df, y = sales_frame
+        model = xgb.XGBRegressor(
+            n_estimators=30, max_depth=4, tree_method="hist",
+            enable_categorical=True, max_cat_to_onehot=1
+        )
+        model.fit(df, y)
+        compiled = compile_booster("xgboost", model.get_booster())
+        assert compiled.categorical.any()
+        X = frame_to_matrix(df, compiled.feature_names)
+        assert np.array_equal(compiled.predict_matrix(X), model.predict(df))
+        assert verify_compiled(compiled, model.get_booster())
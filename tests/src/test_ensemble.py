@@ -0,0 +1,103 @@
+import json
+import pytest
+import pandas as pd
+import numpy as np
+from unittest.mock import MagicMock
+from src.ensemble import EnsembleRegressor, fit_ensemble_weights, holdout_split
+from src.artifacts import save_native_model
+from src.preprocessing import build_feature_schema
+
+
+class ColumnModel:
+    """Stand-in model predicting one column and recording its input"""
+
+    def __init__(self, column):
+        self.column = column
+        self.inputs = []
+
+    def predict(self, X):
+        self.inputs.append(X)
+        return np.asarray(X[self.column], dtype=np.float64)
+
+
+class TestFitEnsembleWeights:
+    """Test cases for the learned ensemble weights"""
+
+    def test_recovers_mixture(self):
+        """Test the weights of a target mixed from two models are found"""
+        rng = np.random.default_rng(0)
+        a, b, c = rng.normal(size=(3, 500))
+        weights = fit_ensemble_weights({"a": a, "b": b, "c": c}, 0.7 * a + 0.3 * b)
+        assert weights["a"] == pytest.approx(0.7, abs=1e-4)
+        assert weights["b"] == pytest.approx(0.3, abs=1e-4)
+        assert weights["c"] == pytest.approx(0.0, abs=1e-4)
+
+    def test_weights_are_convex(self):
+        """Test an anti-correlated model gets no negative weight"""
+        rng = np.random.default_rng(1)
+        y = rng.normal(size=300) * 100
+        weights = fit_ensemble_weights({"good": y + rng.normal(size=300), "bad": -y}, y)
+        assert min(weights.values()) >= 0
+        assert sum(weights.values()) == pytest.approx(1.0)
+        assert weights["good"] > 0.99
+
+
+class TestHoldoutSplit:
+    """Test cases for the training-period holdout the weights are fit on"""
+
+    def test_tail_follows_head(self):
+        """Test the tail holds the last training days and targets stay aligned"""
+        X_train = pd.DataFrame({"d": np.repeat(np.arange(1, 11), 3), "x": np.arange(30.0)})
+        y_train = pd.Series(np.arange(30.0) * 2, name="sold")
+        X_head, X_tail, y_head, y_tail = holdout_split(X_train, y_train)
+        assert X_head["d"].max() < X_tail["d"].min()
+        assert sorted(X_tail["d"].unique()) == [9, 10]
+        assert list(X_tail.columns) == ["d", "x"]
+        assert (y_head.to_numpy() == X_head["x"].to_numpy() * 2).all()
+        assert (y_tail.to_numpy() == X_tail["x"].to_numpy() * 2).all()
+
+
+class TestEnsembleRegressor:
+    """Test cases for the weighted ensemble of trained models"""
+
+    @pytest.fixture
+    def X(self):
+        return pd.DataFrame({"sell_price": [1.0, 2.0], "store_id": [0, 1]})
+
+    def test_members_get_their_own_input(self, X):
+        """Test CatBoost gets raw values, the other members categoricals"""
+        levels = {"store_id": [0, 1]}
+        models = {"lgbm": ColumnModel("sell_price"), "catboost": ColumnModel("sell_price")}
+        schemas = {name: build_feature_schema(name, X, levels) for name in models}
+        ensemble = EnsembleRegressor(models, {"lgbm": 0.25, "catboost": 0.75}, schemas)
+
+        assert ensemble.predict(X).tolist() == [1.0, 2.0]
+        assert isinstance(models["lgbm"].inputs[0]["store_id"].dtype, pd.CategoricalDtype)
+        assert models["catboost"].inputs[0]["store_id"].dtype == np.int64
+
+    def test_weighted_sum(self, X):
+        """Test predictions are the weighted sum of the members"""
+        schemas = {name: build_feature_schema(name, X, {}) for name in ("lgbm", "xgboost")}
+        ensemble = EnsembleRegressor(
+            {"lgbm": ColumnModel("sell_price"), "xgboost": ColumnModel("store_id")},
+            {"lgbm": 0.5, "xgboost": 0.5},
+            schemas
+        )
+        assert ensemble.predict(X).tolist() == [0.5, 1.5]
+        assert build_feature_schema("ensemble", X, {})["categorical_encoding"] == "raw"
+
+    def test_native_artifact(self, X, tmp_path):
+        """Test every member is saved in its own directory next to the weights"""
+        models = {"lgbm": MagicMock(), "catboost": MagicMock()}
+        schemas = {name: build_feature_schema(name, X, {"store_id": [0, 1]}) for name in models}
+        ensemble = EnsembleRegressor(models, {"lgbm": 0.4, "catboost": 0.6}, schemas)
+
+        path = save_native_model(ensemble, "ensemble", build_feature_schema("ensemble", X, {}), str(tmp_path))
+
+        assert path == str(tmp_path)
+        manifest = json.loads((tmp_path / "native_model.json").read_text())
+        assert manifest["library"] == "ensemble"
+        assert [(m["model_dir"], m["weight"]) for m in manifest["members"]] == [("lgbm", 0.4), ("catboost", 0.6)]
+        assert json.loads((tmp_path / "lgbm" / "native_model.json").read_text())["library"] == "lightgbm"
+        models["lgbm"].booster_.save_model.assert_called_once_with(str(tmp_path / "lgbm" / "model.txt"))
+        models["catboost"].save_model.assert_called_once()
@@ -2,7 +2,7 @@ import pytest
 import pandas as pd
 import numpy as np
 from unittest.mock import MagicMock
-from src.evaluate import evaluate_model
+from src.evaluate import evaluate_model, MetricAccumulator, combined_metric
 
 
 class TestEvaluateModel:
@@ -81,3 +81,84 @@ class TestEvaluateModel:
         
         # RMSE should be sqrt of MSE
         assert metrics['rmse'] == pytest.approx(np.sqrt(metrics['mse']), abs=1e-10)
+
+
+class TestMetricAccumulator:
+    """Test cases for the single-pass MetricAccumulator"""
+
+    @pytest.fixture
+    def data(self):
+        rng = np.random.default_rng(0)
+        y_true = rng.poisson(3.0, size=1000).astype(float)
+        y_pred = y_true + rng.normal(0, 1.0, size=1000)
+        groups = rng.integers(0, 10, size=1000)
+        return y_true, y_pred, groups
+
+    def test_matches_sklearn(self, data):
+        """Test that accumulated metrics match sklearn"""
+        from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+        y_true, y_pred, _ = data
+
+        metrics = MetricAccumulator().update(y_true, y_pred).result()
+
+        assert metrics['mse'] == pytest.approx(mean_squared_error(y_true, y_pred))
+        assert metrics['mae'] == pytest.approx(mean_absolute_error(y_true, y_pred))
+        assert metrics['r2'] == pytest.approx(r2_score(y_true, y_pred))
+
+    def test_merge_equals_single_pass(self, data):
+        """Test that merging chunk accumulators gives the full-data result"""
+        y_true, y_pred, groups = data
+        full = MetricAccumulator().update(y_true, y_pred, groups)
+
+        merged = MetricAccumulator()
+        for start in range(0, 1000, 300):
+            part = MetricAccumulator().update(
+                y_true[start:start + 300], y_pred[start:start + 300], groups[start:start + 300]
+            )
+            merged.merge(part)
+
+        for key, value in full.result().items():
+            assert merged.result()[key] == pytest.approx(value)
+        np.testing.assert_allclose(merged.group_result()['rmse'], full.group_result()['rmse'])
+
+    def test_group_result(self):
+        """Test per-group breakdown via integer codes"""
+        acc = MetricAccumulator().update([1, 2, 3, 4], [1, 2, 5, 4], [0, 0, 2, 2])
+
+        groups = acc.group_result()
+
+        assert list(groups['count']) == [2, 0, 2]
+        assert groups['mse'][0] == 0.0
+        assert np.isnan(groups['mse'][1])
+        assert groups['mse'][2] == pytest.approx(2.0)
+
+    def test_missing_group_codes(self):
+        """Test rows without a group code count overall but not in any group"""
+        codes = pd.Categorical([0, np.nan, 1], categories=[0, 1])
+        acc = MetricAccumulator().update([1, 2, 3], [2, 2, 3], codes)
+
+        assert acc.n == 3
+        assert acc.ungrouped_n == 1
+        assert list(acc.group_result()['count']) == [1, 1]
+        with pytest.raises(ValueError):
+            MetricAccumulator().update([1], [1], [-1])
+
+    def test_chunked_evaluate_model(self):
+        """Test that chunked evaluation matches evaluation in one go"""
+        X_valid = pd.DataFrame({'feature1': np.arange(10)})
+        y_valid = pd.Series(np.arange(10, dtype=float))
+        model = MagicMock()
+        model.predict.side_effect = lambda X: X['feature1'].to_numpy() * 1.1
+
+        chunked = evaluate_model(model, X_valid, y_valid, chunk_size=3)
+        whole = evaluate_model(model, X_valid, y_valid)
+
+        assert model.predict.call_count == 5
+        for key, value in whole.items():
+            assert chunked[key] == pytest.approx(value)
+
+    def test_combined_metric(self):
+        """Test the weighted selection score"""
+        metrics = {'rmse': 1.0, 'mae': 1.0, 'mse': 1.0, 'r2': 0.0}
+
+        assert combined_metric(metrics) == pytest.approx(1.0)
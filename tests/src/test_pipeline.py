@@ -0,0 +1,60 @@
+import pytest
+import os
+from unittest.mock import MagicMock
+from src.pipeline import StageCache, data_fingerprint
+
+
+class TestStageCache:
+    """Test cases for the content-addressed stage cache"""
+
+    def test_hit_skips_compute(self, tmp_path):
+        """Test that a stored stage is loaded instead of recomputed"""
+        compute = MagicMock(return_value={'rmse': 1.0})
+        key = StageCache(str(tmp_path)).key('train', 'code', params={'lr': 0.05})
+
+        first = StageCache(str(tmp_path)).run('train', key, compute)
+        second = StageCache(str(tmp_path)).run('train', key, compute)
+
+        compute.assert_called_once()
+        assert first == second == {'rmse': 1.0}
+
+    def test_key_depends_on_code_params_and_inputs(self, tmp_path):
+        """Test that any change in a stage's inputs gives a new key"""
+        cache = StageCache(str(tmp_path))
+        base = cache.key('train', 'code', params={'lr': 0.05}, inputs=['a'])
+
+        assert cache.key('train', 'code', params={'lr': 0.05}, inputs=['a']) == base
+        assert cache.key('train', 'code2', params={'lr': 0.05}, inputs=['a']) != base
+        assert cache.key('train', 'code', params={'lr': 0.1}, inputs=['a']) != base
+        assert cache.key('train', 'code', params={'lr': 0.05}, inputs=['b']) != base
+        assert cache.key('evaluate', 'code', params={'lr': 0.05}, inputs=['a']) != base
+
+    def test_failed_stage_is_not_cached(self, tmp_path):
+        """Test that an exception leaves no cache entry behind"""
+        cache = StageCache(str(tmp_path))
+        key = cache.key('register')
+
+        with pytest.raises(RuntimeError):
+            cache.run('register', key, MagicMock(side_effect=RuntimeError("server down")))
+
+        assert not cache.has('register', key)
+
+
+class TestDataFingerprint:
+    """Test cases for data_fingerprint"""
+
+    def test_reads_dvc_md5(self, tmp_path):
+        """Test that the md5 recorded by DVC is used without reading the data"""
+        data_path = tmp_path / 'CA_1_0.pkl'
+        (tmp_path / 'CA_1_0.pkl.dvc').write_text(
+            "outs:\n- md5: a74918e492ee898170668de10773d715\n  path: CA_1_0.pkl\n"
+        )
+
+        assert data_fingerprint(str(data_path)) == 'a74918e492ee898170668de10773d715'
+
+    def test_hashes_untracked_file(self, tmp_path):
+        """Test the fallback for files without a .dvc entry"""
+        data_path = tmp_path / 'CA_1_1.pkl'
+        data_path.write_bytes(b'sales')
+
+        assert data_fingerprint(str(data_path)) == '9ed083b1436e5f40ef984b28255eef18'
@@ -0,0 +1,99 @@
+import pytest
+import pandas as pd
+import numpy as np
+from src.preprocessing import (
+    split_train_test,
+    fit_category_levels,
+    encode_categoricals,
+    to_model_input,
+    build_feature_schema,
+)
+
+
+@pytest.fixture
+def frames():
+    X_train = pd.DataFrame({
+        'item_id': [3, 1, 2, 1],
+        'event_name_1': [-1, 4, -1, 2],
+        'sell_price': [1.0, 2.0, 3.0, 4.0],
+    })
+    X_valid = pd.DataFrame({
+        'item_id': [2, 7],
+        'event_name_1': [4, -1],
+        'sell_price': [5.0, 6.0],
+    })
+    return X_train, X_valid
+
+
+class TestCategoricalFeatures:
+    """Test cases for the native categorical encoding"""
+
+    def test_fit_category_levels_only_declared_columns(self, frames):
+        """Test that levels are fitted for declared categoricals only"""
+        X_train, _ = frames
+
+        levels = fit_category_levels(X_train)
+
+        assert levels == {'item_id': [1, 2, 3], 'event_name_1': [-1, 2, 4]}
+
+    def test_encode_categoricals_consistent_codes(self, frames):
+        """Test that train and valid share codes and unseen values are missing"""
+        X_train, X_valid = frames
+        levels = fit_category_levels(X_train)
+
+        train_enc = encode_categoricals(X_train, levels)
+        valid_enc = encode_categoricals(X_valid, levels)
+
+        assert list(train_enc['item_id'].cat.codes) == [2, 0, 1, 0]
+        assert list(valid_enc['item_id'].cat.codes) == [1, -1]
+        assert list(valid_enc['event_name_1'].cat.codes) == [2, 0]
+        assert valid_enc['sell_price'].dtype == np.float64
+        # Input frame is left untouched
+        assert X_valid['item_id'].dtype != 'category'
+
+    def test_to_model_input_catboost_keeps_raw_values(self, frames):
+        """Test that CatBoost receives raw integer categoricals"""
+        X_train, _ = frames
+        levels = fit_category_levels(X_train)
+
+        assert to_model_input('catboost', X_train, levels) is X_train
+        assert to_model_input('lgbm', X_train, levels)['item_id'].dtype == 'category'
+
+    def test_build_feature_schema(self, frames):
+        """Test that the schema records order, encoding and levels"""
+        X_train, _ = frames
+        levels = fit_category_levels(X_train)
+
+        schema = build_feature_schema('xgboost', X_train, levels)
+
+        assert schema['features'] == ['item_id', 'event_name_1', 'sell_price']
+        assert schema['categorical_features'] == ['item_id', 'event_name_1']
+        assert schema['categorical_encoding'] == 'category'
+        assert schema['category_levels'] == levels
+
+
+class TestSplitTrainTest:
+    """Test cases for the day-based train/validation split"""
+
+    def test_days_do_not_overlap(self):
+        """Test the boundary day goes to validation whole"""
+        df = pd.DataFrame({'d': np.repeat([1, 2, 3, 4, 5], 3), 'sold': np.arange(15)})
+        df_train, df_valid = split_train_test(df)
+        assert sorted(df_train['d'].unique()) == [1, 2, 3, 4]
+        assert sorted(df_valid['d'].unique()) == [5]
+        assert len(df_train) + len(df_valid) == len(df)
+
+    def test_unsorted_rows(self):
+        """Test the split follows days, not row order"""
+        df = pd.DataFrame({'d': [5, 1, 4, 2, 3], 'sold': range(5)})
+        df_train, df_valid = split_train_test(df)
+        assert df_train['d'].max() < df_valid['d'].min()
+
+    def test_one_dominant_day(self):
+        """Test validation is never empty and training keeps the first day"""
+        df = pd.DataFrame({'d': [1] * 9 + [2], 'sold': range(10)})
+        df_train, df_valid = split_train_test(df)
+        assert df_train['d'].unique().tolist() == [1]
+        assert df_valid['d'].unique().tolist() == [2]
+        with pytest.raises(ValueError):
+            split_train_test(df[df['d'] == 1])
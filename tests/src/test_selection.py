@@ -0,0 +1,73 @@
+import pytest
+import pandas as pd
+import numpy as np
+from unittest.mock import MagicMock, patch
+from src.selection import select_model, profile_model
+
+
+class ZeroModel:
+    """Picklable stand-in for a booster"""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict(self, X):
+        self.batch_sizes.append(len(X))
+        return np.zeros(len(X))
+
+
+@pytest.fixture
+def candidates():
+    return {
+        'lgbm': {'metrics': {'wrmsse': 0.70}, 'profile': {'latency_single_p99_ms': 1.0}},
+        'catboost': {'metrics': {'wrmsse': 0.69}, 'profile': {'latency_single_p99_ms': 9.0}},
+        'xgboost': {'metrics': {'wrmsse': 0.75}, 'profile': {'latency_single_p99_ms': 0.5}},
+    }
+
+
+class TestSelectModel:
+    """Test cases for the model selection policies"""
+
+    def test_metric_policy(self, candidates):
+        """Test that the metric policy ignores latency"""
+        assert select_model(candidates, 'wrmsse') == 'catboost'
+
+    def test_latency_cap(self, candidates):
+        """Test that models over the p99 cap are excluded"""
+        assert select_model(candidates, 'wrmsse', 'latency_cap', max_latency_ms=5.0) == 'lgbm'
+
+    def test_latency_cap_nothing_within(self, candidates):
+        """Test that the fastest model wins when none meets the cap"""
+        assert select_model(candidates, 'wrmsse', 'latency_cap', max_latency_ms=0.1) == 'xgboost'
+
+    def test_tradeoff(self, candidates):
+        """Test that a rounding-error metric win does not buy 9x latency"""
+        assert select_model(candidates, 'wrmsse', 'tradeoff', latency_weight=0.01) == 'lgbm'
+        assert select_model(candidates, 'wrmsse', 'tradeoff', latency_weight=0.0) == 'catboost'
+
+    def test_unknown_policy(self, candidates):
+        """Test that an unknown policy raises ValueError"""
+        with pytest.raises(ValueError, match="Unknown selection policy"):
+            select_model(candidates, 'wrmsse', 'fastest')
+
+
+class TestProfileModel:
+    """Test cases for profile_model"""
+
+    @patch('src.selection.save_native_model')
+    def test_profile_keys(self, mock_save, tmp_path):
+        """Test that latency and size measurements are reported"""
+        model_file = tmp_path / 'model.txt'
+        model_file.write_bytes(b'0' * 2048)
+        mock_save.return_value = str(model_file)
+        model = ZeroModel()
+        X_valid = pd.DataFrame({'feature1': np.arange(50.0)})
+
+        profile = profile_model(model, 'lgbm', X_valid, {}, n_single=20, batch_rows=1000)
+
+        assert profile['latency_single_p50_ms'] <= profile['latency_single_p99_ms']
+        assert profile['latency_batch_1k_ms'] >= 0
+        assert profile['artifact_size_mb'] == pytest.approx(2048 / 2**20)
+        assert profile['pickle_size_mb'] > 0
+        # The batch is built from the validation rows, repeated to the requested size
+        assert 1000 in model.batch_sizes
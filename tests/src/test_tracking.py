@@ -0,0 +1,149 @@
+import pytest
+import os
+from unittest.mock import MagicMock
+import sys
+
+# Mock mlflow before importing the tracking module
+sys.modules.setdefault('mlflow', MagicMock())
+sys.modules.setdefault('mlflow.tracking', MagicMock())
+sys.modules.setdefault('mlflow.entities', MagicMock())
+
+from src.tracking import BatchLogger
+
+
+class TestBatchLogger:
+    """Test cases for the background MLflow batch logger"""
+
+    def test_flush_sends_one_batch_per_run(self, tmp_path):
+        """Test that queued metrics and params go out in a single log_batch"""
+        client = MagicMock()
+        tracker = BatchLogger(spool_dir=str(tmp_path), flush_interval=60, client=client)
+
+        tracker.log_metrics('run_1', {'rmse': 1.5, 'mae': 0.5})
+        tracker.log_params('run_1', {'model_name': 'lgbm', 'learning_rate': 0.05})
+        assert tracker.flush(timeout=5)
+        tracker.close()
+
+        client.log_batch.assert_called_once()
+        args, kwargs = client.log_batch.call_args
+        assert args[0] == 'run_1'
+        assert len(kwargs['metrics']) == 2
+        assert len(kwargs['params']) == 2
+        # Nothing left in the spool once the server accepted the batch
+        assert os.listdir(tmp_path) == []
+
+    def test_spool_and_replay_when_server_down(self, tmp_path):
+        """Test that failed batches are kept on disk and replayed later"""
+        down = MagicMock()
+        down.log_batch.side_effect = ConnectionError("tracking server unreachable")
+        tracker = BatchLogger(spool_dir=str(tmp_path), flush_interval=60, client=down)
+
+        tracker.log_metrics('run_1', {'rmse': 1.5})
+        assert tracker.flush(timeout=5)
+        tracker.close()
+
+        assert len(os.listdir(tmp_path)) == 1
+
+        up = MagicMock()
+        tracker = BatchLogger(spool_dir=str(tmp_path), flush_interval=60, client=up)
+        tracker.close()
+
+        up.log_batch.assert_called_once()
+        assert up.log_batch.call_args[0][0] == 'run_1'
+        assert os.listdir(tmp_path) == []
+
+    def test_unreadable_spool_file_quarantined(self, tmp_path):
+        """Test that a corrupt spool file is set aside and later batches still go out"""
+        (tmp_path / "0-corrupt.json").write_text('{"run_id": ')
+        client = MagicMock()
+        tracker = BatchLogger(spool_dir=str(tmp_path), flush_interval=60, client=client)
+
+        tracker.log_metrics('run_1', {'rmse': 1.5})
+        assert tracker.flush(timeout=5)
+        tracker.close()
+
+        client.log_batch.assert_called_once()
+        assert os.listdir(tmp_path) == ["0-corrupt.json.bad"]
+
+
+def deferred_run(tracker, artifact_dir):
+    with tracker.start_run('sales', 'lgbm') as run:
+        run.log_metrics({'rmse': 1.5})
+        run.log_params({'model_name': 'lgbm'})
+        run.log_artifacts(str(artifact_dir), 'native_model')
+        run.log_dict({'features': ['sell_price']}, 'feature_schema.json')
+        run.register_model('model', 'BestRegressionModel')
+    return run
+
+
+class TestDeferredRun:
+    """Test cases for runs created on the tracking server in the background"""
+
+    @pytest.fixture
+    def artifact_dir(self, tmp_path):
+        directory = tmp_path / "artifacts"
+        directory.mkdir()
+        (directory / "model.txt").write_text("tree")
+        return directory
+
+    def test_run_created_artifacts_logged_and_registered(self, tmp_path, artifact_dir):
+        """Test that a run ending while the server is down is created, filled and registered later"""
+        spool = tmp_path / "spool"
+        down = MagicMock()
+        down.get_experiment_by_name.side_effect = ConnectionError("tracking server unreachable")
+        tracker = BatchLogger(spool_dir=str(spool), flush_interval=60, client=down)
+        deferred_run(tracker, artifact_dir)
+        assert tracker.flush(timeout=5)
+        tracker.close()
+        down.create_run.assert_not_called()
+
+        # The artifacts were copied, so the originals may go away with training
+        (artifact_dir / "model.txt").unlink()
+        up, register = MagicMock(), MagicMock()
+        up.get_experiment_by_name.return_value = None
+        up.create_experiment.return_value = 'exp_1'
+        up.create_run.return_value.info.run_id = 'run_1'
+        uploaded = []
+        up.log_artifacts.side_effect = lambda run_id, local_dir, path: uploaded.append((path, sorted(os.listdir(local_dir))))
+        tracker = BatchLogger(spool_dir=str(spool), flush_interval=60, client=up, register_model=register)
+        tracker.close()
+
+        up.create_run.assert_called_once_with('exp_1', run_name='lgbm')
+        assert up.log_batch.call_args[0][0] == 'run_1'
+        assert uploaded == [('native_model', ['model.txt']), (None, ['feature_schema.json'])]
+        up.set_terminated.assert_called_once_with('run_1')
+        register.assert_called_once_with('runs:/run_1/model', 'BestRegressionModel')
+        assert os.listdir(spool / "runs") == []
+        assert [name for name in os.listdir(spool) if name.endswith('.json')] == []
+
+    def test_failed_replay_resumes_without_a_second_run(self, tmp_path, artifact_dir):
+        """Test that a replay failing after run creation reuses the created run"""
+        spool = tmp_path / "spool"
+        flaky = MagicMock()
+        flaky.create_run.return_value.info.run_id = 'run_1'
+        flaky.log_artifacts.side_effect = [None, ConnectionError("upload failed")]
+        tracker = BatchLogger(spool_dir=str(spool), flush_interval=60, client=flaky, register_model=MagicMock())
+        deferred_run(tracker, artifact_dir)
+        tracker.close()
+
+        up, register = MagicMock(), MagicMock()
+        tracker = BatchLogger(spool_dir=str(spool), flush_interval=60, client=up, register_model=register)
+        tracker.close()
+
+        up.create_run.assert_not_called()
+        up.log_batch.assert_not_called()
+        assert up.log_artifacts.call_count == 1
+        register.assert_called_once_with('runs:/run_1/model', 'BestRegressionModel')
+
+    def test_failed_run_is_dropped(self, tmp_path):
+        """Test that a run raising inside its block is not spooled"""
+        client = MagicMock()
+        tracker = BatchLogger(spool_dir=str(tmp_path), flush_interval=60, client=client)
+        with pytest.raises(RuntimeError):
+            with tracker.start_run('sales', 'lgbm') as run:
+                run.log_metrics({'rmse': 1.5})
+                raise RuntimeError("save failed")
+        tracker.close()
+
+        client.create_run.assert_not_called()
+        assert os.listdir(tmp_path / "runs") == []
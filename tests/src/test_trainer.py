@@ -4,19 +4,21 @@ import numpy as np
 from unittest.mock import patch, MagicMock
 import sys
 
-# Mock the ML libraries before importing trainer
-sys.modules['lightgbm'] = MagicMock()
-sys.modules['catboost'] = MagicMock()
-sys.modules['xgboost'] = MagicMock()
 
-from src.train.trainer import train
+@pytest.fixture
+def train():
+    """trainer.train imported with the ML libraries mocked for this test only"""
+    libraries = {name: MagicMock() for name in ('lightgbm', 'catboost', 'xgboost')}
+    with patch.dict(sys.modules, libraries):
+        from src.train.trainer import train
+        yield train
 
 
 class TestTrainer:
     """Test cases for train function"""
     
     @patch('src.train.trainer.train_lgbm')
-    def test_train_lgbm(self, mock_train_lgbm):
+    def test_train_lgbm(self, mock_train_lgbm, train):
         """Test that train dispatches to train_lgbm for lgbm model"""
         # Create mock data
         X_train = pd.DataFrame({'feature1': [1, 2, 3]})
@@ -41,7 +43,7 @@ class TestTrainer:
         assert result == mock_model
     
     @patch('src.train.trainer.train_catboost')
-    def test_train_catboost(self, mock_train_catboost):
+    def test_train_catboost(self, mock_train_catboost, train):
         """Test that train dispatches to train_catboost for catboost model"""
         # Create mock data
         X_train = pd.DataFrame({'feature1': [1, 2, 3]})
@@ -65,7 +67,7 @@ class TestTrainer:
         assert result == mock_model
     
     @patch('src.train.trainer.train_xgboost')
-    def test_train_xgboost(self, mock_train_xgboost):
+    def test_train_xgboost(self, mock_train_xgboost, train):
         """Test that train dispatches to train_xgboost for xgboost model"""
         # Create mock data
         X_train = pd.DataFrame({'feature1': [1, 2, 3]})
@@ -89,7 +91,7 @@ class TestTrainer:
         # Verify the result is the mock model
         assert result == mock_model
     
-    def test_train_unknown_model(self):
+    def test_train_unknown_model(self, train):
         """Test that train raises ValueError for unknown model"""
         # Create mock data
         X_train = pd.DataFrame({'feature1': [1, 2, 3]})
@@ -0,0 +1,112 @@
+import pytest
+import pandas as pd
+import numpy as np
+from unittest.mock import MagicMock
+from src.wrmsse import WRMSSEEvaluator, M5_LEVELS, build_summing_matrix
+from src.evaluate import evaluate_model
+
+
+def make_sales(n_days, first_day=1, seed=0):
+    """Two stores in two states, three items across two categories"""
+    rng = np.random.default_rng(seed)
+    items = pd.DataFrame({
+        'item_id': [0, 1, 2],
+        'dept_id': [0, 0, 1],
+        'cat_id': [0, 0, 1],
+    })
+    stores = pd.DataFrame({'store_id': [0, 1], 'state_id': [0, 1]})
+    days = pd.DataFrame({'d': np.arange(first_day, first_day + n_days)})
+    df = items.merge(stores, how='cross').merge(days, how='cross')
+    df['sold'] = rng.poisson(2.0, size=len(df)).astype(float)
+    df['sell_price'] = 1.0 + df['item_id']
+    return df
+
+
+def reference_wrmsse(df_train, df_valid, y_pred):
+    """Direct per-level loop over pandas groupbys"""
+    df_valid = df_valid.assign(pred=y_pred)
+    last = df_train['d'].max()
+    total = 0.0
+    for level in M5_LEVELS:
+        keys = list(level) or (lambda idx: 0)
+        hist = df_train.groupby(keys).apply(
+            lambda g: g.groupby('d')['sold'].sum().sort_index().to_numpy()
+        )
+        rev = df_train[df_train['d'] > last - 28].assign(
+            r=lambda x: x['sold'] * x['sell_price']
+        ).groupby(keys)['r'].sum()
+        fut = df_valid.groupby(keys).apply(
+            lambda g: np.sqrt(np.mean(
+                (g.groupby('d')['pred'].sum() - g.groupby('d')['sold'].sum()) ** 2
+            ))
+        )
+        for key, series in hist.items():
+            series = series[np.argmax(series != 0):]
+            scale = np.mean(np.diff(series) ** 2)
+            total += rev[key] / rev.sum() * fut[key] / np.sqrt(scale) / len(M5_LEVELS)
+    return total
+
+
+class TestWRMSSE:
+    """Test cases for the WRMSSE evaluator"""
+
+    @pytest.fixture
+    def frames(self):
+        df_train = make_sales(60)
+        df_valid = make_sales(7, first_day=61, seed=1)
+        return df_train, df_valid
+
+    def test_summing_matrix_shape(self, frames):
+        """Test one aggregate row per group of every level"""
+        df_train, _ = frames
+        series = df_train.drop_duplicates(['item_id', 'store_id'])
+
+        blocks = build_summing_matrix(series)
+
+        assert [b.shape[0] for b in blocks] == [1, 2, 2, 2, 2, 4, 4, 4, 4, 3, 6, 6]
+        # Every level partitions the bottom series
+        for block in blocks:
+            assert (block.sum(axis=0) == 1).all()
+
+    def test_perfect_forecast(self, frames):
+        """Test that a perfect forecast scores zero"""
+        df_train, df_valid = frames
+        evaluator = WRMSSEEvaluator(df_train)
+
+        assert evaluator.score(df_valid, df_valid['sold'], df_valid['sold']) == 0.0
+
+    def test_matches_reference(self, frames):
+        """Test against a direct groupby implementation"""
+        df_train, df_valid = frames
+        y_pred = df_valid['sold'].to_numpy() + np.linspace(-1, 1, len(df_valid))
+        evaluator = WRMSSEEvaluator(df_train)
+
+        score = evaluator.score(df_valid, df_valid['sold'], y_pred)
+
+        assert score == pytest.approx(reference_wrmsse(df_train, df_valid, y_pred))
+
+    def test_merge_chunks(self, frames):
+        """Test that chunk accumulators merge to the single-pass score"""
+        df_train, df_valid = frames
+        y_pred = df_valid['sold'].to_numpy() * 0.9
+        evaluator = WRMSSEEvaluator(df_train)
+
+        merged = evaluator.accumulator()
+        for start in range(0, len(df_valid), 10):
+            chunk = df_valid[start:start + 10]
+            merged.merge(evaluator.accumulator().update(chunk, chunk['sold'], y_pred[start:start + 10]))
+
+        assert merged.result() == pytest.approx(evaluator.score(df_valid, df_valid['sold'], y_pred))
+
+    def test_evaluate_model_with_wrmsse(self, frames):
+        """Test that evaluate_model reports wrmsse when given an evaluator"""
+        df_train, df_valid = frames
+        X_valid = df_valid.drop('sold', axis=1)
+        model = MagicMock()
+        model.predict.side_effect = lambda X: np.full(len(X), 2.0)
+        evaluator = WRMSSEEvaluator(df_train)
+
+        metrics = evaluate_model(model, X_valid, df_valid['sold'], chunk_size=8, wrmsse=evaluator)
+
+        expected = evaluator.score(X_valid, df_valid['sold'], np.full(len(X_valid), 2.0))
+        assert metrics['wrmsse'] == pytest.approx(expected)